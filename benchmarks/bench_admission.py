@@ -0,0 +1,84 @@
+"""并发配额下的突发流量：不做准入控制（失败后退避重试）与 AdmissionController 排队的对比。
+
+    python benchmarks/bench_admission.py --sessions 200 --quota 20 --live-share 0.2
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from dashscope_realtime import (AdmissionConfig, AdmissionController, DashScopeRealtimeASR, DashScopeSimulator,
+                                InProcessMetrics, Priority, SimulatorConfig)
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def session(url: str, args, admission, priority: int, waits: list, stats: dict):
+    # 一个会话：发起识别任务直到成功，然后推送 audio_ms 的音频
+    started = time.perf_counter()
+    for attempt in range(args.retries + 1):
+        errors = []
+        asr = DashScopeRealtimeASR("bench", url=url, admission=admission, priority=priority, on_error=errors.append)
+        await asr.connect()
+        await asyncio.sleep(args.start_ms / 1000)
+        if not errors:
+            waits.append(time.perf_counter() - started)
+            for _ in range(args.audio_ms // 100):
+                await asr.send_audio(b"\x00" * 3200)
+                await asyncio.sleep(0.1 / args.speed)
+            await asr.finish()
+            await asyncio.sleep(0.05)
+            await asr.disconnect()
+            return
+        stats["failed_attempts"] += 1
+        await asr.disconnect()
+        await asyncio.sleep(random.uniform(0, 0.1 * 2 ** attempt))
+    stats["gave_up"] += 1
+
+
+async def run(args, admission) -> None:
+    config = SimulatorConfig(max_concurrent_tasks=args.quota, handshake_latency=0.02)
+    async with DashScopeSimulator(config) as sim:
+        stats = {"failed_attempts": 0, "gave_up": 0}
+        live, batch = [], []
+        sessions = []
+        for i in range(args.sessions):
+            is_live = random.random() < args.live_share
+            sessions.append(session(sim.url, args, admission, Priority.LIVE if is_live else Priority.BATCH,
+                                    live if is_live else batch, stats))
+        started = time.perf_counter()
+        await asyncio.gather(*sessions)
+        wall = time.perf_counter() - started
+        label = "admission" if admission else "retry"
+        print(f"{label:>10}  wall {wall:6.2f}s  rejected run-tasks {sim.tasks_throttled:5d}  "
+              f"gave up {stats['gave_up']:4d}  live start p50={percentile(live, 0.5) * 1000:7.1f}ms "
+              f"p99={percentile(live, 0.99) * 1000:7.1f}ms  batch start p50={percentile(batch, 0.5) * 1000:7.1f}ms")
+
+
+async def main(args):
+    random.seed(args.seed)
+    await run(args, None)
+    random.seed(args.seed)
+    metrics = InProcessMetrics()
+    admission = AdmissionController(config=AdmissionConfig(max_concurrency=args.quota, rate=args.rate,
+                                                           burst=args.quota, queue_timeout=None), metrics=metrics)
+    await run(args, admission)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--quota", type=int, default=20, help="simulated concurrent task quota")
+    parser.add_argument("--rate", type=float, default=100.0, help="admission run-task rate per second")
+    parser.add_argument("--live-share", type=float, default=0.2)
+    parser.add_argument("--audio-ms", type=int, default=2000)
+    parser.add_argument("--speed", type=float, default=4.0)
+    parser.add_argument("--start-ms", type=int, default=20, help="time to wait for a task-failed after run-task")
+    parser.add_argument("--retries", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
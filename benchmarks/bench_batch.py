@@ -0,0 +1,47 @@
+"""离线批量转写吞吐：对比按实时节奏发送与不限速发送（audio-hours / wall-hour）。
+
+    python benchmarks/bench_batch.py --files 32 --seconds 60 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import wave
+
+from dashscope_realtime import BatchConfig, BatchTranscriber, DashScopeSimulator, SimulatorConfig
+
+
+def make_files(directory: str, count: int, seconds: int):
+    paths = []
+    silence = b"\x00\x00" * 16000 * seconds
+    for i in range(count):
+        path = os.path.join(directory, f"{i}.wav")
+        with wave.open(path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(silence)
+        paths.append(path)
+    return paths
+
+
+async def main(args):
+    async with DashScopeSimulator(SimulatorConfig(handshake_latency=args.handshake_ms / 1000)) as sim:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = make_files(directory, args.files, args.seconds)
+            for label, speed in (("paced x%g" % args.paced_speed, args.paced_speed), ("unpaced", None)):
+                batch = BatchTranscriber("test", url=sim.url,
+                                         batch=BatchConfig(concurrency=args.concurrency, speed=speed))
+                report = await batch.run(paths)
+                print(f"{label:>12}   {report.wall_seconds:7.2f}s wall   "
+                      f"{report.throughput:10.1f} audio-hours/hour   {len(report.failed)} failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=32)
+    parser.add_argument("--seconds", type=int, default=60, help="duration of each file")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--paced-speed", type=float, default=4.0, help="baseline sending speed relative to real time")
+    parser.add_argument("--handshake-ms", type=float, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+"""EventEmitter 的 emit 吞吐（多订阅者）以及 wait_for 造成的处理函数堆积。
+
+    python benchmarks/bench_emit.py --subscribers 1 10 100 1000
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+
+from dashscope_realtime.event import EventEmitter
+
+
+# 改造前的实现，作为对照
+class LegacyEmitter:
+    def __init__(self):
+        self.handlers = defaultdict(list)
+
+    def on(self, event_name, handler):
+        self.handlers[event_name].append(handler)
+
+    def emit(self, event_name, *args, **kwargs):
+        for handler in self.handlers[event_name]:
+            result = handler(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                asyncio.create_task(result)
+
+    async def wait_for(self, event_name):
+        future = asyncio.Future()
+
+        def once(*args, **kwargs):
+            if not future.done():
+                future.set_result(args[0] if args else None)
+
+        self.on(event_name, once)
+        return await future
+
+
+def sync_rate(emitter, subscribers: int, seconds: float) -> float:
+    counter = [0]
+
+    def handler(chunk):
+        counter[0] += 1
+
+    for _ in range(subscribers):
+        emitter.on("tts.audio", handler)
+    chunk = b"\x00" * 640
+    emits = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            emitter.emit("tts.audio", chunk)
+        emits += 100
+    return emits / (time.perf_counter() - started)
+
+
+async def async_rate(emitter, events: int) -> float:
+    done = asyncio.Event()
+    seen = [0]
+
+    async def handler(i):
+        seen[0] += 1
+        if seen[0] == events:
+            done.set()
+
+    emitter.on("asr.partial", handler)
+    started = time.perf_counter()
+    for i in range(events):
+        emitter.emit("asr.partial", i)
+    await done.wait()
+    return events / (time.perf_counter() - started)
+
+
+async def wait_for_leak(emitter, rounds: int) -> int:
+    # 每轮 wait_for 都由 emit 唤醒；旧实现的一次性处理函数永远不会被移除
+    for _ in range(rounds):
+        waiter = asyncio.ensure_future(emitter.wait_for("ready"))
+        await asyncio.sleep(0)
+        emitter.emit("ready")
+        await waiter
+    return len(emitter.handlers.get("ready", ()))
+
+
+async def main(args):
+    print("sync emit (emits/s)")
+    for n in args.subscribers:
+        legacy = sync_rate(LegacyEmitter(), n, args.seconds)
+        current = sync_rate(EventEmitter(), n, args.seconds)
+        print(f"  {n:>5} subscribers   legacy {legacy:>12,.0f}   current {current:>12,.0f}")
+
+    legacy = await async_rate(LegacyEmitter(), args.events)
+    current = await async_rate(EventEmitter(), args.events)
+    print(f"async handlers ({args.events} events)   legacy {legacy:,.0f}/s   current {current:,.0f}/s")
+
+    legacy = await wait_for_leak(LegacyEmitter(), args.rounds)
+    current = await wait_for_leak(EventEmitter(), args.rounds)
+    print(f"handlers left after {args.rounds} wait_for   legacy {legacy}   current {current}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--seconds", type=float, default=0.5, help="time spent on each sync case")
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=10000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,67 @@
+"""测量打断到下一段音频的延迟（interrupt → 新任务首包）。
+
+    python benchmarks/bench_interrupt.py --rounds 50 --handshake-ms 80
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from dashscope_realtime import DashScopeRealtimeTTS, SessionPool, DashScopeSimulator, SimulatorConfig
+
+LONG_TEXT = "这是一段比较长的播报内容，用来模拟打断发生时服务端仍在持续推送音频的情况。" * 2
+
+
+async def measure(tts: DashScopeRealtimeTTS, rounds: int, reconnect: bool):
+    first_chunk = asyncio.Event()
+    tts.send_audio = lambda chunk: first_chunk.set()
+    samples = []
+    for _ in range(rounds):
+        await tts.say(LONG_TEXT)
+        await first_chunk.wait()
+        await asyncio.sleep(0.05)
+        first_chunk.clear()
+        started = time.perf_counter()
+        if reconnect:
+            # 旧实现：断开并重建连接
+            await tts.disconnect()
+            await tts.connect()
+        else:
+            await tts.interrupt()
+        await tts.say("next")
+        await first_chunk.wait()
+        samples.append(time.perf_counter() - started)
+    await tts.disconnect()
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:<12} p50={statistics.median(samples) * 1000:7.2f}ms  p99={p99 * 1000:7.2f}ms  n={len(samples)}")
+
+
+async def main(args):
+    config = SimulatorConfig(
+        handshake_latency=args.handshake_ms / 1000,
+        tts_chunk_interval=args.chunk_ms / 1000,
+        tts_first_chunk_latency=args.first_chunk_ms / 1000,
+    )
+    async with DashScopeSimulator(config) as sim:
+        url = sim.url
+        report("reconnect", await measure(DashScopeRealtimeTTS("bench", url=url), args.rounds, reconnect=True))
+        # 模拟器和真实服务一样，finish-task 后仍会合成完剩余文本，同连接等排空并不比重连快
+        report("same-socket", await measure(DashScopeRealtimeTTS("bench", url=url), args.rounds, reconnect=False))
+        report("standby", await measure(DashScopeRealtimeTTS("bench", url=url, standby=True), args.rounds,
+                                        reconnect=False))
+        async with SessionPool("bench", url=url, min_size=2, max_size=4) as pool:
+            report("pool", await measure(DashScopeRealtimeTTS("bench", url=url, pool=pool), args.rounds, reconnect=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--handshake-ms", type=float, default=80)
+    parser.add_argument("--chunk-ms", type=float, default=20)
+    parser.add_argument("--first-chunk-ms", type=float, default=30)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,92 @@
+"""比较控制帧编码和服务端事件解码的吞吐（单核，每秒消息数）。
+
+    python benchmarks/bench_json.py --seconds 1
+
+编码对比“每次 json.dumps 整个字典”与 protocol 里的预编译模板；
+解码对比各个可用的 JSON 后端（json / orjson / msgspec）。
+"""
+import argparse
+import json
+import time
+import uuid
+
+from dashscope_realtime import protocol
+
+TASK_ID = uuid.uuid4().hex
+TEXT = "您好，这里是客服中心，请问有什么可以帮您？"
+
+
+def result_message(chars: int) -> str:
+    words = [{"begin_time": i * 200, "end_time": i * 200 + 200, "text": "语", "punctuation": ""} for i in range(chars)]
+    return json.dumps({
+        "header": {"event": "result-generated", "task_id": TASK_ID, "attributes": {}},
+        "payload": {
+            "output": {"sentence": {
+                "sentence_id": 3, "begin_time": 0, "end_time": None,
+                "text": "语" * chars, "words": words, "sentence_end": False,
+            }},
+            "usage": None,
+        },
+    }, ensure_ascii=False)
+
+
+def rate(fn, seconds: float) -> float:
+    # 分批计时，减少 perf_counter 本身的开销
+    count = 0
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(1000):
+            fn()
+        count += 1000
+    return count / (time.perf_counter() - started)
+
+
+def dumps_continue():
+    return json.dumps({
+        "header": {"action": "continue-task", "task_id": TASK_ID, "streaming": "duplex"},
+        "payload": {"input": {"text": TEXT}},
+    })
+
+
+def dumps_finish():
+    return json.dumps({
+        "header": {"action": "finish-task", "task_id": TASK_ID, "streaming": "duplex"},
+        "payload": {"input": {}},
+    })
+
+
+def main(args):
+    available = []
+    for name in ("json", "orjson", "msgspec"):
+        try:
+            protocol.use_backend(name)
+            available.append(name)
+        except ImportError:
+            pass
+
+    print("encode (msgs/s per core)")
+    print(f"  {'finish-task json.dumps':<32} {rate(dumps_finish, args.seconds):>12,.0f}")
+    print(f"  {'finish-task template':<32} {rate(lambda: protocol.finish_task(TASK_ID), args.seconds):>12,.0f}")
+    print(f"  {'continue-task json.dumps':<32} {rate(dumps_continue, args.seconds):>12,.0f}")
+    for name in available:
+        protocol.use_backend(name)
+        label = f"continue-task template/{name}"
+        print(f"  {label:<32} {rate(lambda: protocol.continue_task(TASK_ID, TEXT), args.seconds):>12,.0f}")
+
+    print("decode result-generated (msgs/s per core)")
+    for chars in args.chars:
+        message = result_message(chars)
+        for name in available:
+            protocol.use_backend(name)
+            loads = protocol.loads
+            label = f"{chars} words / {name}"
+            print(f"  {label:<32} {rate(lambda: loads(message), args.seconds):>12,.0f}")
+    protocol.use_backend()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=1.0, help="time spent on each case")
+    parser.add_argument("--chars", type=int, nargs="+", default=[5, 40], help="words per partial result")
+    main(parser.parse_args())
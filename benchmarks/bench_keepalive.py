@@ -0,0 +1,64 @@
+"""长时间停顿后下一句话的首个识别结果延迟：任务因空闲超时被服务端结束后重建 vs 保活。
+
+    python benchmarks/bench_keepalive.py --rounds 10 --pause 1.5 --idle-timeout 1.0
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from dashscope_realtime import DashScopeRealtimeASR, DashScopeSimulator, KeepaliveConfig, SimulatorConfig
+
+SPEECH = b"\x01\x00" * 1600  # 16kHz 100ms
+
+
+async def measure(url: str, args, keepalive):
+    partial = asyncio.Event()
+    errors = []
+    asr = DashScopeRealtimeASR("bench", url=url, keepalive=keepalive, on_error=errors.append,
+                               on_partial=lambda text: partial.set())
+    await asr.connect()
+    samples = []
+    for _ in range(args.rounds):
+        await asyncio.sleep(args.pause)
+        started = time.perf_counter()
+        if errors:
+            # 服务端已经因为空闲结束了任务，下一句话之前重新建连并开启任务
+            errors.clear()
+            await asr.disconnect()
+            await asr.connect()
+        partial.clear()
+        for _ in range(3):
+            await asr.send_audio(SPEECH)
+        await partial.wait()
+        samples.append(time.perf_counter() - started)
+    await asr.disconnect()
+    return samples, asr
+
+
+def report(name, samples, extra=""):
+    print(f"{name:<10} first result after pause p50={statistics.median(samples) * 1000:7.1f}ms  "
+          f"max={max(samples) * 1000:7.1f}ms  {extra}")
+
+
+async def main(args):
+    config = SimulatorConfig(idle_timeout=args.idle_timeout, handshake_latency=args.handshake_ms / 1000,
+                             task_start_latency=args.task_start_ms / 1000)
+    async with DashScopeSimulator(config) as sim:
+        samples, _ = await measure(sim.url, args, None)
+        report("none", samples, f"timed out tasks={sim.tasks_timed_out}")
+        timed_out = sim.tasks_timed_out
+        keepalive = KeepaliveConfig(idle_after=0.2, silence_interval=args.idle_timeout / 3, ping_interval=0.5)
+        samples, asr = await measure(sim.url, args, keepalive)
+        report("keepalive", samples, f"timed out tasks={sim.tasks_timed_out - timed_out}  "
+                                     f"silence frames={asr.keepalive.silence_frames}  rtt={asr.rtt * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--pause", type=float, default=1.5, help="silence between utterances (seconds)")
+    parser.add_argument("--idle-timeout", type=float, default=1.0, help="simulated server idle timeout")
+    parser.add_argument("--handshake-ms", type=int, default=80)
+    parser.add_argument("--task-start-ms", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,174 @@
+"""用本地协议模拟器压测 N 个并发 RealtimeClient 会话。
+
+    python benchmarks/bench_load.py --sessions 200 --duration 10 --speed 4
+    python benchmarks/bench_load.py --sessions 1000 --workers 8  # 多进程网关
+
+每个会话以 speed 倍速推送 16kHz 音频，识别出的整句由 RealtimeClient 回声播报，
+统计会话建立耗时、句末 → 首包音频延迟、吞吐以及每会话的 CPU 与内存开销。
+"""
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import time
+
+from dashscope_realtime import RealtimeClient, RealtimeEvent, DashScopeSimulator, SimulatorConfig, InProcessMetrics
+from dashscope_realtime.gateway import Gateway, GatewayConfig
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # macOS 上 ru_maxrss 的单位是字节，Linux 上是 KB
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+class Stats:
+    def __init__(self):
+        self.start = []
+        self.reply = []
+        self.audio_seconds = 0.0
+        self.tts_bytes = 0
+        self.errors = 0
+
+
+async def run_session(url: str, args, stats: Stats, metrics: InProcessMetrics, gateway=None):
+    if gateway is None:
+        client = RealtimeClient("bench", url=url, multiplex=args.multiplex, metrics=metrics)
+    else:
+        client = GatewayClient(gateway)
+    sentence_ends = []
+
+    def on_audio(chunk):
+        stats.tts_bytes += len(chunk)
+        if sentence_ends:
+            stats.reply.append(time.perf_counter() - sentence_ends.pop(0))
+
+    def on_error(err):
+        stats.errors += 1
+
+    client.on(RealtimeEvent.ASR_SENTENCE_END, lambda text: sentence_ends.append(time.perf_counter()))
+    client.on(RealtimeEvent.TTS_AUDIO, on_audio)
+    client.on(RealtimeEvent.ERROR, on_error)
+
+    started = time.perf_counter()
+    await client.start()
+    stats.start.append(time.perf_counter() - started)
+
+    frame = b"\x00" * (16000 * 2 * args.frame_ms // 1000)
+    frames = int(args.duration * 1000 / args.frame_ms)
+    interval = args.frame_ms / 1000 / args.speed
+    try:
+        for _ in range(frames):
+            await client.send_audio_chunk(frame)
+            stats.audio_seconds += args.frame_ms / 1000
+            await asyncio.sleep(interval)
+        await client.asr.finish()
+        await asyncio.sleep(args.tail)
+    finally:
+        await client.stop()
+
+
+# 让网关会话和 RealtimeClient 用同一套压测流程
+class GatewayClient:
+    def __init__(self, gateway: Gateway):
+        self.gateway = gateway
+        self.session = None
+        self.handlers = []
+
+    def on(self, event, callback):
+        self.handlers.append((event, callback))
+
+    async def start(self):
+        self.session = await self.gateway.open_session()
+        for event, callback in self.handlers:
+            self.session.on(event, callback)
+        await self.session.wait_for(RealtimeEvent.READY)
+
+    async def send_audio_chunk(self, audio):
+        await self.session.send_audio_chunk(audio)
+
+    @property
+    def asr(self):
+        return self.session
+
+    async def stop(self):
+        await self.session.close()
+
+
+async def main(args):
+    sim_config = SimulatorConfig(
+        handshake_latency=args.handshake_ms / 1000,
+        result_latency=args.result_ms / 1000,
+        tts_first_chunk_latency=args.first_chunk_ms / 1000,
+        sentence_ms=args.sentence_ms,
+    )
+    stats = Stats()
+    metrics = InProcessMetrics()
+    async with DashScopeSimulator(sim_config) as sim:
+        gateway = None
+        if args.workers:
+            gateway = Gateway("bench", url=sim.url, config=GatewayConfig(workers=args.workers, multiplex=args.multiplex))
+            await gateway.start()
+        rss_before = rss_bytes()
+        cpu_before = time.process_time()
+        wall_before = time.perf_counter()
+
+        async def staggered(i):
+            await asyncio.sleep(i * args.ramp / max(1, args.sessions))
+            await run_session(sim.url, args, stats, metrics, gateway)
+
+        results = await asyncio.gather(*(staggered(i) for i in range(args.sessions)), return_exceptions=True)
+        failed = [r for r in results if isinstance(r, BaseException)]
+
+        wall = time.perf_counter() - wall_before
+        cpu = time.process_time() - cpu_before
+        rss_growth = rss_bytes() - rss_before
+        if gateway is not None:
+            await gateway.close()
+
+    # 模拟器与客户端跑在同一进程里，CPU 与内存数字包含模拟器自身的开销；
+    # 使用 --workers 时只统计父进程（网关 + 模拟器），不含 worker 进程
+    print(f"sessions          {args.sessions} (failed {len(failed)}, errors {stats.errors})")
+    print(f"wall time         {wall:.2f}s")
+    print(f"audio throughput  {stats.audio_seconds / wall:.1f} audio-s/s, tts {stats.tts_bytes / wall / 1024:.1f} KiB/s")
+    print(f"session start     p50={percentile(stats.start, 0.5) * 1000:.2f}ms p99={percentile(stats.start, 0.99) * 1000:.2f}ms")
+    print(f"sentence → audio  p50={percentile(stats.reply, 0.5) * 1000:.2f}ms p99={percentile(stats.reply, 0.99) * 1000:.2f}ms "
+          f"n={len(stats.reply)}")
+    print(f"cpu per session   {cpu / args.sessions * 1000:.2f}ms ({cpu / wall * 100:.0f}% of one core)")
+    print(f"rss per session   {rss_growth / args.sessions / 1024:.1f} KiB")
+    if failed:
+        print(f"first failure     {failed[0]!r}")
+    if args.verbose:
+        for name, summary in metrics.summary().items():
+            print(f"  {name:<36} {summary}")
+    if stats.reply:
+        print(f"reply stdev       {statistics.pstdev(stats.reply) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=6.0, help="audio seconds per session")
+    parser.add_argument("--speed", type=float, default=1.0, help="audio send rate relative to real time")
+    parser.add_argument("--frame-ms", type=int, default=100)
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds over which sessions are started")
+    parser.add_argument("--tail", type=float, default=0.5, help="seconds to wait for replies after audio ends")
+    parser.add_argument("--sentence-ms", type=int, default=2000)
+    parser.add_argument("--handshake-ms", type=float, default=0)
+    parser.add_argument("--result-ms", type=float, default=0)
+    parser.add_argument("--first-chunk-ms", type=float, default=0)
+    parser.add_argument("--multiplex", action="store_true")
+    parser.add_argument("--workers", type=int, default=0, help="run sessions through a multi-process gateway")
+    parser.add_argument("--verbose", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,98 @@
+"""多段连续播报时段与段之间的静音：逐段 speak（每段一个新任务）与 TTSPipeline 的对比。
+
+播放端按实时速度消耗音频，某段的首块音频晚于上一段播完的时刻就会出现可听到的停顿。
+
+    python benchmarks/bench_pipeline.py --segments 20 --rtf 0.9 --lanes 1 2 3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from dashscope_realtime import (DashScopeRealtimeTTS, DashScopeSimulator, InProcessMetrics, PipelineConfig,
+                                SimulatorConfig, TTSPipeline)
+
+TEXTS = ["好的，我来帮您查一下。", "您的订单已经发货了。", "预计明天下午送达。", "还有其他需要帮忙的吗？"]
+BYTES_PER_SECOND = 22050 * 2
+
+
+class Speaker:
+    # 按实时速度播放的扬声器，记录每段开头的停顿
+    def __init__(self):
+        self.clock = 0.0
+        self.segment_pending = False
+        self.gaps = []
+
+    def begin_segment(self):
+        self.segment_pending = True
+
+    def write(self, chunk: bytes):
+        now = time.perf_counter()
+        if self.segment_pending:
+            self.segment_pending = False
+            if self.clock:
+                self.gaps.append(max(0.0, now - self.clock))
+        self.clock = max(self.clock, now) + len(chunk) / BYTES_PER_SECOND
+
+
+def report(name, gaps, wall):
+    gaps = sorted(gaps)
+    p99 = gaps[min(len(gaps) - 1, int(len(gaps) * 0.99))]
+    print(f"{name:<12} gap p50={statistics.median(gaps) * 1000:7.1f}ms  p99={p99 * 1000:7.1f}ms  "
+          f"total silence={sum(gaps) * 1000:8.1f}ms  wall={wall:6.2f}s")
+
+
+async def sequential(url: str, texts):
+    speaker = Speaker()
+    tts = DashScopeRealtimeTTS("bench", url=url, send_audio=speaker.write)
+    await tts.connect()
+    started = time.perf_counter()
+    for text in texts:
+        speaker.begin_segment()
+        await tts.speak(text)
+    # 等最后一段在扬声器上播完
+    await asyncio.sleep(max(0.0, speaker.clock - time.perf_counter()))
+    wall = time.perf_counter() - started
+    await tts.disconnect()
+    return speaker.gaps, wall
+
+
+async def pipelined(url: str, texts, lanes: int):
+    metrics = InProcessMetrics()
+    speaker = Speaker()
+    pipeline = TTSPipeline([DashScopeRealtimeTTS("bench", url=url) for _ in range(lanes)],
+                           PipelineConfig(lanes=lanes), send_audio=speaker.write, metrics=metrics)
+    await pipeline.start()
+    started = time.perf_counter()
+    segments = [pipeline.submit(text) for text in texts]
+    await pipeline.drain()
+    await asyncio.sleep(max(0.0, speaker.clock - time.perf_counter()))
+    wall = time.perf_counter() - started
+    await pipeline.close()
+    return [s.gap for s in segments if s.gap is not None], wall
+
+
+async def main(args):
+    # 每块 80ms 音频，合成耗时为 rtf 倍
+    config = SimulatorConfig(
+        handshake_latency=args.handshake_ms / 1000,
+        task_start_latency=args.task_start_ms / 1000,
+        tts_first_chunk_latency=args.first_chunk_ms / 1000,
+        tts_chunk_interval=0.08 * args.rtf,
+    )
+    texts = [TEXTS[i % len(TEXTS)] for i in range(args.segments)]
+    async with DashScopeSimulator(config) as sim:
+        report("sequential", *await sequential(sim.url, texts))
+        for lanes in args.lanes:
+            report(f"pipeline x{lanes}", *await pipelined(sim.url, texts, lanes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--segments", type=int, default=20)
+    parser.add_argument("--rtf", type=float, default=0.9, help="synthesis time / audio duration")
+    parser.add_argument("--handshake-ms", type=int, default=50)
+    parser.add_argument("--task-start-ms", type=int, default=100)
+    parser.add_argument("--first-chunk-ms", type=int, default=150)
+    parser.add_argument("--lanes", type=int, nargs="+", default=[1, 2, 3])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""录音对事件循环的影响：在回调里同步写文件与 Recorder 后台写盘的对比。
+
+每个会话按实时速度产生 20ms 的音频块，同时用一个定时任务测量事件循环的调度延迟。
+
+    python benchmarks/bench_recorder.py --sessions 200 --seconds 5 --fsync-every 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from dashscope_realtime import AudioFormat, InProcessMetrics, Recorder, RecorderConfig
+
+CHUNK = b"\x01\x00" * 320  # 16kHz 20ms
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def ticker(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lags.append(time.perf_counter() - started - 0.005)
+
+
+async def session(write, seconds: float):
+    for _ in range(int(seconds / 0.02)):
+        write(CHUNK)
+        await asyncio.sleep(0.02)
+
+
+def sync_writer(path: str, fsync_every: int):
+    f = open(path, "wb")
+    count = 0
+
+    def write(chunk: bytes):
+        nonlocal count
+        f.write(chunk)
+        f.flush()
+        count += 1
+        if fsync_every and count % fsync_every == 0:
+            os.fsync(f.fileno())
+    return write, f.close
+
+
+async def run(args, directory: str, mode: str):
+    lags = []
+    stop = asyncio.Event()
+    tick = asyncio.ensure_future(ticker(stop, lags))
+    started = time.perf_counter()
+    if mode == "sync":
+        writers = [sync_writer(os.path.join(directory, f"sync-{i}.raw"), args.fsync_every)
+                   for i in range(args.sessions)]
+        await asyncio.gather(*(session(write, args.seconds) for write, _ in writers))
+        for _, close in writers:
+            close()
+        dropped = 0
+    else:
+        recorder = Recorder(RecorderConfig(directory=directory), metrics=InProcessMetrics())
+        tracks = [recorder.track(f"rec-{i}", AudioFormat(16000)) for i in range(args.sessions)]
+        await asyncio.gather(*(session(track.write, args.seconds) for track in tracks))
+        await recorder.close()
+        dropped = recorder.dropped
+    wall = time.perf_counter() - started
+    stop.set()
+    await tick
+    print(f"{mode:<9} loop lag p50={percentile(lags, 0.5) * 1000:6.2f}ms  p99={percentile(lags, 0.99) * 1000:6.2f}ms  "
+          f"max={max(lags) * 1000:6.2f}ms  dropped={dropped}  wall={wall:5.2f}s")
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        await run(args, directory, "sync")
+        await run(args, directory, "recorder")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fsync-every", type=int, default=50, help="sync mode: fsync every N chunks, 0 to disable")
+    parser.add_argument("--directory", default=None, help="where to write (defaults to the system temp dir)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,84 @@
+"""冷启动开销：各种导入方式的耗时（每次在新的解释器里测），以及应用初始化期间用 preconnect 预建连接对首包的影响。
+
+    python benchmarks/bench_startup.py --runs 10 --init-ms 200 --handshake-ms 150
+    python benchmarks/bench_startup.py --max-import-ms 20   # 超过阈值时以非零状态退出，用于 CI 防回退
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from dashscope_realtime import DashScopeRealtimeTTS, DashScopeSimulator, SimulatorConfig, preconnect
+
+IMPORTS = {
+    "package": "import dashscope_realtime",
+    "tts": "from dashscope_realtime import DashScopeRealtimeTTS",
+    "client": "from dashscope_realtime import RealtimeClient",
+    "everything": "import dashscope_realtime as d; [getattr(d, n) for n in d.__all__]",
+}
+
+PROBE = "import time; t = time.perf_counter(); {}; print(time.perf_counter() - t)"
+
+
+def import_seconds(statement: str, runs: int):
+    env = dict(os.environ)
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(statement)], env=env, check=True,
+                             capture_output=True, text=True).stdout
+        samples.append(float(out.strip().splitlines()[-1]))
+    return samples
+
+
+async def first_audio(url: str, args, warm: bool) -> float:
+    # 冷启动 → 应用初始化（init_ms）→ 第一次合成拿到首块音频
+    started = time.perf_counter()
+    pool = preconnect("bench", url) if warm else None
+    await asyncio.sleep(args.init_ms / 1000)
+    got = asyncio.Event()
+    tts = DashScopeRealtimeTTS("bench", url=url, pool=pool, send_audio=lambda chunk: got.set())
+    await tts.say("你好")
+    await got.wait()
+    elapsed = time.perf_counter() - started
+    await tts.disconnect()
+    if pool:
+        await pool.close()
+    return elapsed
+
+
+async def connect_bench(args):
+    config = SimulatorConfig(handshake_latency=args.handshake_ms / 1000, task_start_latency=args.task_start_ms / 1000)
+    async with DashScopeSimulator(config) as sim:
+        for warm in (False, True):
+            samples = [await first_audio(sim.url, args, warm) for _ in range(args.runs)]
+            name = "preconnect" if warm else "cold"
+            print(f"first audio {name:<10} p50={statistics.median(samples) * 1000:7.1f}ms  "
+                  f"(init {args.init_ms}ms, handshake {args.handshake_ms}ms)")
+
+
+def main(args):
+    failed = False
+    for name, statement in IMPORTS.items():
+        samples = import_seconds(statement, args.runs)
+        median = statistics.median(samples) * 1000
+        print(f"import {name:<11} p50={median:7.2f}ms  min={min(samples) * 1000:7.2f}ms")
+        if name == "package" and args.max_import_ms and median > args.max_import_ms:
+            print(f"  import dashscope_realtime took {median:.2f}ms, over the {args.max_import_ms}ms budget")
+            failed = True
+    asyncio.run(connect_bench(args))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--init-ms", type=int, default=200, help="simulated application startup work")
+    parser.add_argument("--handshake-ms", type=int, default=150, help="simulated DNS + TCP + TLS time")
+    parser.add_argument("--task-start-ms", type=int, default=50)
+    parser.add_argument("--max-import-ms", type=float, default=0, help="fail if `import dashscope_realtime` is slower")
+    main(parser.parse_args())
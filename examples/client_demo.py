@@ -1,5 +1,5 @@
 import asyncio
-from src.dashscope_realtime import RealtimeClient, RealtimeEvent
+from src.dashscope_realtime import RealtimeClient, RealtimeEvent, AudioFormat
 import pyaudio
 import queue
 import dotenv
@@ -51,8 +51,9 @@ class AudioInputStream:
 
 
 async def main():
-    client = RealtimeClient(api_key=API_KEY)
     mic = AudioInputStream()
+    # 麦克风按 22050Hz 采集，由 SDK 重采样成 ASR 需要的 16kHz
+    client = RealtimeClient(api_key=API_KEY, input_format=AudioFormat(sample_rate=mic.rate))
 
     async with client:
         # 注册事件处理器
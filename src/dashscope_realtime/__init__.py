@@ -1,3 +1,79 @@
-from .asr import DashScopeRealtimeASR
-from .tts import DashScopeRealtimeTTS
-from .client import RealtimeClient, RealtimeEvent
\ No newline at end of file
+import importlib
+from typing import TYPE_CHECKING
+
+# 按需导入：import dashscope_realtime 本身几乎不花时间，用到哪个名字才导入对应的子模块（以及 websockets 等依赖），
+# 缩短 serverless 冷启动时间
+_EXPORTS = {
+    "DashScopeRealtimeASR": "asr", "ASRConfig": "asr", "RecognitionResult": "asr", "Word": "asr",
+    "DashScopeRealtimeTTS": "tts", "TTSConfig": "tts",
+    "RealtimeClient": "client", "RealtimeEvent": "client",
+    "SessionPool": "pool", "preconnect": "pool",
+    "AdmissionController": "admission", "AdmissionConfig": "admission", "AdmissionRejectedError": "admission",
+    "Priority": "admission",
+    "ReconnectPolicy": "reconnect",
+    "MultiplexConnection": "mux",
+    "IngestConfig": "ingest",
+    "KeepaliveConfig": "keepalive", "Keepalive": "keepalive",
+    "JitterConfig": "jitter",
+    "AudioFormat": "audio", "AudioConverter": "audio", "Resampler": "audio",
+    "VADConfig": "vad", "VoiceDetector": "vad", "EnergyDetector": "vad",
+    "SegmenterConfig": "segmenter", "segment_text": "segmenter",
+    "SpeculationConfig": "speculation", "Speculator": "speculation",
+    "PipelineConfig": "pipeline", "TTSPipeline": "pipeline", "Segment": "pipeline",
+    "Recorder": "recorder", "RecorderConfig": "recorder", "Track": "recorder",
+    "AudioCache": "cache",
+    "MetricsSink": "metrics", "InProcessMetrics": "metrics", "prometheus_text": "metrics",
+    "DashScopeSimulator": "simulator", "SimulatorConfig": "simulator",
+    "Gateway": "gateway", "GatewayConfig": "gateway", "GatewaySession": "gateway",
+    "BatchTranscriber": "batch", "BatchConfig": "batch", "Transcript": "batch",
+}
+
+# 显式列出，linter 和类型检查器据此认为 TYPE_CHECKING 下的导入是导出而非未使用
+__all__ = [
+    "DashScopeRealtimeASR", "ASRConfig", "RecognitionResult", "Word", "DashScopeRealtimeTTS", "TTSConfig",
+    "RealtimeClient", "RealtimeEvent", "SessionPool", "preconnect", "AdmissionController", "AdmissionConfig",
+    "AdmissionRejectedError", "Priority", "ReconnectPolicy", "MultiplexConnection", "IngestConfig",
+    "KeepaliveConfig", "Keepalive", "JitterConfig", "AudioFormat", "AudioConverter", "Resampler",
+    "VADConfig", "VoiceDetector", "EnergyDetector", "SegmenterConfig", "segment_text", "SpeculationConfig",
+    "Speculator", "PipelineConfig", "TTSPipeline", "Segment", "Recorder", "RecorderConfig", "Track",
+    "AudioCache", "MetricsSink", "InProcessMetrics", "prometheus_text", "DashScopeSimulator",
+    "SimulatorConfig", "Gateway", "GatewayConfig", "GatewaySession", "BatchTranscriber", "BatchConfig",
+    "Transcript",
+]
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module("." + module, __name__), name)
+    globals()[name] = value  # 之后直接命中模块字典，不再经过 __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+if TYPE_CHECKING:
+    from .asr import DashScopeRealtimeASR, ASRConfig, RecognitionResult, Word
+    from .tts import DashScopeRealtimeTTS, TTSConfig
+    from .client import RealtimeClient, RealtimeEvent
+    from .pool import SessionPool, preconnect
+    from .admission import AdmissionController, AdmissionConfig, AdmissionRejectedError, Priority
+    from .reconnect import ReconnectPolicy
+    from .mux import MultiplexConnection
+    from .ingest import IngestConfig
+    from .keepalive import KeepaliveConfig, Keepalive
+    from .jitter import JitterConfig
+    from .audio import AudioFormat, AudioConverter, Resampler
+    from .vad import VADConfig, VoiceDetector, EnergyDetector
+    from .segmenter import SegmenterConfig, segment_text
+    from .speculation import SpeculationConfig, Speculator
+    from .pipeline import PipelineConfig, TTSPipeline, Segment
+    from .recorder import Recorder, RecorderConfig, Track
+    from .cache import AudioCache
+    from .metrics import MetricsSink, InProcessMetrics, prometheus_text
+    from .simulator import DashScopeSimulator, SimulatorConfig
+    from .gateway import Gateway, GatewayConfig, GatewaySession
+    from .batch import BatchTranscriber, BatchConfig, Transcript
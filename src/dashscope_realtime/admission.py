@@ -0,0 +1,246 @@
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .metrics import MetricsSink, NULL_METRICS
+
+
+class Priority:
+    LIVE = 0
+    NORMAL = 5
+    BATCH = 10
+
+
+@dataclass(frozen=True)
+class AdmissionConfig:
+    max_concurrency: int = 10  # 每个 api_key + model 同时进行的任务数
+    rate: float = 10.0  # 每秒允许发起的任务数
+    burst: int = 10  # 令牌桶容量
+    queue_timeout: Optional[float] = 30.0  # 排队的最长时间，None 表示一直等待，0 表示不排队、立即失败
+    max_queue: int = 1000
+
+
+class AdmissionRejectedError(RuntimeError):
+    pass
+
+
+class Permit:
+    __slots__ = ("api_key", "model", "_bucket", "_controller")
+
+    def __init__(self, api_key: str, model: str, bucket: "_Bucket", controller: "AdmissionController"):
+        self.api_key = api_key
+        self.model = model
+        self._bucket = bucket
+        self._controller = controller
+
+    def release(self):
+        # 可以重复调用
+        bucket, self._bucket = self._bucket, None
+        if bucket is not None:
+            bucket.active -= 1
+            self._controller._released(self.model, bucket)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class _Bucket:
+    __slots__ = ("api_key", "index", "config", "tokens", "updated", "active")
+
+    def __init__(self, api_key: str, index: int, config: AdmissionConfig):
+        self.api_key = api_key
+        self.index = index
+        self.config = config
+        self.tokens = float(config.burst)
+        self.updated = time.monotonic()
+        self.active = 0
+
+    def refill(self, now: float):
+        # 桶可能在取得 now 之后才创建，时间不能倒退，否则刚建好的桶会少于 burst 个令牌
+        if now <= self.updated:
+            return
+        self.tokens = min(float(self.config.burst), self.tokens + (now - self.updated) * self.config.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        # 距离下一个令牌的时间；并发已满时只能等 release，返回 inf
+        if self.active >= self.config.max_concurrency:
+            return float("inf")
+        return max(0.0, (1.0 - self.tokens) / self.config.rate)
+
+
+_Queue = Tuple[Optional[str], str]  # (api_key, model)，api_key 为 None 的请求可以用任意 key
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "api_key", "future", "enqueued")
+
+    def __init__(self, priority: int, seq: int, api_key: Optional[str], future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.api_key = api_key
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+# 进程内共享的准入控制：按 (api_key, model) 维护令牌桶（QPS）和并发上限，
+# 排队的请求按优先级（数值小的先）和到达顺序放行；配置多个 key 时未指定 key 的请求分配到最空闲的 key。
+# 等待队列同样按 (api_key, model) 分开，一个 key 被限流不会挡住其他 key 的请求；
+# 放行时把同一 model 的各队列队首合在一起按 (priority, seq) 排序，优先级跨队列同样成立
+class AdmissionController:
+    def __init__(
+            self,
+            api_keys: Sequence[str] = (),
+            config: AdmissionConfig = AdmissionConfig(),
+            model_configs: Optional[Dict[str, AdmissionConfig]] = None,
+            metrics: Optional[MetricsSink] = None,
+    ):
+        self.api_keys = list(api_keys)
+        self.config = config
+        self.model_configs = dict(model_configs or {})
+        self.metrics = metrics or NULL_METRICS
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._key_index: Dict[str, int] = {key: i for i, key in enumerate(self.api_keys)}
+        self._waiters: Dict[_Queue, List[_Waiter]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}  # model -> 只缺令牌时的重试定时器
+        self._seq = itertools.count()
+
+    async def acquire(self, model: str, priority: int = Priority.NORMAL, api_key: Optional[str] = None) -> Permit:
+        # api_key 为 None 时在构造时给出的多个 key 之间分配
+        if api_key is None and not self.api_keys:
+            raise ValueError("api_key is required when the controller has no api_keys")
+        config = self.model_configs.get(model, self.config)
+        queue = (api_key, model)
+        waiters = self._waiters.setdefault(queue, [])
+        labels = {"model": model, "priority": str(priority)}
+
+        bucket = self._pick(model, api_key, time.monotonic())
+        if bucket is not None and not self._contended(model, bucket.api_key):
+            self.metrics.observe("admission_queue_seconds", 0.0, **labels)
+            return self._grant(model, bucket)
+        if config.queue_timeout == 0 or self.queue_depth(model) >= config.max_queue:
+            self.metrics.inc("admission_rejected", **labels)
+            raise AdmissionRejectedError("no capacity for %s and %s" % (
+                model, "queueing is disabled" if config.queue_timeout == 0 else "the queue is full"))
+
+        waiter = _Waiter(priority, next(self._seq), api_key, asyncio.get_running_loop().create_future())
+        heapq.heappush(waiters, waiter)
+        self._dispatch(model)
+        try:
+            permit = await asyncio.wait_for(asyncio.shield(waiter.future), config.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(queue, waiter)
+            self.metrics.inc("admission_rejected", **labels)
+            raise AdmissionRejectedError("timed out after %gs waiting for admission to %s"
+                                         % (config.queue_timeout, model)) from None
+        except BaseException:
+            self._abandon(queue, waiter)
+            raise
+        self.metrics.observe("admission_queue_seconds", time.perf_counter() - waiter.enqueued, **labels)
+        return permit
+
+    def queue_depth(self, model: str, api_key: Optional[str] = None) -> int:
+        return sum(1 for (k, m), waiters in self._waiters.items() if m == model and api_key in (None, k)
+                   for w in waiters if not w.future.done())
+
+    def active(self, model: str, api_key: Optional[str] = None) -> int:
+        return sum(b.active for (k, m), b in self._buckets.items() if m == model and api_key in (None, k))
+
+    def _bucket(self, api_key: str, model: str) -> _Bucket:
+        bucket = self._buckets.get((api_key, model))
+        if bucket is None:
+            index = self._key_index.setdefault(api_key, len(self._key_index))
+            bucket = self._buckets[(api_key, model)] = _Bucket(
+                api_key, index, self.model_configs.get(model, self.config))
+        return bucket
+
+    def _candidates(self, model: str, api_key: Optional[str]) -> List[_Bucket]:
+        keys = [api_key] if api_key is not None else self.api_keys
+        return [self._bucket(key, model) for key in keys]
+
+    def _contended(self, model: str, api_key: str) -> bool:
+        # 这个 key 的名额还有人在排队等（指定了这个 key 的，或不限 key 的），新请求不能直接越过它们
+        return any(not w.future.done() for queue in ((api_key, model), (None, model))
+                   for w in self._waiters.get(queue, ()))
+
+    def _pick(self, model: str, api_key: Optional[str], now: float,
+              exclude: Sequence[str] = ()) -> Optional[_Bucket]:
+        best = None
+        for bucket in self._candidates(model, api_key):
+            if bucket.api_key in exclude:
+                continue
+            bucket.refill(now)
+            if bucket.active < bucket.config.max_concurrency and bucket.tokens >= 1.0:
+                if best is None or (bucket.active, -bucket.tokens) < (best.active, -best.tokens):
+                    best = bucket
+        return best
+
+    def _grant(self, model: str, bucket: _Bucket) -> Permit:
+        bucket.tokens -= 1.0
+        bucket.active += 1
+        self.metrics.set_gauge("admission_active", bucket.active, model=model, key=str(bucket.index))
+        return Permit(bucket.api_key, model, bucket, self)
+
+    def _released(self, model: str, bucket: _Bucket):
+        self.metrics.set_gauge("admission_active", bucket.active, model=model, key=str(bucket.index))
+        if self._contended(model, bucket.api_key):
+            self._dispatch(model)
+
+    def _dispatch(self, model: str):
+        timer = self._timers.pop(model, None)
+        if timer is not None:
+            timer.cancel()
+        now = time.monotonic()
+        # 各队列的队首按 (priority, seq) 归并；放不进来的队首占住它能用的 key，
+        # 优先级更低的请求（同队列的后续请求、其他队列）不能越过它拿这些 key 的名额
+        heads: List[Tuple[_Waiter, List[_Waiter]]] = []
+        for (_, m), waiters in self._waiters.items():
+            if m == model:
+                self._push_head(heads, waiters)
+        reserved = set()
+        delay = float("inf")
+        while heads:
+            waiter, waiters = heapq.heappop(heads)
+            if waiter.api_key is None and reserved.issuperset(self.api_keys):
+                continue
+            if waiter.api_key in reserved:
+                continue
+            bucket = self._pick(model, waiter.api_key, now, reserved)
+            if bucket is None:
+                # 只缺令牌时定时再试，缺并发时等 release
+                candidates = [b for b in self._candidates(model, waiter.api_key) if b.api_key not in reserved]
+                delay = min([delay] + [b.wait_time() for b in candidates])
+                reserved.update(b.api_key for b in candidates)
+                continue
+            heapq.heappop(waiters)
+            waiter.future.set_result(self._grant(model, bucket))
+            self._push_head(heads, waiters)
+        if delay != float("inf"):
+            self._timers[model] = asyncio.get_running_loop().call_later(delay, self._dispatch, model)
+        self.metrics.set_gauge("admission_queue_depth", self.queue_depth(model), model=model)
+
+    @staticmethod
+    def _push_head(heads: List[Tuple[_Waiter, List[_Waiter]]], waiters: List[_Waiter]):
+        while waiters and waiters[0].future.done():
+            heapq.heappop(waiters)
+        if waiters:
+            heapq.heappush(heads, (waiters[0], waiters))
+
+    def _abandon(self, queue: _Queue, waiter: _Waiter):
+        future = waiter.future
+        if future.done() and not future.cancelled():
+            # 放行和超时 / 取消同时发生：许可已经发出，直接归还
+            future.result().release()
+        else:
+            future.cancel()
+        if self._waiters.get(queue):
+            self._dispatch(queue[1])
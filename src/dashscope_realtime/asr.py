@@ -1,11 +1,27 @@
 import asyncio
-import json
+import time
 import uuid
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Optional, List, Callable
+from typing import Optional, List, Callable, Union, AsyncIterator, Tuple
 
 import websockets
 
+from . import protocol
+from .admission import AdmissionController, Permit, Priority
+from .audio import AudioFormat, converter_for
+from .channel import Channel, ChannelClosed
+from .config import logger
+from .ingest import AudioIngest, IngestConfig
+from .keepalive import Keepalive, KeepaliveConfig
+from .metrics import MetricsSink, NULL_METRICS
+from .mux import MultiplexConnection
+from .pool import SessionPool
+from .reconnect import ReconnectPolicy, ReplayBuffer
+from .tasks import TaskGroup, cancel_and_wait
+
+_SAMPLE_BYTES = 2  # 16bit 单声道 PCM 每个采样的字节数
+
 
 @dataclass(frozen=True)
 class ASRConfig:
@@ -23,6 +39,97 @@ class ASRConfig:
     inverse_text_normalization_enabled: bool = True
 
 
+class Word:
+    __slots__ = ("text", "begin_time", "end_time", "punctuation")
+
+    def __init__(self, text: str, begin_time: Optional[int], end_time: Optional[int], punctuation: str = ""):
+        self.text = text
+        self.begin_time = begin_time
+        self.end_time = end_time
+        self.punctuation = punctuation
+
+    def __repr__(self):
+        return f"Word(text={self.text!r}, begin_time={self.begin_time}, end_time={self.end_time})"
+
+
+class RecognitionResult:
+    # words / stash 在第一次访问时才从原始 JSON 构造，中间结果很多而大部分消费方只看 text
+    __slots__ = ("text", "begin_time", "end_time", "is_sentence_end", "sentence_id", "usage", "stable",
+                 "_words", "_stash", "_time_offset")
+
+    def __init__(self, text: str, begin_time: Optional[int] = None, end_time: Optional[int] = None,
+                 sentence_id: Optional[int] = None, words: Optional[list] = None, stash: Optional[dict] = None,
+                 usage: Optional[dict] = None, sentence_end: Optional[bool] = None, time_offset: int = 0):
+        self.text = text
+        self.begin_time = begin_time
+        self.end_time = end_time
+        self.is_sentence_end = bool(end_time) if sentence_end is None else bool(sentence_end)
+        self.sentence_id = sentence_id
+        self.usage = usage
+        # 增量模式下与同一句上一个结果相同的前缀长度，text[stable:] 是变化的部分
+        self.stable = 0
+        self._words = words
+        self._stash = stash
+        self._time_offset = time_offset
+
+    @classmethod
+    def from_sentence(cls, sentence: dict, usage: Optional[dict] = None, time_offset: int = 0,
+                      sentence_id: Optional[int] = None) -> "RecognitionResult":
+        return cls(
+            sentence.get("text", ""),
+            _shift(sentence.get("begin_time"), time_offset),
+            _shift(sentence.get("end_time"), time_offset),
+            sentence.get("sentence_id") if sentence_id is None else sentence_id,
+            sentence.get("words"),
+            sentence.get("stash"),
+            usage,
+            sentence.get("sentence_end"),
+            time_offset,
+        )
+
+    @property
+    def delta(self) -> str:
+        return self.text[self.stable:]
+
+    @property
+    def words(self) -> Tuple[Word, ...]:
+        words = self._words
+        if not isinstance(words, tuple):
+            offset = self._time_offset
+            words = self._words = tuple(
+                Word(w.get("text", ""), _shift(w.get("begin_time"), offset), _shift(w.get("end_time"), offset),
+                     w.get("punctuation") or "")
+                for w in words or ())
+        return words
+
+    @property
+    def stash(self) -> Optional["RecognitionResult"]:
+        # 部分模型会在 stash 中给出下一句尚未确定的内容
+        stash = self._stash
+        if isinstance(stash, dict):
+            stash = self._stash = RecognitionResult.from_sentence(stash, time_offset=self._time_offset)
+        return stash
+
+    def __repr__(self):
+        return (f"RecognitionResult(text={self.text!r}, begin_time={self.begin_time}, "
+                f"end_time={self.end_time}, is_sentence_end={self.is_sentence_end}, sentence_id={self.sentence_id})")
+
+
+def _shift(value: Optional[int], offset: int) -> Optional[int]:
+    return value + offset if value is not None and offset else value
+
+
+def _common_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    # 常见情况是中间结果只在末尾追加
+    if a[:n] == b[:n]:
+        return n
+    i = 0
+    while a[i] == b[i]:
+        i += 1
+    return i
+
+
 class DashScopeRealtimeASR:
     def __init__(
         self,
@@ -33,17 +140,85 @@ class DashScopeRealtimeASR:
         on_final: Optional[Callable[[str], None]] = None,
         on_error: Optional[Callable[[Exception], None]] = None,
         on_sentence_end: Optional[Callable[[str], None]] = None,
+        pool: Optional[SessionPool] = None,
+        mux: Optional[MultiplexConnection] = None,
+        ingest: Optional[IngestConfig] = None,
+        metrics: Optional[MetricsSink] = None,
+        reconnect: Optional[ReconnectPolicy] = None,
+        input_format: Optional[AudioFormat] = None,
+        on_result: Optional[Callable[[RecognitionResult], None]] = None,
+        incremental: bool = False,
+        admission: Optional[AdmissionController] = None,
+        priority: int = Priority.NORMAL,
+        keepalive: Optional[KeepaliveConfig] = None,
     ):
         self.api_key = api_key
         self.config = config
         self.url = url
         self.task_id = uuid.uuid4().hex[:32]
         self.ws: Optional[websockets.WebSocketClientProtocol] = None
+        self.pool = pool
+        self.mux = mux
+        # 可选的准入控制：每个任务（含重连）开始前排队领取许可，连接释放时归还
+        self.admission = admission
+        self.priority = priority
+        self._permit: Optional[Permit] = None
+        self._receive_task: Optional[asyncio.Task] = None
+        self.tasks = TaskGroup("asr")
+        self._task_finished = False
+        self._run_task_template: Optional[protocol.RunTaskTemplate] = None
+        self._result_channels: List[Channel[RecognitionResult]] = []
+
+        # 延迟统计：记录每次发送后累计的音频时长(ms)和发送时刻，用来计算 end_time → sentence_end 的延迟
+        self.metrics = metrics or NULL_METRICS
+        self._bytes_per_ms = config.sample_rate * _SAMPLE_BYTES / 1000
+        self._sent_bytes = 0
+        self._send_marks = deque(maxlen=1024)
+        self._run_task_sent_at: Optional[float] = None
+        self._first_audio_at: Optional[float] = None
+        self._first_partial_pending = False
+
+        # 断线自动恢复：保留未确认的音频，重连后重放，并把新任务的时间戳平移回原来的时间轴
+        self.reconnect = reconnect
+        self._replay: Optional[ReplayBuffer] = None
+        if reconnect:
+            self._replay = ReplayBuffer(int(reconnect.replay_ms * self._bytes_per_ms), _SAMPLE_BYTES)
+        self._recovery: Optional[asyncio.Task] = None
+        self._time_offset = 0
+        self._task_failed = False
+        self._finish_sent = False
+        self.reconnects = 0
+        self.replayed_ms = 0
+
+        # 可选的空闲保活：没有音频时注入静音 / 发送 ping，并测量 RTT
+        self.keepalive: Optional[Keepalive] = Keepalive(self, keepalive, self.metrics) if keepalive else None
 
         self.on_partial = on_partial
         self.on_final = on_final
         self.on_error = on_error
         self.on_sentence_end = on_sentence_end
+        self.on_result = on_result
+
+        # 增量模式：结果带上与上一个中间结果相同的前缀长度，内容没有变化的中间结果不再回调
+        self.incremental = incremental
+        self._last_text = ""
+        self._last_sentence_id: Optional[int] = None
+        self._sentences: List[str] = []
+        # 重连后新任务的 sentence_id 从头开始，平移到原来的编号之后
+        self._next_sentence_id = 0
+        self._sentence_offset = 0
+        self._sentence_rebase = False
+
+        # 采集格式和 ASR 要求的不一致时（如 8kHz μ-law、48kHz 双声道），发送前就地转换
+        self._converter = converter_for(input_format, AudioFormat(config.sample_rate))
+        # 旁路：每块实际发给服务端的音频（转换之后）都会交给这些回调，例如录音；回调不能阻塞
+        self._taps: List[Callable[[bytes], None]] = []
+
+        # 可选的合帧 + 有界队列发送通道
+        self._ingest: Optional[AudioIngest] = None
+        if ingest:
+            self._ingest = AudioIngest.for_sample_rate(
+                self._send_frame, config.sample_rate, ingest, on_error=self._report_error)
 
     async def __aenter__(self):
         await self.connect()
@@ -55,51 +230,223 @@ class DashScopeRealtimeASR:
     async def connect(self):
         if self.ws:
             return
-        self.ws = await websockets.connect(
-            self.url,
-            additional_headers={"Authorization": f"Bearer {self.api_key}"}
-        )
+        if self._replay is not None:
+            self._replay.clear()
+        self._time_offset = 0
+        self._finish_sent = False
+        self._last_text = ""
+        self._last_sentence_id = None
+        self._sentences.clear()
+        self._next_sentence_id = 0
+        self._sentence_offset = 0
+        self._sentence_rebase = False
+        if self._converter:
+            self._converter.reset()
+        await self._open()
+        if self.keepalive:
+            self.keepalive.start()
+
+    async def _open(self):
+        self.task_id = uuid.uuid4().hex[:32]
+        api_key = await self._admit()
+        started = time.perf_counter()
+        try:
+            if self.mux:
+                self.ws = await self.mux.open_task(self.task_id, upload=True)
+            elif self.pool:
+                self.ws = await self.pool.acquire()
+            else:
+                self.ws = await websockets.connect(
+                    self.url,
+                    additional_headers={"Authorization": f"Bearer {api_key}"}
+                )
+        except BaseException:
+            self._release_permit()
+            raise
+        self.metrics.observe("asr_connect_seconds", time.perf_counter() - started)
+        self._task_finished = False
+        self._task_failed = False
+        self._sent_bytes = 0
+        self._send_marks.clear()
+        self._first_audio_at = None
+        self._first_partial_pending = True
+        self._run_task_sent_at = time.perf_counter()
         await self._send_run_task()
-        asyncio.create_task(self._receive_loop())
+        self._receive_task = self.tasks.spawn(self._receive_loop(self.ws))
 
     async def disconnect(self):
-        if self.ws:
-            await self.ws.close()
-            self.ws = None
+        if not self.ws and self._recovery is None:
+            return
+        if self.keepalive:
+            await self.keepalive.stop()
+        recovery, self._recovery = self._recovery, None
+        await cancel_and_wait(recovery)
+        if self._ingest:
+            await self._ingest.reset()
+        ws, self.ws = self.ws, None
+        receive, self._receive_task = self._receive_task, None
+        await cancel_and_wait(receive)
+        self._close_results()
+        if ws is not None:
+            await self._drop_socket(ws, self._task_finished)
 
-    async def send_audio(self, data: bytes):
-        if not self.ws:
+    async def _admit(self) -> str:
+        if self.admission is None:
+            return self.api_key
+        # 连接池 / 多路复用的连接已经绑定了 key，直连时可以分配到准入控制器里最空闲的 key
+        spread = self.admission.api_keys and not (self.pool or self.mux)
+        self._permit = await self.admission.acquire(
+            self.config.model, self.priority, None if spread else self.api_key)
+        return self._permit.api_key
+
+    def _release_permit(self):
+        permit, self._permit = self._permit, None
+        if permit is not None:
+            permit.release()
+
+    async def _drop_socket(self, ws, reusable: bool):
+        self._release_permit()
+        if self.pool:
+            # 任务已正常结束的连接可以放回池中复用，否则直接丢弃
+            if reusable:
+                self.pool.release(ws)
+            else:
+                self.pool.discard(ws)
+        else:
+            await ws.close()
+
+    async def results(self, maxsize: int = 64) -> AsyncIterator[RecognitionResult]:
+        # 任务结束时迭代自然结束；消费慢时接收循环会等待，形成背压
+        channel: Channel[RecognitionResult] = Channel(maxsize)
+        self._result_channels.append(channel)
+        try:
+            async for result in channel:
+                yield result
+        finally:
+            # 关闭通道：接收循环可能正阻塞在这个已满的通道上，关闭后它会跳过这里
+            channel.close()
+            if channel in self._result_channels:
+                self._result_channels.remove(channel)
+
+    @property
+    def rtt(self) -> Optional[float]:
+        # 保活 ping 测得的平滑 RTT（秒），没有开启保活或还没有测量时为 None
+        return self.keepalive.rtt if self.keepalive else None
+
+    @property
+    def ingest_depth(self) -> int:
+        return self._ingest.depth if self._ingest else 0
+
+    @property
+    def task_finished(self) -> bool:
+        # 服务端已经确认当前任务结束（task-finished）
+        return self._task_finished
+
+    @property
+    def recovering(self) -> bool:
+        # 断线后正在后台重连、重放
+        return self._recovery is not None
+
+    async def send_keepalive(self, frame: Union[bytes, bytearray, memoryview]) -> bool:
+        # 保活用：不经过 tap 和合帧队列直接发一帧，也不刷新空闲计时；
+        # 任务在结束中、合帧缓冲里还有真实音频（包括攒了一半的帧）时不发，否则静音会插到真实音频前面；
+        # 返回是否发出
+        if self.ws is None or self._finish_sent or self._task_finished or (self._ingest and not self._ingest.empty):
+            return False
+        await self._send_frame(frame)
+        return True
+
+    async def send_audio(self, data: Union[bytes, bytearray, memoryview]):
+        if not self.ws and self._recovery is None:
             await self.connect()
-        await self.ws.send(data)
+        if self._converter:
+            data = self._converter.convert(data)
+            if not data:
+                return
+        await self._write(data)
+
+    def add_tap(self, tap: Callable[[bytes], None]):
+        self._taps.append(tap)
+
+    def remove_tap(self, tap: Callable[[bytes], None]):
+        if tap in self._taps:
+            self._taps.remove(tap)
+
+    async def _write(self, data: Union[bytes, bytearray, memoryview]):
+        if self.keepalive:
+            self.keepalive.touch()
+        for tap in self._taps:
+            tap(data)
+        if self._ingest:
+            await self._ingest.write(data)
+            self.metrics.set_gauge("asr_ingest_depth", self._ingest.depth)
+        else:
+            await self._send_frame(data)
 
     async def finish(self):
+        if self._converter and (self.ws or self._recovery is not None):
+            tail = self._converter.flush()
+            if tail:
+                await self._write(tail)
+        if self._ingest and (self.ws or self._recovery is not None):
+            await self._ingest.flush()
+        if self._recovery is not None:
+            # 等重连和重放完成再结束任务；不用 shield，调用方取消时不影响后台恢复
+            await asyncio.wait({self._recovery})
         if self.ws:
-            await self.ws.send(json.dumps({
-                "header": {
-                    "action": "finish-task",
-                    "task_id": self.task_id,
-                    "streaming": "duplex"
-                },
-                "payload": {"input": {}}
-            }))
+            self._finish_sent = True
+            await self._send_finish_task()
+
+    async def _send_finish_task(self):
+        await self.ws.send(protocol.finish_task(self.task_id))
+
+    async def _send_frame(self, frame: Union[bytes, bytearray, memoryview]):
+        if self._replay is not None:
+            self._replay.append(bytes(frame))
+            if self._recovery is not None:
+                # 重连期间只记录，连上后随重放一起补发
+                return
+        if not self.ws:
+            return
+        try:
+            await self._transmit(frame)
+        except (websockets.ConnectionClosed, ConnectionError):
+            # 音频已经在重放缓冲区里，断线由接收循环负责恢复
+            if self._replay is None:
+                raise
+
+    async def _transmit(self, frame: Union[bytes, bytearray, memoryview]):
+        now = time.perf_counter()
+        if self._first_audio_at is None:
+            self._first_audio_at = now
+        self._sent_bytes += frame.nbytes if isinstance(frame, memoryview) else len(frame)
+        self._send_marks.append((self._sent_bytes / self._bytes_per_ms, now))
+        await self.ws.send(frame)
+
+    def _observe_sentence_end(self, end_time: int):
+        # 找到包含 end_time 的那次发送，从它发出到收到句末结果之间的耗时
+        marks = self._send_marks
+        while marks and marks[0][0] < end_time:
+            marks.popleft()
+        if marks:
+            self.metrics.observe("asr_sentence_end_latency_seconds", time.perf_counter() - marks[0][1])
+
+    def _report_error(self, error: Exception):
+        if self.on_error:
+            self.on_error(error)
 
     async def _send_run_task(self):
-        params = self._build_parameters()
-        await self.ws.send(json.dumps({
-            "header": {
-                "action": "run-task",
-                "task_id": self.task_id,
-                "streaming": "duplex"
-            },
-            "payload": {
+        # 配置不可变，run-task 帧只需序列化一次
+        if self._run_task_template is None:
+            self._run_task_template = protocol.RunTaskTemplate({
                 "task_group": "audio",
                 "task": "asr",
                 "function": "recognition",
                 "model": self.config.model,
-                "parameters": params,
+                "parameters": self._build_parameters(),
                 "input": {}
-            }
-        }))
+            })
+        await self.ws.send(self._run_task_template.render(self.task_id))
 
     def _build_parameters(self):
         params = {
@@ -110,7 +457,8 @@ class DashScopeRealtimeASR:
             "semantic_punctuation_enabled": self.config.semantic_punctuation_enabled,
             "max_sentence_silence": self.config.max_sentence_silence,
             "punctuation_prediction_enabled": self.config.punctuation_prediction_enabled,
-            "heartbeat": self.config.heartbeat,
+            # 保活注入静音时需要 heartbeat，否则服务端仍会因长时间静音结束任务
+            "heartbeat": self.config.heartbeat or bool(self.keepalive and self.keepalive.config.silence_interval > 0),
             "inverse_text_normalization_enabled": self.config.inverse_text_normalization_enabled,
         }
         if self.config.vocabulary_id:
@@ -119,30 +467,161 @@ class DashScopeRealtimeASR:
             params["phrase_id"] = self.config.phrase_id
         return params
 
-    async def _receive_loop(self):
+    async def _receive_loop(self, ws):
         try:
-            async for message in self.ws:
-                data = json.loads(message)
+            async for message in ws:
+                data = protocol.loads(message)
                 header = data.get("header", {})
                 event = header.get("event")
 
-                if event == "result-generated":
-                    sentence = data["payload"]["output"]["sentence"]
-                    text = sentence.get("text", "")
+                if event == "task-started":
+                    if self._run_task_sent_at is not None:
+                        self.metrics.observe("asr_task_start_seconds", time.perf_counter() - self._run_task_sent_at)
+
+                elif event == "result-generated":
+                    payload = data["payload"]
+                    sentence = payload["output"]["sentence"]
+                    if sentence.get("heartbeat"):
+                        continue
+                    if self._first_partial_pending and self._first_audio_at is not None:
+                        self._first_partial_pending = False
+                        self.metrics.observe("asr_first_partial_seconds", time.perf_counter() - self._first_audio_at)
+                    result = RecognitionResult.from_sentence(
+                        sentence, payload.get("usage"), self._time_offset, self._rebase_sentence_id(sentence))
+                    text = result.text
+                    if result.is_sentence_end:
+                        end_time = sentence.get("end_time")
+                        if end_time:
+                            self._observe_sentence_end(end_time)
+                            if self._replay is not None:
+                                self._replay.ack(result.end_time * self.config.sample_rate // 1000 * _SAMPLE_BYTES)
+                        if result.sentence_id is not None:
+                            self._next_sentence_id = result.sentence_id + 1
+                        self._sentences.append(text)
+                    if self.incremental:
+                        previous = self._last_text if result.sentence_id == self._last_sentence_id else ""
+                        result.stable = _common_prefix(previous, text)
+                        unchanged = result.stable == len(text) == len(previous)
+                        self._last_text = "" if result.is_sentence_end else text
+                        self._last_sentence_id = result.sentence_id
+                        if unchanged and not result.is_sentence_end:
+                            continue
                     if self.on_partial:
                         self.on_partial(text)
-                    if self.on_sentence_end and sentence.get("end_time"):
+                    if self.on_sentence_end and result.is_sentence_end:
                         self.on_sentence_end(text)
+                    if self.on_result:
+                        self.on_result(result)
+                    for channel in list(self._result_channels):
+                        try:
+                            await channel.put(result)
+                        except ChannelClosed:
+                            pass  # 消费方已经退出
 
                 elif event == "task-finished":
+                    self._task_finished = True
+                    self._release_permit()
                     if self.on_final:
-                        self.on_final("done")
+                        # 整个任务的最终识别文本
+                        self.on_final("".join(self._sentences))
+                    self._close_results()
 
                 elif event == "task-failed":
+                    self._task_failed = True
+                    self._release_permit()
+                    error = RuntimeError(data.get("payload", {}).get("message", "Unknown error"))
                     if self.on_error:
-                        self.on_error(RuntimeError(data.get("payload", {}).get("message", "Unknown error")))
+                        self.on_error(error)
+                    self._close_results(error)
 
         except Exception as e:
+            if self._can_recover(ws):
+                self._start_recovery(e)
+                return
+            if self._recovery is not None and ws is self.ws:
+                # 重连中的新连接又断了：由 _recover 重试，失败时再报告错误、关闭结果通道
+                logger.debug("ASR replacement connection lost during recovery: %r", e)
+                return
             if self.on_error:
                 self.on_error(e)
+            self._close_results(e)
+            return
+        if self._can_recover(ws):
+            self._start_recovery(ConnectionError("ASR connection closed before task finished"))
+
+    def _rebase_sentence_id(self, sentence: dict) -> Optional[int]:
+        sentence_id = sentence.get("sentence_id")
+        if sentence_id is None:
+            return None
+        if self._sentence_rebase:
+            self._sentence_offset = self._next_sentence_id - sentence_id
+            self._sentence_rebase = False
+        return sentence_id + self._sentence_offset
+
+    def _can_recover(self, ws) -> bool:
+        return (self._replay is not None and ws is self.ws and self._recovery is None
+                and not self._task_finished and not self._task_failed)
+
+    def _start_recovery(self, error: Exception):
+        logger.warning("ASR connection lost (%r), reconnecting", error)
+        ws, self.ws = self.ws, None
+        self._receive_task = None
+        self._recovery = self.tasks.spawn(self._recover(ws, error))
+
+    async def _recover(self, dead, error: Exception):
+        started = time.perf_counter()
+        await self._drop_socket(dead, False)
+        for delay in self.reconnect.delays():
+            await asyncio.sleep(delay)
+            try:
+                await self._open()
+                replayed = await self._replay_tail()
+                if self._receive_task is None or self._receive_task.done():
+                    # 重放期间新连接已经断开（接收循环退出），这次重连不算成功
+                    raise ConnectionError("ASR connection lost while replaying")
+            except Exception as e:
+                logger.warning("ASR reconnect attempt failed: %r", e)
+                error = e
+                self.metrics.inc("asr_reconnect_failures")
+                if self.ws is not None:
+                    ws, self.ws = self.ws, None
+                    receive, self._receive_task = self._receive_task, None
+                    await cancel_and_wait(receive)
+                    await self._drop_socket(ws, False)
+                continue
+            # _replay_tail 返回时缓冲区已经送完，这里和下一帧发送之间没有让出事件循环
+            self._recovery = None
+            self.reconnects += 1
+            self.replayed_ms += replayed
+            self.metrics.inc("asr_reconnects")
+            self.metrics.observe("asr_recovery_seconds", time.perf_counter() - started)
+            self.metrics.observe("asr_replayed_seconds", replayed / 1000)
+            if self._finish_sent:
+                await self._send_finish_task()
+            return
+        self._recovery = None
+        self._report_error(error)
+        self._close_results(error)
+
+    async def _replay_tail(self) -> int:
+        # 新任务的 0 时刻对应缓冲区里最早那一帧；重放期间新写入的音频也一并补发
+        pos = self._replay.start
+        # 按完整采样数换算，22.05kHz 等每毫秒字节数不是整数的采样率也不会落在采样中间
+        self._time_offset = pos // _SAMPLE_BYTES * 1000 // self.config.sample_rate
+        self._sentence_rebase = True
+        self._last_text = ""
+        replayed = 0
+        while True:
+            chunks = self._replay.chunks_from(pos)
+            if not chunks:
+                return int(replayed / self._bytes_per_ms)
+            for offset, chunk in chunks:
+                await self._transmit(chunk)
+                pos = offset + len(chunk)
+                replayed += len(chunk)
+
+    def _close_results(self, error: Optional[Exception] = None):
+        for channel in self._result_channels:
+            channel.close(error)
+        self._result_channels.clear()
 
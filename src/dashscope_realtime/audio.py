@@ -0,0 +1,254 @@
+import math
+from dataclasses import dataclass
+from typing import Optional, Union
+
+# numpy 是可选依赖，只有需要转换时才用到；第一次创建转换器时才导入，不拖慢 import dashscope_realtime
+np = None
+
+
+def import_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+
+ENCODINGS = ("s16le", "f32le", "mulaw", "alaw")
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    sample_rate: int = 16000
+    channels: int = 1
+    encoding: str = "s16le"  # s16le / f32le / mulaw / alaw
+
+    @property
+    def sample_bytes(self) -> int:
+        return {"s16le": 2, "f32le": 4}.get(self.encoding, 1) * self.channels
+
+
+# G.711 查找表：解码 256 项，编码按 int16 全范围 65536 项，转换时只做一次 take
+_TABLES = {}
+
+
+def _g711_tables(encoding: str):
+    tables = _TABLES.get(encoding)
+    if tables is None:
+        codes = np.arange(256, dtype=np.uint8)
+        decode = _mulaw_decode(codes) if encoding == "mulaw" else _alaw_decode(codes)
+        pcm = np.arange(-32768, 32768, dtype=np.int32)
+        encode = _mulaw_encode(pcm) if encoding == "mulaw" else _alaw_encode(pcm)
+        tables = _TABLES[encoding] = (decode.astype(np.float32) / 32768.0, encode)
+    return tables
+
+
+def _mulaw_decode(codes):
+    u = ~codes.astype(np.int32) & 0xFF
+    exponent = (u >> 4) & 0x07
+    magnitude = (((u & 0x0F) << 3) + 0x84) << exponent
+    return np.where(u & 0x80, 0x84 - magnitude, magnitude - 0x84)
+
+
+_MULAW_SEGMENT_END = (0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF)
+
+
+def _mulaw_encode(pcm):
+    # 标准 G.711 分段算法（与 audioop.lin2ulaw 逐位一致）：先取 14 位，偏置 0x84 >> 2，上限 32635 >> 2
+    pcm = pcm >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(pcm), 32635 >> 2) + (0x84 >> 2)
+    segment = np.searchsorted(_MULAW_SEGMENT_END, magnitude)
+    code = np.where(segment >= 8, 0x7F, (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F))
+    return (code ^ mask).astype(np.uint8)
+
+
+def _alaw_decode(codes):
+    a = codes.astype(np.int32) ^ 0x55
+    exponent = (a >> 4) & 0x07
+    mantissa = a & 0x0F
+    magnitude = np.where(exponent == 0, (mantissa << 4) + 8, ((mantissa << 4) + 0x108) << np.maximum(exponent - 1, 0))
+    return np.where(a & 0x80, magnitude, -magnitude)
+
+
+def _alaw_encode(pcm):
+    sign = np.where(pcm >= 0, 0x80, 0)
+    magnitude = np.minimum(np.where(pcm >= 0, pcm, -pcm - 1), 32767) >> 3
+    exponent = np.clip(np.floor(np.log2(np.maximum(magnitude, 1))).astype(np.int32) - 4, 0, 7)
+    mantissa = np.where(exponent == 0, magnitude >> 1, magnitude >> exponent) & 0x0F
+    return ((sign | (exponent << 4) | mantissa) ^ 0x55).astype(np.uint8)
+
+
+# 流式多相重采样器：Kaiser 窗 sinc 滤波器组按有理数比 up/down 预先算好，
+# 块与块之间保留滤波器需要的历史样本，输出与一次性处理整段音频一致
+class Resampler:
+    def __init__(self, src_rate: int, dst_rate: int, zero_crossings: int = 16, rolloff: float = 0.945,
+                 beta: float = 8.6):
+        if import_numpy() is None:
+            raise ImportError("resampling requires numpy: pip install 'dashscope-realtime[audio]'")
+        g = math.gcd(src_rate, dst_rate)
+        self.up = dst_rate // g
+        self.down = src_rate // g
+        cutoff = min(1.0, self.up / self.down) * rolloff
+        self.half = int(math.ceil(zero_crossings / cutoff))
+        taps = 2 * self.half
+        # bank[phase, m]：输出位于输入 i + phase/up 处时，第 m 个抽头对应输入 i - half + 1 + m
+        phases = np.arange(self.up, dtype=np.float64)[:, None] / self.up
+        tau = phases + (self.half - 1) - np.arange(taps, dtype=np.float64)[None, :]
+        window = np.kaiser(2 * self.half * 64 + 1, beta)
+        w = np.interp(tau, np.linspace(-self.half, self.half, window.size), window, left=0.0, right=0.0)
+        self._bank = (cutoff * np.sinc(cutoff * tau) * w).astype(np.float32)
+        self._taps = taps
+        self.reset()
+
+    def reset(self):
+        # 开头补 half - 1 个零，第一个输出正好对齐第一个输入样本
+        self._history = np.zeros(self.half - 1, dtype=np.float32)
+        # 下一个输出在 history 坐标系中的位置，单位是 1/up 个输入样本；始终满足 position // up == half - 1
+        self._position = (self.half - 1) * self.up
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._work = np.zeros((0, self._taps), dtype=np.float32)
+
+    def process(self, samples) -> "np.ndarray":
+        n_hist = self._history.size
+        total = n_hist + samples.size
+        if self._buf.size < total:
+            self._buf = np.empty(max(total, 2 * self._buf.size), dtype=np.float32)
+        buf = self._buf[:total]
+        buf[:n_hist] = self._history
+        buf[n_hist:] = samples
+
+        # 中心为 i 的输出需要输入 [i - half + 1, i + half]，右侧不够时留到下一块
+        limit = (total - self.half) * self.up - self._position
+        count = -(-limit // self.down) if limit > 0 else 0
+        if count == 0:
+            self._history = buf.copy()
+            return np.zeros(0, dtype=np.float32)
+        positions = self._position + np.arange(count, dtype=np.int64) * self.down
+        starts = positions // self.up - (self.half - 1)
+        phases = positions % self.up
+
+        if self._work.shape[0] < count:
+            self._work = np.empty((max(count, 2 * self._work.shape[0]), self._taps), dtype=np.float32)
+        windows = self._work[:count]
+        np.take(buf, starts[:, None] + np.arange(self._taps), out=windows)
+        windows *= self._bank[phases]
+        out = windows.sum(axis=1)
+
+        position = self._position + count * self.down
+        keep_from = position // self.up - (self.half - 1)
+        self._history = buf[keep_from:].copy()
+        self._position = position - keep_from * self.up
+        return out
+
+    def flush(self) -> "np.ndarray":
+        # 补零把滤波器里剩余的样本推出来
+        out = self.process(np.zeros(self.half, dtype=np.float32))
+        self.reset()
+        return out
+
+
+# 采样格式 / 声道 / 采样率转换，按块流式处理；不满一个采样的字节留到下一块
+class AudioConverter:
+    def __init__(self, src: AudioFormat, dst: AudioFormat):
+        for fmt in (src, dst):
+            if fmt.encoding not in ENCODINGS:
+                raise ValueError("unsupported encoding %r" % fmt.encoding)
+        if src.channels != dst.channels and 1 not in (src.channels, dst.channels):
+            raise ValueError("can only mix between mono and %d channels" % max(src.channels, dst.channels))
+        if src.sample_rate != dst.sample_rate and dst.channels > 1 and src.channels > 1:
+            raise ValueError("multi-channel resampling is not supported, downmix to mono first")
+        self.src = src
+        self.dst = dst
+        self.identity = src == dst
+        if not self.identity and import_numpy() is None:
+            raise ImportError("audio conversion requires numpy: pip install 'dashscope-realtime[audio]'")
+        self._resampler = Resampler(src.sample_rate, dst.sample_rate) if src.sample_rate != dst.sample_rate else None
+        self._remainder = b""
+        # 各步骤复用的临时数组，块变大时按需扩容
+        self._scratch = {}
+
+    def convert(self, data: Union[bytes, bytearray, memoryview]) -> bytes:
+        if self.identity:
+            return bytes(data)
+        if self._remainder:
+            data = self._remainder + bytes(data)
+        frame = self.src.sample_bytes
+        usable = len(data) - len(data) % frame
+        self._remainder = bytes(data[usable:])
+        if not usable:
+            return b""
+        samples = self._decode(memoryview(data)[:usable])
+        return self._encode(self._resample(samples))
+
+    def flush(self) -> bytes:
+        self._remainder = b""
+        if self._resampler is None:
+            return b""
+        return self._encode(self._expand(self._resampler.flush()))
+
+    def reset(self):
+        self._remainder = b""
+        if self._resampler is not None:
+            self._resampler.reset()
+
+    def _buffer(self, name: str, size: int, dtype) -> "np.ndarray":
+        buf = self._scratch.get(name)
+        if buf is None or buf.size < size:
+            buf = self._scratch[name] = np.empty(max(size, 2 * buf.size if buf is not None else 0), dtype=dtype)
+        return buf[:size]
+
+    def _decode(self, data: memoryview) -> "np.ndarray":
+        encoding = self.src.encoding
+        if encoding == "s16le":
+            pcm = np.frombuffer(data, dtype="<i2")
+            samples = self._buffer("decode", pcm.size, np.float32)
+            samples[...] = pcm
+            samples *= 1.0 / 32768
+        elif encoding == "f32le":
+            samples = np.frombuffer(data, dtype="<f4")
+        else:
+            codes = np.frombuffer(data, dtype=np.uint8)
+            samples = np.take(_g711_tables(encoding)[0], codes, out=self._buffer("decode", codes.size, np.float32))
+        if self.src.channels > 1 and self.dst.channels == 1:
+            frames = samples.reshape(-1, self.src.channels)
+            samples = frames.mean(axis=1, dtype=np.float32, out=self._buffer("downmix", frames.shape[0], np.float32))
+        return samples
+
+    def _resample(self, samples: "np.ndarray") -> "np.ndarray":
+        if self._resampler is not None:
+            samples = self._resampler.process(samples)
+        return self._expand(samples)
+
+    def _expand(self, samples: "np.ndarray") -> "np.ndarray":
+        channels = self.dst.channels
+        if self.src.channels == 1 and channels > 1:
+            out = self._buffer("expand", samples.size * channels, np.float32)
+            out.reshape(-1, channels)[...] = samples[:, None]
+            samples = out
+        return samples
+
+    def _encode(self, samples: "np.ndarray") -> bytes:
+        encoding = self.dst.encoding
+        if encoding == "f32le":
+            return samples.astype("<f4", copy=False).tobytes()
+        scaled = np.multiply(samples, 32768, out=self._buffer("scale", samples.size, np.float32))
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, -32768, 32767, out=scaled)
+        if encoding == "s16le":
+            pcm = self._buffer("pcm", scaled.size, "<i2")
+            pcm[...] = scaled
+            return pcm.tobytes()
+        index = self._buffer("index", scaled.size, np.intp)
+        index[...] = scaled
+        index += 32768
+        return np.take(_g711_tables(encoding)[1], index, out=self._buffer("codes", index.size, np.uint8)).tobytes()
+
+
+def converter_for(src: Optional[AudioFormat], dst: AudioFormat) -> Optional[AudioConverter]:
+    if src is None or src == dst:
+        return None
+    return AudioConverter(src, dst)
@@ -0,0 +1,278 @@
+import asyncio
+import dataclasses
+import json
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .admission import AdmissionController, Priority
+from .asr import ASRConfig, DashScopeRealtimeASR
+from .audio import AudioFormat
+from .config import DASHSCOPE_WS_URL, logger
+from .metrics import MetricsSink, NULL_METRICS
+from .pool import SessionPool
+from .reconnect import ReconnectPolicy
+
+_WAV_ENCODINGS = {(1, 16): "s16le", (3, 32): "f32le", (6, 8): "alaw", (7, 8): "mulaw"}
+
+
+@dataclass(frozen=True)
+class BatchConfig:
+    concurrency: int = 8
+    chunk_ms: int = 1000  # 离线识别不需要模拟麦克风的小帧，大块发送减少消息数
+    speed: Optional[float] = None  # 相对实时的发送倍速，None 表示不限速，由 TCP 背压决定
+    max_retries: int = 2
+    finish_timeout: float = 60.0  # finish-task 之后等待最终结果的时间
+    checkpoint: Optional[str] = None  # JSONL 文件，记录已完成的文件，重跑时跳过
+
+
+@dataclass
+class Sentence:
+    text: str
+    begin_time: Optional[int]
+    end_time: Optional[int]
+
+
+@dataclass
+class Transcript:
+    path: str
+    sentences: List[Sentence] = field(default_factory=list)
+    audio_seconds: float = 0.0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(s.text for s in self.sentences)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_json(self) -> str:
+        return json.dumps(dataclasses.asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, line: str) -> "Transcript":
+        data = json.loads(line)
+        data["sentences"] = [Sentence(**s) for s in data.get("sentences", [])]
+        return cls(**data)
+
+
+@dataclass
+class BatchReport:
+    transcripts: List[Transcript]
+    wall_seconds: float
+    processed_seconds: float = 0.0  # 本次实际识别的音频时长，不含从断点恢复的文件
+    resumed: int = 0
+
+    @property
+    def audio_seconds(self) -> float:
+        return sum(t.audio_seconds for t in self.transcripts if t.ok)
+
+    @property
+    def failed(self) -> List[Transcript]:
+        return [t for t in self.transcripts if not t.ok]
+
+    @property
+    def throughput(self) -> float:
+        # 每小时墙钟时间处理的音频小时数
+        return self.processed_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+
+# 离线批量转写：文件用 mmap 读取，以尽可能快的速度推给服务端，多个文件并发识别
+class BatchTranscriber:
+    def __init__(
+            self,
+            api_key: str,
+            config: ASRConfig = ASRConfig(),
+            url: str = DASHSCOPE_WS_URL,
+            batch: BatchConfig = BatchConfig(),
+            pool: Optional[SessionPool] = None,
+            metrics: Optional[MetricsSink] = None,
+            reconnect: Optional[ReconnectPolicy] = None,
+            admission: Optional[AdmissionController] = None,
+            on_transcript: Optional[Callable[[Transcript], None]] = None,
+    ):
+        self.api_key = api_key
+        # 发送的是去掉文件头的 PCM 数据
+        self.config = dataclasses.replace(config, format="pcm")
+        self.url = url
+        self.batch = batch
+        self.pool = pool
+        self.metrics = metrics or NULL_METRICS
+        # 设置后连接中断时在文件中途续传，否则整个文件按 max_retries 重新识别
+        self.reconnect = reconnect
+        # 与实时通话共用准入控制时以 BATCH 优先级排队，不挤占实时会话
+        self.admission = admission
+        self.on_transcript = on_transcript
+
+    async def run(self, paths: Iterable[str]) -> BatchReport:
+        paths = list(paths)
+        done = self._load_checkpoint()
+        results: Dict[str, Transcript] = {p: done[p] for p in paths if p in done}
+        queue: asyncio.Queue = asyncio.Queue()
+        for path in paths:
+            if path not in results:
+                queue.put_nowait(path)
+
+        started = time.perf_counter()
+        workers = [asyncio.create_task(self._worker(queue, results))
+                   for _ in range(min(self.batch.concurrency, queue.qsize()))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        report = BatchReport(
+            [results[p] for p in paths], time.perf_counter() - started,
+            processed_seconds=sum(results[p].audio_seconds for p in paths if p not in done and results[p].ok),
+            resumed=sum(1 for p in paths if p in done))
+        logger.info("batch transcribed %d files (%d failed, %d resumed), %.1f audio-hours per hour",
+                    len(paths), len(report.failed), report.resumed, report.throughput)
+        return report
+
+    async def _worker(self, queue: asyncio.Queue, results: Dict[str, Transcript]):
+        while not queue.empty():
+            path = queue.get_nowait()
+            transcript = await self._transcribe_with_retry(path)
+            results[path] = transcript
+            if transcript.ok:
+                self._save_checkpoint(transcript)
+            if self.on_transcript:
+                self.on_transcript(transcript)
+
+    async def _transcribe_with_retry(self, path: str) -> Transcript:
+        error: Optional[Exception] = None
+        for attempt in range(self.batch.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                transcript = await self.transcribe(path)
+            except Exception as e:
+                error = e
+                self.metrics.inc("batch_file_errors")
+                logger.warning("batch transcription of %s failed (attempt %d): %r", path, attempt + 1, e)
+                continue
+            transcript.elapsed = time.perf_counter() - started
+            self.metrics.observe("batch_file_seconds", transcript.elapsed)
+            self.metrics.inc("batch_audio_seconds", transcript.audio_seconds)
+            return transcript
+        return Transcript(path, error=repr(error))
+
+    async def transcribe(self, path: str) -> Transcript:
+        # 所有切片都要在 mmap 关闭前释放，否则 close 会抛 BufferError
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                memoryview(mm) as view:
+            offset, size, fmt = _locate_pcm(view)
+            with view[offset:offset + size] as data:
+                return await self._transcribe_view(path, data, fmt)
+
+    async def _transcribe_view(self, path: str, data: memoryview, fmt: Optional[AudioFormat]) -> Transcript:
+        source = fmt or AudioFormat(self.config.sample_rate)
+        bytes_per_second = source.sample_rate * source.sample_bytes
+        chunk = max(1, bytes_per_second * self.batch.chunk_ms // 1000 // source.sample_bytes) * source.sample_bytes
+
+        errors: List[Exception] = []
+        # 文件格式与识别配置不一致时由 ASR 的 input_format 负责转换
+        asr = DashScopeRealtimeASR(self.api_key, config=self.config, url=self.url, pool=self.pool,
+                                   metrics=self.metrics, on_error=errors.append, reconnect=self.reconnect,
+                                   input_format=fmt, admission=self.admission, priority=Priority.BATCH)
+        transcript = Transcript(path, audio_seconds=len(data) / bytes_per_second)
+        collector: Optional[asyncio.Task] = None
+        try:
+            await asr.connect()
+            collector = asyncio.create_task(self._collect(asr, transcript))
+            await asyncio.sleep(0)  # 让 collector 先订阅结果
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            for offset in range(0, len(data), chunk):
+                if errors or collector.done():
+                    break
+                # mmap 切片直接发送，不拷贝；发送速度只受 TCP 背压限制
+                with data[offset:offset + chunk] as piece:
+                    await asr.send_audio(piece)
+                if self.batch.speed:
+                    delay = started + (offset + chunk) / bytes_per_second / self.batch.speed - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+            if not errors:
+                await asr.finish()
+            await asyncio.wait_for(collector, self.batch.finish_timeout)
+        finally:
+            # 发送中途出错时 collector 还没被等待，取消并回收，避免 "Task exception was never retrieved"
+            if collector is not None:
+                collector.cancel()
+                await asyncio.gather(collector, return_exceptions=True)
+            await asr.disconnect()
+        if errors:
+            raise errors[0]
+        if not asr.task_finished:
+            raise ConnectionError("recognition of %s ended before task-finished" % path)
+        return transcript
+
+    @staticmethod
+    async def _collect(asr: DashScopeRealtimeASR, transcript: Transcript):
+        async for result in asr.results(maxsize=256):
+            if result.is_sentence_end:
+                transcript.sentences.append(Sentence(result.text, result.begin_time, result.end_time))
+
+    def _load_checkpoint(self) -> Dict[str, Transcript]:
+        done: Dict[str, Transcript] = {}
+        path = self.batch.checkpoint
+        if not path or not os.path.exists(path):
+            return done
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    transcript = Transcript.from_json(line)
+                except (ValueError, TypeError):
+                    # 进程中途被杀时最后一行可能只写了一半
+                    logger.warning("skipping corrupt checkpoint line in %s", path)
+                    continue
+                done[transcript.path] = transcript
+        return done
+
+    def _save_checkpoint(self, transcript: Transcript):
+        if not self.batch.checkpoint:
+            return
+        with open(self.batch.checkpoint, "a", encoding="utf-8") as f:
+            f.write(transcript.to_json() + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _locate_pcm(data: memoryview) -> Tuple[int, int, Optional[AudioFormat]]:
+    # 返回音频数据的偏移、长度和格式；不是 WAV 时按原始 PCM（与 ASRConfig 一致）处理
+    if len(data) < 12 or bytes(data[0:4]) != b"RIFF" or bytes(data[8:12]) != b"WAVE":
+        return 0, len(data), None
+    pos = 12
+    fmt: Optional[AudioFormat] = None
+    while pos + 8 <= len(data):
+        chunk_id = bytes(data[pos:pos + 4])
+        size, = struct.unpack_from("<I", data, pos + 4)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            tag, channels, rate = struct.unpack_from("<HHI", data, body)
+            bits, = struct.unpack_from("<H", data, body + 14)
+            if tag == 0xFFFE and size >= 40:
+                # WAVE_FORMAT_EXTENSIBLE：真正的格式在子格式 GUID 的前两个字节
+                tag, = struct.unpack_from("<H", data, body + 24)
+            encoding = _WAV_ENCODINGS.get((tag, bits))
+            if encoding is None:
+                raise ValueError("unsupported WAV format tag=%d bits=%d" % (tag, bits))
+            fmt = AudioFormat(rate, channels, encoding)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            # 录音中断的文件 data 长度可能是 0 或超出文件大小
+            if size == 0 or body + size > len(data):
+                size = len(data) - body
+            return body, size, fmt
+        pos = body + size + (size & 1)
+    raise ValueError("WAV file has no data chunk")
@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import os
+import re
+import struct
+import tempfile
+import unicodedata
+from collections import OrderedDict
+from dataclasses import astuple
+from typing import Optional, List, Sequence, Dict
+
+from .config import logger
+
+_WHITESPACE = re.compile(r"\s+")
+_COUNT = struct.Struct("<I")
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def cache_key(text: str, config) -> str:
+    raw = "\x1f".join([normalize_text(text)] + [repr(v) for v in astuple(config)])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+# 合成音频缓存：内存 LRU（按字节数淘汰）+ 可选的磁盘层
+class AudioCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, directory: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+        self._entries: "OrderedDict[str, List[bytes]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        # 只查内存层；连同磁盘层一起查用 contains()，文件检查放在线程池里，不阻塞事件循环
+        return key in self._entries
+
+    async def contains(self, key: str) -> bool:
+        if key in self._entries:
+            return True
+        if not self.directory:
+            return False
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, os.path.exists, self._path(key))
+
+    async def get(self, key: str) -> Optional[List[bytes]]:
+        chunks = self._entries.get(key)
+        if chunks is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return chunks
+        if self.directory:
+            loop = asyncio.get_running_loop()
+            chunks = await loop.run_in_executor(None, self._read_file, self._path(key))
+            if chunks is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._store(key, chunks)
+                return chunks
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, chunks: Sequence[bytes]):
+        chunks = [bytes(c) for c in chunks]
+        self._store(key, chunks)
+        if self.directory:
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self._write_file, self._path(key), chunks)
+            except OSError as e:
+                logger.warning("audio cache failed to write %s: %r", key, e)
+
+    def clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self._bytes = 0
+
+    def _store(self, key: str, chunks: List[bytes]):
+        size = sum(len(c) for c in chunks)
+        if key in self._entries:
+            del self._entries[key]
+            self._bytes -= self._sizes.pop(key)
+        if size > self.max_bytes:
+            return  # 放不下新值时旧值也已经作废
+        self._entries[key] = chunks
+        self._entries.move_to_end(key)
+        self._sizes[key] = size
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            old, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(old)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".audio")
+
+    # 文件格式：块数 N，N 个块长度，然后是连续的音频数据
+    @staticmethod
+    def _write_file(path: str, chunks: List[bytes]):
+        # 每次写入用独立的临时文件，同一个键的并发写入不会互相破坏，os.replace 保证读到的是完整文件
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_COUNT.pack(len(chunks)))
+                f.write(struct.pack("<%dI" % len(chunks), *(len(c) for c in chunks)))
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _read_file(path: str) -> Optional[List[bytes]]:
+        # 一次读入整个文件再切块：块会进入内存层长期持有，mmap 映射换不来零拷贝
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            count, = _COUNT.unpack_from(data, 0)
+            lengths = struct.unpack_from("<%dI" % count, data, _COUNT.size)
+            offset = _COUNT.size + 4 * count
+            if offset + sum(lengths) != len(data):
+                return None
+            chunks = []
+            for length in lengths:
+                chunks.append(data[offset:offset + length])
+                offset += length
+            return chunks
+        except (OSError, struct.error):
+            return None
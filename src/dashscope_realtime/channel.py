@@ -0,0 +1,75 @@
+import asyncio
+from collections import deque
+from typing import Optional, Deque, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class ChannelClosed(Exception):
+    pass
+
+
+# 单生产者到消费者的有界通道，支持 async for 以及带错误的结束
+class Channel(Generic[T]):
+    def __init__(self, maxsize: int = 64):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._items: Deque[T] = deque()
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+        self._closed = False
+        self._error: Optional[BaseException] = None
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    async def put(self, item: T):
+        while len(self._items) >= self.maxsize:
+            if self._closed:
+                raise ChannelClosed()
+            self._writable.clear()
+            await self._writable.wait()
+        self.put_nowait(item)
+
+    def put_nowait(self, item: T):
+        if self._closed:
+            raise ChannelClosed()
+        if len(self._items) >= self.maxsize:
+            raise asyncio.QueueFull()
+        self._items.append(item)
+        self._readable.set()
+
+    async def get(self) -> T:
+        while not self._items:
+            if self._closed:
+                if self._error is not None:
+                    raise self._error
+                raise ChannelClosed()
+            self._readable.clear()
+            await self._readable.wait()
+        item = self._items.popleft()
+        self._writable.set()
+        return item
+
+    def close(self, error: Optional[BaseException] = None):
+        if self._closed:
+            return
+        self._closed = True
+        self._error = error
+        self._readable.set()
+        self._writable.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> T:
+        try:
+            return await self.get()
+        except ChannelClosed:
+            raise StopAsyncIteration
@@ -1,44 +1,134 @@
 import asyncio
-from typing import Callable, Union, Optional
+import time
+from typing import Callable, Union, Optional, AsyncIterable
 
-from .asr import DashScopeRealtimeASR
-from .tts import DashScopeRealtimeTTS
+from .admission import AdmissionController, Priority
+from .asr import DashScopeRealtimeASR, ASRConfig, RecognitionResult
+from .audio import AudioFormat, converter_for
+from .config import DASHSCOPE_WS_URL, logger
+from .tts import DashScopeRealtimeTTS, TTSConfig
 from .event import EventEmitter
+from .keepalive import KeepaliveConfig
+from .metrics import MetricsSink, NULL_METRICS
+from .mux import MultiplexConnection
+from .pipeline import PipelineConfig, TTSPipeline
+from .pool import SessionPool
+from .segmenter import segment_text
+from .speculation import Speculation, SpeculationConfig, Speculator
+from .tasks import TaskGroup
+from .vad import VADConfig, VADGate, VoiceDetector
 
 
 class RealtimeEvent:
     ASR_PARTIAL = "asr.partial"
     ASR_FINAL = "asr.final"
     ASR_SENTENCE_END = "asr.sentence_end"
+    ASR_RESULT = "asr.result"  # 完整的 RecognitionResult（sentence_id、时间戳、词级信息等）
     TTS_AUDIO = "tts.audio"
     TTS_END = "tts.end"
     READY = "ready"
     ERROR = "error"
     INTERRUPTED = "interrupted"
+    SPEECH_STARTED = "speech.started"
+    SPEECH_STOPPED = "speech.stopped"
 
 
 class RealtimeClient:
-    def __init__(self, api_key: str):
+    def __init__(
+            self,
+            api_key: str,
+            url: str = DASHSCOPE_WS_URL,
+            asr_config: ASRConfig = ASRConfig(),
+            tts_config: TTSConfig = TTSConfig(),
+            multiplex: bool = False,
+            metrics: Optional[MetricsSink] = None,
+            vad: Optional[VADConfig] = None,
+            vad_detector: Optional[VoiceDetector] = None,
+            barge_in: bool = False,
+            input_format: Optional[AudioFormat] = None,
+            output_format: Optional[AudioFormat] = None,
+            incremental: bool = False,
+            start_timeout: float = 10.0,
+            stop_timeout: float = 5.0,
+            admission: Optional[AdmissionController] = None,
+            priority: int = Priority.LIVE,
+            respond: Optional[Callable[[str], Optional[str]]] = None,
+            speculative: Optional[SpeculationConfig] = None,
+            pipeline: Optional[PipelineConfig] = None,
+            keepalive: Optional[KeepaliveConfig] = None,
+            pool: Optional[SessionPool] = None,
+    ):
         self.api_key = api_key
-        self.asr = DashScopeRealtimeASR(api_key=api_key)
-        self.tts = DashScopeRealtimeTTS(api_key=api_key)
+        self.metrics = metrics or NULL_METRICS
+        # 开启 multiplex 后 ASR 和 TTS 共用一条 WebSocket 连接
+        self.mux = MultiplexConnection(api_key, url=url) if multiplex else None
+        # 也可以传入预热好的连接池（见 preconnect），ASR / TTS 的连接都从池中取
+        self.pool = pool
+        self.asr = DashScopeRealtimeASR(api_key=api_key, config=asr_config, url=url, mux=self.mux, pool=pool,
+                                        metrics=metrics, incremental=incremental, admission=admission,
+                                        priority=priority, keepalive=keepalive)
+        self.tts = DashScopeRealtimeTTS(api_key=api_key, config=tts_config, url=url, mux=self.mux, pool=pool,
+                                        metrics=metrics, output_format=output_format, admission=admission,
+                                        priority=priority, standby=True)  # 直连时保持一条备用连接，打断后立即切换
+        # 麦克风 / 话机的音频先转换成 ASR 的格式，再经过 VAD
+        self._input_converter = converter_for(input_format, AudioFormat(asr_config.sample_rate))
         self.events = EventEmitter()
+        self.start_timeout = start_timeout
+        self.stop_timeout = stop_timeout
+        self.tasks = TaskGroup("client")
         self._start_lock = asyncio.Lock()
         self._tts_playing = False
         self._playback_queue = asyncio.Queue()
         self._playback_task: Optional[asyncio.Task] = None
         self._playback_ending = asyncio.Event()
 
+        # 可选的本地 VAD：静音不发给 ASR；开启 barge_in 时检测到说话立即打断播报，不用等 ASR 的首个结果
+        self.vad: Optional[VADGate] = None
+        self.barge_in = barge_in
+        self._barge_in_task: Optional[asyncio.Task] = None
+        if vad or vad_detector:
+            self.vad = VADGate(self.asr.send_audio, asr_config.sample_rate, vad or VADConfig(), vad_detector,
+                               on_speech_start=self._on_speech_start, on_speech_end=self._on_speech_end)
+
+        # 识别出整句后播报的回复，默认原样回声；返回 None 表示不回复
+        self.respond = respond or (lambda text: text)
+        # 可选的预合成：回复可以由中间结果确定时，在另一条 TTS 连接上提前合成
+        self.spec_tts: Optional[DashScopeRealtimeTTS] = None
+        self.speculator: Optional[Speculator] = None
+        if speculative:
+            self.spec_tts = DashScopeRealtimeTTS(api_key=api_key, config=tts_config, url=url, pool=pool,
+                                                 metrics=metrics, output_format=output_format, admission=admission,
+                                                 priority=priority)
+            self.spec_tts.send_audio = lambda chunk: self.events.emit(RealtimeEvent.TTS_AUDIO, chunk)
+            self.spec_tts.on_error = lambda err: self.events.emit(RealtimeEvent.ERROR, err)
+            self.speculator = Speculator(self.spec_tts, self.respond, speculative, metrics)
+
+        # 可选的流水线播报：多条 TTS 连接轮流合成，下一段在当前段播放时就开始合成，按顺序无缝输出
+        self.pipeline: Optional[TTSPipeline] = None
+        if pipeline:
+            lanes = [self.tts] + [
+                DashScopeRealtimeTTS(api_key=api_key, config=tts_config, url=url, pool=pool, metrics=metrics,
+                                     output_format=output_format, admission=admission, priority=priority)
+                for _ in range(pipeline.lanes - 1)
+            ]
+            for lane in lanes[1:]:
+                lane.on_error = lambda err: self.events.emit(RealtimeEvent.ERROR, err)
+            self.pipeline = TTSPipeline(lanes, pipeline, metrics=metrics,
+                                        send_audio=lambda chunk: self.events.emit(RealtimeEvent.TTS_AUDIO, chunk))
+
         # ASR callbacks
-        self.asr.on_partial = lambda text: asyncio.create_task(
-            self._emit_async(RealtimeEvent.ASR_PARTIAL, text))
+        self.asr.on_partial = lambda text: self.events.emit(RealtimeEvent.ASR_PARTIAL, text)
         self.asr.on_final = lambda text: self.events.emit(RealtimeEvent.ASR_FINAL, text)
         self.asr.on_error = lambda err: self.events.emit(RealtimeEvent.ERROR, err)
-        self.asr.on_sentence_end = lambda text: asyncio.create_task(self._on_sentence_end(text))
+        self.asr.on_sentence_end = self._on_sentence_end
+        self.asr.on_result = self._on_result
 
         # TTS callbacks
-        self.tts.on_audio_chunk = lambda chunk: self.events.emit(RealtimeEvent.TTS_AUDIO, chunk)
-        self.tts.on_end = lambda: self.events.emit(RealtimeEvent.TTS_END)
+        if not self.pipeline:
+            # 流水线模式下各条连接的 send_audio 已经接到流水线的播放时钟上，不能覆盖；
+            # 每段都是一个任务，整轮播完后才发 TTS_END
+            self.tts.send_audio = lambda chunk: self.events.emit(RealtimeEvent.TTS_AUDIO, chunk)
+            self.tts.on_end = lambda: self.events.emit(RealtimeEvent.TTS_END)
         self.tts.on_error = lambda err: self.events.emit(RealtimeEvent.ERROR, err)
 
     async def __aenter__(self):
@@ -50,25 +140,85 @@ class RealtimeClient:
 
     async def start(self):
         async with self._start_lock:
-            await self.asr.connect()
-            await self.tts.connect()
-            self._playback_task = asyncio.create_task(self._playback_loop())
+            started = time.perf_counter()
+            # ASR 与 TTS 的握手和 run-task 并发进行，任一失败或超时都撤销另一边
+            connects = [asyncio.ensure_future(self.asr.connect()),
+                        asyncio.ensure_future(self.pipeline.start() if self.pipeline else self.tts.connect())]
+            if self.spec_tts:
+                connects.append(asyncio.ensure_future(self.spec_tts.connect()))
+            try:
+                done, pending = await asyncio.wait(connects, timeout=self.start_timeout,
+                                                   return_when=asyncio.FIRST_EXCEPTION)
+                failed = [t for t in done if t.exception() is not None]
+                if failed or pending:
+                    raise failed[0].exception() if failed else asyncio.TimeoutError(
+                        "client start timed out after %gs" % self.start_timeout)
+            except BaseException:
+                for task in connects:
+                    task.cancel()
+                await asyncio.wait(connects)
+                await self.stop()
+                raise
+            self.metrics.observe("client_start_seconds", time.perf_counter() - started)
+            self._playback_task = self.tasks.spawn(self._playback_loop())
             self.events.emit(RealtimeEvent.READY)
 
     async def stop(self):
-        await asyncio.gather(
-            self.asr.disconnect(),
-            self.tts.disconnect(),
-            return_exceptions=True
-        )
-        if self._playback_task:
-            self._playback_task.cancel()
+        # 整个关闭过程不超过 stop_timeout；先停播放循环，再并行断开 ASR / TTS，最后回收剩余的后台任务
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.stop_timeout
+        if self.vad and self.asr.ws:
+            # 说话中还没凑满一帧的尾巴先发给 ASR，否则最后几十毫秒会丢
+            try:
+                await asyncio.wait_for(self.vad.flush(), self.stop_timeout)
+            except Exception as e:
+                logger.debug("error flushing vad on stop: %r", e)
+        await self.tasks.cancel(max(0.0, deadline - loop.time()))
+        self._playback_task = None
+        if self.speculator:
+            await self.speculator.cancel()
+        disconnects = [asyncio.ensure_future(self.asr.disconnect()),
+                       asyncio.ensure_future(self.pipeline.close() if self.pipeline else self.tts.disconnect())]
+        if self.spec_tts:
+            disconnects.append(asyncio.ensure_future(self.spec_tts.disconnect()))
+        if self.mux:
+            disconnects.append(asyncio.ensure_future(self._close_mux(disconnects[:])))
+        _, pending = await asyncio.wait(disconnects, timeout=max(0.0, deadline - loop.time()))
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("client stop timed out, abandoning %d disconnect(s)", len(pending))
+            await asyncio.wait(pending)
+        for task in disconnects:
+            if not task.cancelled() and task.exception() is not None:
+                logger.debug("error during client stop: %r", task.exception())
+        remaining = max(0.0, deadline - loop.time())
+        parts = [self.asr, self.spec_tts] + (self.pipeline.lanes if self.pipeline else [self.tts])
+        await asyncio.gather(*(part.tasks.cancel(remaining) for part in parts if part))
+        if self.vad:
+            self.vad.reset()
+        self.metrics.observe("client_stop_seconds", time.perf_counter() - started)
+
+    async def _close_mux(self, disconnects):
+        # ASR / TTS 任务先结束，再关闭共用的连接
+        await asyncio.wait(disconnects)
+        await self.mux.close()
+
+    def on(self, event_name: str, callback: Callable[[Union[str, bytes, Exception]], None], priority: int = 0,
+           once: bool = False, weak: bool = False):
+        return self.events.on(event_name, callback, priority=priority, once=once, weak=weak)
 
-    def on(self, event_name: str, callback: Callable[[Union[str, bytes, Exception]], None]):
-        self.events.on(event_name, callback)
+    def off(self, event_name: str, callback: Optional[Callable] = None):
+        self.events.off(event_name, callback)
 
-    async def wait_for(self, event_name: str):
-        return await self.events.wait_for(event_name)
+    async def wait_for(self, event_name: str, timeout: Optional[float] = None):
+        return await self.events.wait_for(event_name, timeout)
+
+    @property
+    def rtt(self) -> Optional[float]:
+        # ASR 连接的 RTT，需要开启 keepalive
+        return self.asr.rtt
 
     def is_tts_playing(self) -> bool:
         return self._tts_playing
@@ -77,14 +227,25 @@ class RealtimeClient:
         self._tts_playing = False
         self._playback_ending.clear()
         if self._playback_task and not self._playback_task.done():
+            # 停掉正在进行的播报，换一个新的播放循环继续处理之后的文本
             self._playback_task.cancel()
+            self._playback_task = self.tasks.spawn(self._playback_loop())
         self._playback_queue = asyncio.Queue()
 
     async def send_audio_chunk(self, audio: bytes):
-        await self.asr.send_audio(audio)
+        if self._input_converter:
+            audio = self._input_converter.convert(audio)
+            if not audio:
+                return
+        if self.vad:
+            await self.vad.write(audio)
+        else:
+            await self.asr.send_audio(audio)
 
-    async def call_voice(self, text: str):
+    async def call_voice(self, text: Union[str, AsyncIterable[str]]):
+        # 也可以直接传入 LLM 的 token 流（async iterable），会边生成边合成
         await self._playback_queue.put(text)
+        self.metrics.set_gauge("client_playback_queue_depth", self._playback_queue.qsize())
 
     async def end_voice(self):
         self._playback_ending.set()
@@ -93,30 +254,93 @@ class RealtimeClient:
         self.reset()
         while not self._playback_queue.empty():
             self._playback_queue.get_nowait()
-        await self.tts.interrupt()
+        if self.pipeline:
+            await self.pipeline.interrupt()
+        else:
+            await self.tts.interrupt()
+        if self.speculator:
+            await self.speculator.cancel()
+            await self.spec_tts.interrupt()
         self.events.emit(RealtimeEvent.INTERRUPTED)
 
+    async def _next_playback(self):
+        # 正在播放时，队列空了之后才到的 end_voice() 也要结束这一轮，不能一直等下一段文本
+        if not self._tts_playing or self._playback_ending.is_set():
+            return await self._playback_queue.get()
+        get = asyncio.ensure_future(self._playback_queue.get())
+        ending = asyncio.ensure_future(self._playback_ending.wait())
+        try:
+            await asyncio.wait({get, ending}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            ending.cancel()
+            if not get.done():
+                get.cancel()
+        return get.result() if get.done() and not get.cancelled() else None
+
     async def _playback_loop(self):
         while True:
-            text = await self._playback_queue.get()
+            text = await self._next_playback()
+            if text is None:
+                await self._end_playback()
+                continue
+            self.metrics.set_gauge("client_playback_queue_depth", self._playback_queue.qsize())
             try:
                 self._tts_playing = True
-                await self.tts.say(text)
+                if self.pipeline:
+                    await self._submit(text)
+                elif isinstance(text, str):
+                    await self.tts.say(text)
+                elif isinstance(text, Speculation):
+                    await self.spec_tts.play(text.chunks())
+                else:
+                    await self.tts.say_stream(text)
             except Exception as e:
                 self.events.emit(RealtimeEvent.ERROR, e)
             self._playback_queue.task_done()
 
             # 播放结束判断逻辑
             if self._playback_queue.empty() and self._playback_ending.is_set():
-                await self.tts.finish()
-                self._tts_playing = False
-                self._playback_ending.clear()
-                self.events.emit(RealtimeEvent.TTS_END)
+                await self._end_playback()
+
+    async def _end_playback(self):
+        if self.pipeline:
+            await self.pipeline.drain()
+        else:
+            await self.tts.finish()
+        self._tts_playing = False
+        self._playback_ending.clear()
+        self.events.emit(RealtimeEvent.TTS_END)
+
+    async def _submit(self, text: Union[str, Speculation, AsyncIterable[str]]):
+        # 只提交不等待播放，后面的文本立即开始合成
+        if isinstance(text, str):
+            self.pipeline.submit(text)
+        elif isinstance(text, Speculation):
+            self.pipeline.submit(text.chunks())
+        else:
+            async for segment in segment_text(text, self.tts.segmenter):
+                self.pipeline.submit(segment)
+
+    def _on_speech_start(self):
+        self.metrics.inc("vad_speech_started")
+        self.events.emit(RealtimeEvent.SPEECH_STARTED)
+        if self.barge_in and self._tts_playing and (self._barge_in_task is None or self._barge_in_task.done()):
+            self._barge_in_task = self.tasks.spawn(self.interrupt())
+
+    def _on_speech_end(self):
+        self.events.emit(RealtimeEvent.SPEECH_STOPPED)
 
-    async def _emit_async(self, event_name: str, payload: Union[str, bytes]):
-        self.events.emit(event_name, payload)
+    def _on_result(self, result: RecognitionResult):
+        self.events.emit(RealtimeEvent.ASR_RESULT, result)
+        if self.speculator and not result.is_sentence_end:
+            self.speculator.observe_partial(result.text)
 
-    async def _on_sentence_end(self, text: str):
+    def _on_sentence_end(self, text: str):
         self.events.emit(RealtimeEvent.ASR_SENTENCE_END, text)
-        await self.call_voice(text)
+        reply = self.respond(text)
+        speculation = self.speculator.commit(reply) if self.speculator else None
+        if reply is None:
+            return
+        self._playback_queue.put_nowait(speculation or reply)
+        self.metrics.set_gauge("client_playback_queue_depth", self._playback_queue.qsize())
         # 可选：你也可以手动调用 end_voice() 在某些标点后自动结束
@@ -1,26 +1,136 @@
 import asyncio
-from collections import defaultdict
+import bisect
+import weakref
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+
+from .config import logger
+
+_iscoroutine = asyncio.iscoroutine
+
+
+class _Handler:
+    __slots__ = ("ref", "callback", "priority", "once", "__weakref__")
+
+    def __init__(self, callback: Callable, priority: int, once: bool, weak: bool, on_dead: Callable):
+        self.priority = priority
+        self.once = once
+        self.ref = None
+        self.callback = None
+        if weak:
+            # 绑定方法要用 WeakMethod，否则临时的 bound method 对象会被立即回收
+            ref_type = weakref.WeakMethod if hasattr(callback, "__self__") else weakref.ref
+            self.ref = ref_type(callback, lambda _: on_dead(self))
+        else:
+            self.callback = callback
+
+    def resolve(self) -> Optional[Callable]:
+        return self.callback if self.ref is None else self.ref()
+
+    def matches(self, callback: Callable) -> bool:
+        return self.resolve() == callback
 
 
 class EventEmitter:
-    def __init__(self):
-        self.handlers = defaultdict(list)
+    # 处理函数列表用不可变元组保存，增删时整体替换，emit 时直接遍历无需拷贝。
+    # 元组里存 (callback, record)：普通处理函数直接存 callback，一次性 / 弱引用的存 None，调用时再解析。
+    # 协程处理函数的结果进入同一个分发队列，由最多 max_concurrency 个后台任务依次执行
+    def __init__(self, max_concurrency: int = 8):
+        self.handlers: Dict[str, Tuple[Tuple[Optional[Callable], _Handler], ...]] = defaultdict(tuple)
+        self.max_concurrency = max_concurrency
+        self._pending: Deque[Any] = deque()
+        self._workers = 0
+        self._worker_tasks: Set[asyncio.Task] = set()
+        self._idle: Optional[asyncio.Event] = None
 
-    def on(self, event_name, handler):
-        self.handlers[event_name].append(handler)
+    def on(self, event_name: str, handler: Callable, priority: int = 0, once: bool = False, weak: bool = False):
+        # priority 大的先执行，相同优先级按注册顺序
+        record = _Handler(handler, priority, once, weak, lambda dead: self._remove(event_name, dead))
+        entry = (None if once or weak else handler, record)
+        handlers = self.handlers[event_name]
+        index = bisect.bisect_right([-r.priority for _, r in handlers], -priority)
+        self.handlers[event_name] = handlers[:index] + (entry,) + handlers[index:]
+        return handler
 
-    def emit(self, event_name, *args, **kwargs):
-        for handler in self.handlers[event_name]:
+    def once(self, event_name: str, handler: Callable, priority: int = 0, weak: bool = False):
+        return self.on(event_name, handler, priority=priority, once=True, weak=weak)
+
+    def off(self, event_name: str, handler: Optional[Callable] = None):
+        if handler is None:
+            self.handlers.pop(event_name, None)
+            return
+        handlers = self.handlers.get(event_name, ())
+        for _, record in handlers:
+            if record.matches(handler):
+                self._remove(event_name, record)
+                return
+
+    def listener_count(self, event_name: str) -> int:
+        return len(self.handlers.get(event_name, ()))
+
+    def emit(self, event_name: str, *args, **kwargs):
+        handlers = self.handlers.get(event_name)
+        if not handlers:
+            return
+        for handler, record in handlers:
+            if handler is None:
+                if record.once:
+                    self._remove(event_name, record)
+                handler = record.resolve()
+                if handler is None:
+                    continue
             result = handler(*args, **kwargs)
-            if asyncio.iscoroutine(result):
-                asyncio.create_task(result)
+            if result is not None and _iscoroutine(result):
+                self._schedule(result)
 
-    async def wait_for(self, event_name):
-        future = asyncio.Future()
+    async def wait_for(self, event_name: str, timeout: Optional[float] = None):
+        future = asyncio.get_running_loop().create_future()
 
-        def once(*args, **kwargs):
+        def resolve(*args, **kwargs):
             if not future.done():
                 future.set_result(args[0] if args else None)
 
-        self.on(event_name, once)
-        return await future
+        self.once(event_name, resolve)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            # 超时或被取消时把一次性处理函数也移除，避免处理函数列表无限增长
+            self.off(event_name, resolve)
+
+    async def drain(self):
+        # 等待已经派发的协程处理函数全部执行完
+        while self._pending or self._workers:
+            if self._idle is None:
+                self._idle = asyncio.Event()
+            await self._idle.wait()
+
+    def _remove(self, event_name: str, record: _Handler):
+        handlers = self.handlers.get(event_name)
+        if handlers and any(r is record for _, r in handlers):
+            remaining = tuple(e for e in handlers if e[1] is not record)
+            if remaining:
+                self.handlers[event_name] = remaining
+            else:
+                del self.handlers[event_name]
+
+    def _schedule(self, coro):
+        self._pending.append(coro)
+        if self._workers < self.max_concurrency:
+            self._workers += 1
+            task = asyncio.get_running_loop().create_task(self._dispatch())
+            self._worker_tasks.add(task)
+            task.add_done_callback(self._worker_tasks.discard)
+
+    async def _dispatch(self):
+        try:
+            while self._pending:
+                coro = self._pending.popleft()
+                try:
+                    await coro
+                except Exception:
+                    logger.exception("event handler failed")
+        finally:
+            self._workers -= 1
+            if not self._workers and self._idle is not None:
+                self._idle.set()
+                self._idle = None
@@ -0,0 +1,438 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from .asr import ASRConfig
+from .client import RealtimeClient, RealtimeEvent
+from .config import DASHSCOPE_WS_URL, logger
+from .event import EventEmitter
+from .shmring import ShmRing, RingReader, RingWriter
+from .tts import TTSConfig
+
+# 父进程 → worker
+_OPEN = 1
+_AUDIO = 2
+_SAY = 3
+_END_VOICE = 4
+_INTERRUPT = 5
+_FINISH = 6
+_CLOSE = 7
+_DRAIN = 8
+_SHUTDOWN = 9
+# worker → 父进程
+_EVENT = 16
+_TTS_AUDIO = 17
+_CLOSED = 18
+_DRAINED = 19
+
+# worker 每隔这么多秒检查一次父进程是否还在
+_PARENT_CHECK_INTERVAL = 1.0
+
+_FORWARDED_EVENTS = (
+    RealtimeEvent.READY,
+    RealtimeEvent.ASR_PARTIAL,
+    RealtimeEvent.ASR_FINAL,
+    RealtimeEvent.ASR_SENTENCE_END,
+    RealtimeEvent.TTS_END,
+    RealtimeEvent.INTERRUPTED,
+    RealtimeEvent.ERROR,
+)
+
+
+@dataclass(frozen=True)
+class GatewayConfig:
+    workers: int = 0  # 0 表示按 CPU 核数
+    ring_bytes: int = 4 * 1024 * 1024  # 每个方向、每个 worker 的共享内存大小
+    session_queue: int = 256  # worker 内每个会话待处理音频帧的上限，超出的音频丢弃并计数；控制消息不受限
+    outbound_backlog: int = 1024 * 1024  # worker → 父进程积压超过这么多字节时丢弃中间识别结果；TTS 音频则等待写入
+    multiplex: bool = False
+    drain_timeout: float = 30.0
+    start_method: str = "spawn"
+
+
+class GatewayClosedError(RuntimeError):
+    pass
+
+
+# 多进程网关：会话按 worker 分片，每个 worker 进程跑自己的事件循环和 RealtimeClient，
+# 音频和事件通过共享内存环形缓冲区传递，不经过 pickle
+class Gateway:
+    def __init__(
+            self,
+            api_key: str,
+            url: str = DASHSCOPE_WS_URL,
+            asr_config: ASRConfig = ASRConfig(),
+            tts_config: TTSConfig = TTSConfig(),
+            config: GatewayConfig = GatewayConfig(),
+    ):
+        self.api_key = api_key
+        self.url = url
+        self.asr_config = asr_config
+        self.tts_config = tts_config
+        self.config = config
+        self.workers: List[_WorkerHandle] = []
+        self._session_ids = itertools.count(1)
+        self._closed = False
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self):
+        count = self.config.workers or os.cpu_count() or 1
+        self.workers = [self._spawn(i) for i in range(count)]
+
+    @property
+    def session_count(self) -> int:
+        return sum(len(w.sessions) for w in self.workers)
+
+    def _spawn(self, index: int) -> "_WorkerHandle":
+        ctx = multiprocessing.get_context(self.config.start_method)
+        inbound = ShmRing(self.config.ring_bytes)
+        outbound = ShmRing(self.config.ring_bytes)
+        process = ctx.Process(
+            target=_worker_main,
+            name="dashscope-gateway-%d" % index,
+            args=(self.api_key, self.url, self.asr_config, self.tts_config, self.config, inbound, outbound),
+            daemon=True,
+        )
+        process.start()
+        return _WorkerHandle(index, process, inbound, outbound)
+
+    async def open_session(self, key: Optional[str] = None) -> "GatewaySession":
+        # 指定 key（如通话 ID）时同一个 key 总是落在同一个 worker 上，便于复用 worker 内的缓存
+        if self._closed:
+            raise GatewayClosedError("gateway is closed")
+        worker = self._pick(key)
+        session = GatewaySession(next(self._session_ids), worker)
+        worker.sessions[session.session_id] = session
+        await worker.writer.send(session.session_id, _OPEN)
+        return session
+
+    def _pick(self, key: Optional[str]) -> "_WorkerHandle":
+        available = [w for w in self.workers if w.accepting]
+        if not available:
+            raise GatewayClosedError("no worker is accepting sessions")
+        if key is None:
+            return min(available, key=lambda w: len(w.sessions))
+        # 固定槽位上的 worker 在排空时顺延到下一个，槽位恢复后又回到原来的位置
+        start = zlib.crc32(key.encode("utf-8")) % len(self.workers)
+        for i in range(len(self.workers)):
+            worker = self.workers[(start + i) % len(self.workers)]
+            if worker.accepting:
+                return worker
+        return available[0]
+
+    async def drain(self, index: int, timeout: Optional[float] = None, restart: bool = False):
+        # 不再给该 worker 分配新会话，等已有会话自然结束；超时后强制关闭
+        worker = self.workers[index]
+        await worker.drain(self.config.drain_timeout if timeout is None else timeout)
+        if restart and not self._closed:
+            self.workers[index] = self._spawn(index)
+
+    async def close(self, timeout: Optional[float] = None):
+        if self._closed:
+            return
+        self._closed = True
+        timeout = self.config.drain_timeout if timeout is None else timeout
+        await asyncio.gather(*(w.drain(timeout) for w in self.workers), return_exceptions=True)
+
+
+class GatewaySession:
+    def __init__(self, session_id: int, worker: "_WorkerHandle"):
+        self.session_id = session_id
+        self.worker = worker
+        self.events = EventEmitter()
+        self.closed = asyncio.Event()
+
+    def on(self, event_name: str, callback: Callable[[Union[str, bytes, Exception]], None], priority: int = 0,
+           once: bool = False, weak: bool = False):
+        return self.events.on(event_name, callback, priority=priority, once=once, weak=weak)
+
+    def off(self, event_name: str, callback: Optional[Callable] = None):
+        self.events.off(event_name, callback)
+
+    async def wait_for(self, event_name: str, timeout: Optional[float] = None):
+        return await self.events.wait_for(event_name, timeout)
+
+    async def send_audio_chunk(self, audio: bytes):
+        await self._send(_AUDIO, bytes(audio))
+
+    async def call_voice(self, text: str):
+        await self._send(_SAY, text.encode("utf-8"))
+
+    async def end_voice(self):
+        await self._send(_END_VOICE)
+
+    async def interrupt(self):
+        await self._send(_INTERRUPT)
+
+    async def finish(self):
+        # 结束 ASR 任务，剩余的识别结果仍会回调
+        await self._send(_FINISH)
+
+    async def close(self):
+        if not self.closed.is_set():
+            await self._send(_CLOSE)
+            await self.closed.wait()
+
+    async def _send(self, kind: int, payload: bytes = b""):
+        if self.closed.is_set():
+            raise GatewayClosedError("session %d is closed" % self.session_id)
+        await self.worker.writer.send(self.session_id, kind, payload)
+
+
+class _WorkerHandle:
+    def __init__(self, index: int, process, inbound: ShmRing, outbound: ShmRing):
+        self.index = index
+        self.process = process
+        self.inbound = inbound
+        self.outbound = outbound
+        self.writer = RingWriter(inbound)
+        self.reader = RingReader(outbound)
+        self.sessions: Dict[int, GatewaySession] = {}
+        self.accepting = True
+        self._drained = asyncio.Event()
+        self._stopped = False
+        self._loop = asyncio.get_running_loop()
+        self._reader_task = asyncio.create_task(self._read_loop())
+        # worker 进程意外退出时 sentinel 变为可读
+        self._loop.add_reader(process.sentinel, self._on_exit)
+
+    async def _read_loop(self):
+        while True:
+            session_id, kind, payload = await self.reader.get()
+            if kind == _DRAINED:
+                self._drained.set()
+                continue
+            session = self.sessions.get(session_id)
+            if session is None:
+                continue
+            if kind == _TTS_AUDIO:
+                session.events.emit(RealtimeEvent.TTS_AUDIO, payload)
+            elif kind == _EVENT:
+                name, _, data = payload.decode("utf-8").partition("\x00")
+                if name == RealtimeEvent.ERROR:
+                    session.events.emit(name, RuntimeError(data))
+                elif name in (RealtimeEvent.READY, RealtimeEvent.TTS_END, RealtimeEvent.INTERRUPTED):
+                    session.events.emit(name)
+                else:
+                    session.events.emit(name, data)
+            elif kind == _CLOSED:
+                del self.sessions[session_id]
+                session.closed.set()
+
+    def _on_exit(self):
+        self._loop.remove_reader(self.process.sentinel)
+        self.accepting = False
+        if not self._stopped:
+            logger.warning("gateway worker %d exited unexpectedly", self.index)
+        self._fail_sessions(ConnectionError("gateway worker %d exited" % self.index))
+        self._drained.set()
+
+    def _fail_sessions(self, error: Exception):
+        for session in list(self.sessions.values()):
+            session.events.emit(RealtimeEvent.ERROR, error)
+            session.closed.set()
+        self.sessions.clear()
+
+    async def drain(self, timeout: float):
+        self.accepting = False
+        self._stopped = True
+        if self.process.is_alive():
+            await self.writer.send(0, _DRAIN)
+            try:
+                await asyncio.wait_for(self._drained.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("gateway worker %d did not drain in %.1fs, shutting down", self.index, timeout)
+                await self.writer.send(0, _SHUTDOWN)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.process.join, 5)
+        if self.process.is_alive():
+            self.process.terminate()
+            await loop.run_in_executor(None, self.process.join, 1)
+        if self.process.exitcode is not None:
+            self._loop.remove_reader(self.process.sentinel)
+        self._fail_sessions(ConnectionError("gateway worker %d stopped" % self.index))
+        self._reader_task.cancel()
+        self.reader.close()
+        self.writer.close()
+        self.inbound.close()
+        self.outbound.close()
+
+
+def _worker_main(api_key, url, asr_config, tts_config, config, inbound, outbound):
+    try:
+        asyncio.run(_Worker(api_key, url, asr_config, tts_config, config, inbound, outbound).run())
+    except KeyboardInterrupt:
+        pass
+
+
+class _Worker:
+    def __init__(self, api_key, url, asr_config, tts_config, config: GatewayConfig,
+                 inbound: ShmRing, outbound: ShmRing):
+        self.api_key = api_key
+        self.url = url
+        self.asr_config = asr_config
+        self.tts_config = tts_config
+        self.config = config
+        self.inbound = inbound
+        self.outbound = outbound
+        self.sessions: Dict[int, _Inbox] = {}
+        self.tasks: Dict[int, asyncio.Task] = {}
+        self.draining = False
+        self.dropped_audio = 0
+        self.dropped_events = 0
+        self.done = asyncio.Event()
+        self._parent = os.getppid()
+
+    @property
+    def orphaned(self) -> bool:
+        # 父进程被强杀时 worker 会被过继给别的进程，环的另一端已经没人读写
+        return os.getppid() != self._parent
+
+    async def run(self):
+        reader = RingReader(self.inbound)
+        self.writer = RingWriter(self.outbound)
+        dispatcher = asyncio.create_task(self._dispatch(reader))
+        while not self.done.is_set():
+            try:
+                await asyncio.wait_for(self.done.wait(), _PARENT_CHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                if self.orphaned and not self.draining:
+                    logger.warning("gateway worker lost its parent process, closing %d session(s)",
+                                   len(self.sessions))
+                    self.draining = True
+                    self._close_sessions()
+                    self._check_drained()
+        dispatcher.cancel()
+        # 把剩余的事件发完再退出；父进程已经不在时没人读，直接退出
+        while self.writer.backlog and not self.orphaned:
+            await asyncio.sleep(self.writer.retry_interval)
+        reader.close()
+
+    async def _dispatch(self, reader: RingReader):
+        # 分发循环从不等待：一个会话处理慢只会让它自己的音频被丢弃，不影响其他会话和 DRAIN / SHUTDOWN
+        while True:
+            session_id, kind, payload = await reader.get()
+            if kind == _OPEN:
+                inbox = _Inbox(self.config.session_queue)
+                self.sessions[session_id] = inbox
+                self.tasks[session_id] = asyncio.create_task(self._run_session(session_id, inbox))
+            elif kind == _DRAIN:
+                self.draining = True
+                self._check_drained()
+            elif kind == _SHUTDOWN:
+                self._close_sessions()
+            else:
+                inbox = self.sessions.get(session_id)
+                if inbox is not None and not inbox.put(kind, payload):
+                    self.dropped_audio += 1
+                    if inbox.dropped == 1:
+                        logger.warning("gateway session %d is falling behind, dropping audio", session_id)
+
+    async def _run_session(self, session_id: int, inbox: "_Inbox"):
+        client = RealtimeClient(self.api_key, url=self.url, asr_config=self.asr_config,
+                                tts_config=self.tts_config, multiplex=self.config.multiplex)
+        for name in _FORWARDED_EVENTS:
+            client.on(name, self._forwarder(session_id, name))
+        # TTS 音频等到写入共享内存环后才返回：环满时播放任务随之等待，压力一路传回服务端
+        client.tts.send_audio = self._audio_sender(session_id)
+        try:
+            await client.start()
+            while True:
+                kind, payload = await inbox.get()
+                if kind == _AUDIO:
+                    await client.send_audio_chunk(payload)
+                elif kind == _SAY:
+                    await client.call_voice(payload.decode("utf-8"))
+                elif kind == _END_VOICE:
+                    await client.end_voice()
+                elif kind == _INTERRUPT:
+                    await client.interrupt()
+                elif kind == _FINISH:
+                    await client.asr.finish()
+                elif kind == _CLOSE:
+                    break
+        except Exception as e:
+            self._emit(session_id, RealtimeEvent.ERROR, repr(e))
+        finally:
+            await client.stop()
+            if inbox.dropped:
+                logger.warning("gateway session %d dropped %d audio chunk(s)", session_id, inbox.dropped)
+            inbox.clear()
+            self.sessions.pop(session_id, None)
+            self.tasks.pop(session_id, None)
+            self.writer.send_nowait(session_id, _CLOSED)
+            self._check_drained()
+
+    def _forwarder(self, session_id: int, name: str):
+        def forward(data=None):
+            if isinstance(data, Exception):
+                data = repr(data)
+            self._emit(session_id, name, data)
+        return forward
+
+    def _audio_sender(self, session_id: int):
+        async def send(chunk: bytes):
+            await self.writer.send(session_id, _TTS_AUDIO, chunk)
+        return send
+
+    def _emit(self, session_id: int, name: str, data: Optional[str]):
+        if name == RealtimeEvent.ASR_PARTIAL and self.writer.backlog_bytes >= self.config.outbound_backlog:
+            # 父进程跟不上：中间结果会被后一个覆盖，可以丢；其余事件必须送达
+            self.dropped_events += 1
+            return
+        payload = name if data is None else name + "\x00" + data
+        self.writer.send_nowait(session_id, _EVENT, payload.encode("utf-8"))
+
+    def _close_sessions(self):
+        for inbox in self.sessions.values():
+            inbox.clear()
+            inbox.put(_CLOSE, b"")
+
+    def _check_drained(self):
+        if self.draining and not self.sessions:
+            self.writer.send_nowait(0, _DRAINED)
+            self.done.set()
+
+
+# worker 内单个会话的待处理消息：音频有上限，超出时丢弃；控制消息总是入队，和音频保持先后顺序
+class _Inbox:
+    def __init__(self, max_audio: int):
+        self.max_audio = max_audio
+        self.dropped = 0
+        self._items: Deque[Tuple[int, bytes]] = deque()
+        self._audio = 0
+        self._readable = asyncio.Event()
+
+    def put(self, kind: int, payload: bytes) -> bool:
+        if kind == _AUDIO:
+            if self._audio >= self.max_audio:
+                self.dropped += 1
+                return False
+            self._audio += 1
+        self._items.append((kind, payload))
+        self._readable.set()
+        return True
+
+    async def get(self) -> Tuple[int, bytes]:
+        while not self._items:
+            self._readable.clear()
+            await self._readable.wait()
+        kind, payload = self._items.popleft()
+        if kind == _AUDIO:
+            self._audio -= 1
+        return kind, payload
+
+    def clear(self):
+        self._items.clear()
+        self._audio = 0
@@ -0,0 +1,144 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Callable, Awaitable, Deque, List, Tuple
+
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+
+
+@dataclass(frozen=True)
+class IngestConfig:
+    frame_ms: int = 100
+    max_frames: int = 50
+    policy: str = BLOCK
+    sample_width: int = 2  # 16bit PCM
+
+
+# 把任意大小的音频写入合并成固定大小的帧，再由单个后台任务发送。
+# 写入接受 bytes / bytearray / memoryview 以及任何支持 buffer protocol 的对象（如 numpy 数组），
+# 数据只会被拷贝一次到复用的帧缓冲里。
+class AudioIngest:
+    def __init__(
+            self,
+            send: Callable[[memoryview], Awaitable[None]],
+            frame_bytes: int,
+            max_frames: int = 50,
+            policy: str = BLOCK,
+            on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        if policy not in (BLOCK, DROP_OLDEST):
+            raise ValueError(f"unknown ingest policy: {policy!r}")
+        if frame_bytes <= 0 or max_frames <= 0:
+            raise ValueError("frame_bytes and max_frames must be positive")
+        self.frame_bytes = frame_bytes
+        self.max_frames = max_frames
+        self.policy = policy
+        self.on_error = on_error
+        self.dropped_frames = 0
+        self.sent_frames = 0
+
+        self._send = send
+        self._frame = bytearray(frame_bytes)
+        self._fill = 0
+        self._queue: Deque[Tuple[bytearray, int]] = deque()
+        self._free: List[bytearray] = []
+        self._has_frames = asyncio.Event()
+        self._has_space = asyncio.Event()
+        self._has_space.set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._sender: Optional[asyncio.Task] = None
+
+    @classmethod
+    def for_sample_rate(
+            cls,
+            send: Callable[[memoryview], Awaitable[None]],
+            sample_rate: int,
+            config: IngestConfig = IngestConfig(),
+            on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> "AudioIngest":
+        frame_bytes = sample_rate * config.sample_width * config.frame_ms // 1000
+        return cls(send, frame_bytes, config.max_frames, config.policy, on_error)
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    @property
+    def empty(self) -> bool:
+        # 没有攒了一半的帧、没有排队的帧，也没有正在发送的帧
+        return not self._fill and self._idle.is_set()
+
+    @property
+    def depth_bytes(self) -> int:
+        return sum(length for _, length in self._queue) + self._fill
+
+    async def write(self, data):
+        view = memoryview(data)
+        if view.format != "B" or view.ndim != 1:
+            view = view.cast("B")
+        offset, size = 0, len(view)
+        while offset < size:
+            n = min(self.frame_bytes - self._fill, size - offset)
+            self._frame[self._fill:self._fill + n] = view[offset:offset + n]
+            self._fill += n
+            offset += n
+            if self._fill == self.frame_bytes:
+                await self._enqueue()
+
+    async def flush(self):
+        if self._fill:
+            await self._enqueue()
+        await self._idle.wait()
+
+    async def reset(self):
+        if self._sender and not self._sender.done():
+            self._sender.cancel()
+            try:
+                await self._sender
+            except asyncio.CancelledError:
+                pass
+        self._sender = None
+        while self._queue:
+            self._free.append(self._queue.popleft()[0])
+        self._fill = 0
+        self._has_frames.clear()
+        self._has_space.set()
+        self._idle.set()
+
+    async def _enqueue(self):
+        if self.policy == BLOCK:
+            while len(self._queue) >= self.max_frames:
+                self._has_space.clear()
+                await self._has_space.wait()
+        elif len(self._queue) >= self.max_frames:
+            # 网络卡顿时丢弃最旧的帧，保证内存占用恒定
+            self._free.append(self._queue.popleft()[0])
+            self.dropped_frames += 1
+
+        self._queue.append((self._frame, self._fill))
+        self._frame = self._free.pop() if self._free else bytearray(self.frame_bytes)
+        self._fill = 0
+        self._idle.clear()
+        self._has_frames.set()
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.create_task(self._send_loop())
+
+    async def _send_loop(self):
+        while True:
+            if not self._queue:
+                self._idle.set()
+                self._has_frames.clear()
+                await self._has_frames.wait()
+                continue
+            frame, length = self._queue.popleft()
+            self._has_space.set()
+            try:
+                await self._send(memoryview(frame)[:length])
+                self.sent_frames += 1
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+            finally:
+                self._free.append(frame)
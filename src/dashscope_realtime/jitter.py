@@ -0,0 +1,137 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Deque
+
+from .metrics import MetricsSink, NULL_METRICS
+
+
+@dataclass(frozen=True)
+class JitterConfig:
+    target_ms: int = 0  # 开始播放前需要缓冲的时长
+    min_ms: int = 0  # 欠载后重新开始播放前需要缓冲的时长
+    max_ms: int = 5000  # 缓冲上限，超过后写入方阻塞
+    frame_ms: Optional[int] = None  # 设置后按固定时长重新切帧
+    sample_width: int = 2  # 16bit PCM
+
+
+# 位于接收循环和播放任务之间的有界缓冲。时长按 PCM 估算，对压缩格式只是近似值，
+# 但字节上限始终有效。put(None) 表示音频流结束。
+# 欠载只统计播放中途断粮：缓冲取空时已经有请求在等音频、之后又来了数据才算一次；
+# 正常结束、两次请求之间的空闲都不算
+class JitterBuffer:
+    def __init__(self, sample_rate: int, config: JitterConfig = JitterConfig(),
+                 metrics: Optional[MetricsSink] = None):
+        if config.max_ms <= 0 or config.min_ms > config.max_ms or config.target_ms > config.max_ms:
+            raise ValueError("invalid jitter buffer levels: %r" % (config,))
+        self.config = config
+        self.metrics = metrics or NULL_METRICS
+        self.bytes_per_ms = sample_rate * config.sample_width / 1000
+        self.frame_bytes = self._align(config.frame_ms) if config.frame_ms else 0
+        self.target_bytes = self._align(config.target_ms)
+        self.min_bytes = self._align(config.min_ms)
+        self.max_bytes = max(self._align(config.max_ms), self.frame_bytes)
+
+        self.underruns = 0
+        self.overruns = 0
+
+        self._chunks: Deque[bytes] = deque()
+        self._head_offset = 0
+        self._size = 0
+        self._ended = False
+        self._playing = False
+        self._threshold = self.target_bytes
+        self._requested_at = 0.0  # 上游最近一次发出合成请求的时刻
+        self._starved_at: Optional[float] = None  # 播放中缓冲被取空的时刻
+        self._readable = asyncio.Event()
+        self._writable = asyncio.Event()
+        self._writable.set()
+
+    @property
+    def depth_bytes(self) -> int:
+        return self._size
+
+    @property
+    def fill_ms(self) -> float:
+        return self._size / self.bytes_per_ms if self.bytes_per_ms else 0.0
+
+    def request(self):
+        # 上游发出了新的合成请求（如 continue-task），之后的断粮才可能算欠载
+        self._requested_at = time.monotonic()
+
+    async def put(self, chunk: Optional[bytes]):
+        if chunk is None:
+            self._ended = True
+            self._starved_at = None
+            self._readable.set()
+            return
+        if self._starved_at is not None:
+            if self._requested_at <= self._starved_at:
+                self.underruns += 1
+                self.metrics.inc("tts_jitter_underruns")
+            self._starved_at = None
+        if self._size and self._size + len(chunk) > self.max_bytes:
+            self.overruns += 1
+            self.metrics.inc("tts_jitter_overruns")
+            while self._size and self._size + len(chunk) > self.max_bytes:
+                self._writable.clear()
+                await self._writable.wait()
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        self._readable.set()
+
+    async def get(self) -> Optional[bytes]:
+        while True:
+            need = self.frame_bytes or 1
+            if self._playing and self._size >= need:
+                return self._take()
+            if self._ended:
+                return self._take() if self._size else None
+            if not self._playing and self._size >= max(self._threshold, need):
+                self._playing = True
+                continue
+            if self._playing:
+                # 播放中缓冲被取空，之后需要重新攒到 min 水位再播；是否算欠载等下一块数据到来时再判断
+                self._starved_at = time.monotonic()
+                self._playing = False
+                self._threshold = self.min_bytes
+            self._readable.clear()
+            await self._readable.wait()
+
+    def clear(self):
+        self._chunks.clear()
+        self._head_offset = 0
+        self._size = 0
+        self._ended = False
+        self._playing = False
+        self._threshold = self.target_bytes
+        self._starved_at = None
+        self._writable.set()
+
+    def _take(self) -> bytes:
+        if not self.frame_bytes:
+            chunk = self._chunks.popleft()
+            if self._head_offset:
+                chunk = chunk[self._head_offset:]
+                self._head_offset = 0
+        else:
+            want = min(self.frame_bytes, self._size)
+            parts = []
+            while want:
+                head = self._chunks[0]
+                part = head[self._head_offset:self._head_offset + want]
+                parts.append(part)
+                want -= len(part)
+                self._head_offset += len(part)
+                if self._head_offset == len(head):
+                    self._chunks.popleft()
+                    self._head_offset = 0
+            chunk = parts[0] if len(parts) == 1 else b"".join(parts)
+        self._size -= len(chunk)
+        self._writable.set()
+        return chunk
+
+    def _align(self, ms: int) -> int:
+        size = int(self.bytes_per_ms * ms)
+        return size - size % self.config.sample_width
@@ -0,0 +1,109 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import websockets
+
+from .config import logger
+from .metrics import MetricsSink, NULL_METRICS
+from .tasks import TaskGroup
+
+
+@dataclass(frozen=True)
+class KeepaliveConfig:
+    idle_after: float = 1.0  # 超过这么久没有音频才开始保活，有音频时暂停
+    silence_interval: float = 1.0  # 注入静音帧的间隔（秒），0 表示不发静音；静音同样按音频时长计费
+    silence_ms: int = 100  # 每次注入的静音时长
+    ping_interval: float = 5.0  # WebSocket ping 的间隔（秒），0 表示不 ping
+    ping_timeout: float = 5.0
+    rtt_smoothing: float = 0.2  # RTT 指数平滑系数
+
+
+# 长时间 ASR 会话的空闲保活：没有音频时按间隔注入静音帧（配合 heartbeat 防止服务端因静音超时结束任务），
+# 并发送 WebSocket ping 测量 RTT；真实音频恢复后两者都暂停
+class Keepalive:
+    def __init__(self, asr, config: KeepaliveConfig = KeepaliveConfig(), metrics: Optional[MetricsSink] = None):
+        self.asr = asr
+        self.config = config
+        self.metrics = metrics or NULL_METRICS
+        self.tasks = TaskGroup("keepalive")
+        self.rtt: Optional[float] = None  # 平滑后的 RTT（秒）
+        self.last_rtt: Optional[float] = None
+        self.silence_frames = 0
+        self.pings = 0
+        self.ping_timeouts = 0
+        self._last_audio = time.monotonic()
+        self._silence = b"\x00" * int(config.silence_ms * asr.config.sample_rate * 2 / 1000)
+
+    @property
+    def idle(self) -> bool:
+        return time.monotonic() - self._last_audio >= self.config.idle_after
+
+    def touch(self):
+        # 每块真实音频调用一次
+        self._last_audio = time.monotonic()
+
+    def start(self):
+        if len(self.tasks):
+            return
+        self.touch()
+        if self.config.silence_interval > 0 and self._silence:
+            self.tasks.spawn(self._silence_loop())
+        if self.config.ping_interval > 0:
+            self.tasks.spawn(self._ping_loop())
+
+    async def stop(self):
+        await self.tasks.cancel()
+
+    async def _wait_idle(self):
+        while True:
+            remaining = self._last_audio + self.config.idle_after - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(remaining)
+
+    async def _silence_loop(self):
+        while True:
+            await self._wait_idle()
+            try:
+                # 结束中的任务、合帧队列里还有真实音频时 ASR 不会插入静音
+                if await self.asr.send_keepalive(self._silence):
+                    self.silence_frames += 1
+                    self.metrics.inc("asr_keepalive_silence_frames")
+            except (websockets.ConnectionClosed, ConnectionError):
+                pass  # 断线由接收循环处理
+            except Exception as e:
+                logger.warning("asr keepalive silence failed: %r", e)
+            await asyncio.sleep(self.config.silence_interval)
+
+    async def _ping_loop(self):
+        while True:
+            await self._wait_idle()
+            ws = self.asr.ws
+            if ws is not None and not self.asr.recovering:
+                await self._ping(ws)
+            await asyncio.sleep(self.config.ping_interval)
+
+    async def _ping(self, ws):
+        started = time.perf_counter()
+        try:
+            pong = await ws.ping()
+            await asyncio.wait_for(pong, self.config.ping_timeout)
+        except asyncio.TimeoutError:
+            self.ping_timeouts += 1
+            self.metrics.inc("asr_keepalive_ping_timeouts")
+            logger.warning("asr keepalive ping timed out after %gs", self.config.ping_timeout)
+            return
+        except (websockets.ConnectionClosed, ConnectionError):
+            return
+        except Exception as e:
+            # 例如复用连接的任务已经脱离连接；保活循环不能因此退出
+            logger.warning("asr keepalive ping failed: %r", e)
+            return
+        rtt = time.perf_counter() - started
+        self.pings += 1
+        self.last_rtt = rtt
+        alpha = self.config.rtt_smoothing
+        self.rtt = rtt if self.rtt is None else self.rtt + alpha * (rtt - self.rtt)
+        self.metrics.observe("asr_ping_rtt_seconds", rtt)
@@ -0,0 +1,150 @@
+import bisect
+import threading
+from typing import Dict, Tuple, Sequence, Optional
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+# 指标接收端接口，默认实现什么也不做。时长统一以秒为单位。
+class MetricsSink:
+    def observe(self, name: str, value: float, **labels: str):
+        pass
+
+    def set_gauge(self, name: str, value: float, **labels: str):
+        pass
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        pass
+
+
+NULL_METRICS = MetricsSink()
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        # 在桶内做线性插值，精度取决于桶的划分
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else min(self.min, self.buckets[0])
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                lower = max(lower, self.min)
+                upper = min(upper, self.max)
+                return lower + (upper - lower) * ((rank - seen) / n)
+            seen += n
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+
+class InProcessMetrics(MetricsSink):
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.gauges: Dict[Tuple[str, Labels], float] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, _labels(labels))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(self.buckets)
+            hist.observe(value)
+
+    def set_gauge(self, name: str, value: float, **labels: str):
+        self.gauges[(name, _labels(labels))] = value
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self.histograms.get((name, _labels(labels)))
+
+    def summary(self) -> Dict[str, Dict[str, Optional[float]]]:
+        result = {}
+        for (name, labels), hist in sorted(self.histograms.items()):
+            result[name + _format_labels(labels)] = {
+                "count": hist.count,
+                "mean": hist.mean,
+                "p50": hist.quantile(0.5),
+                "p99": hist.quantile(0.99),
+                "max": hist.max,
+            }
+        return result
+
+
+def prometheus_text(metrics: InProcessMetrics, prefix: str = "dashscope_realtime_") -> str:
+    lines = []
+    typed = set()
+
+    def declare(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(metrics.counters.items()):
+        full = prefix + name
+        declare(full, "counter")
+        lines.append(f"{full}{_format_labels(labels)} {_num(value)}")
+    for (name, labels), value in sorted(metrics.gauges.items()):
+        full = prefix + name
+        declare(full, "gauge")
+        lines.append(f"{full}{_format_labels(labels)} {_num(value)}")
+    for (name, labels), hist in sorted(metrics.histograms.items()):
+        full = prefix + name
+        declare(full, "histogram")
+        cumulative = 0
+        for bound, n in zip(hist.buckets + (float("inf"),), hist.counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else _num(bound)
+            lines.append(f"{full}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+        lines.append(f"{full}_sum{_format_labels(labels)} {_num(hist.sum)}")
+        lines.append(f"{full}_count{_format_labels(labels)} {hist.count}")
+    return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    inner = ",".join('%s="%s"' % (k, _escape(v)) for k, v in labels)
+    return "{" + inner + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
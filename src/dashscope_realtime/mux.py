@@ -0,0 +1,259 @@
+import asyncio
+from collections import deque
+from typing import Optional, Dict, Deque, List, Union
+
+import websockets
+
+from . import protocol
+from .config import DASHSCOPE_WS_URL, logger
+from .tasks import cancel_and_wait
+
+_TERMINAL_EVENTS = ("task-finished", "task-failed")
+
+
+# 二进制帧不携带 task_id，所以同一条连接上同一时刻只能有一个任务上传音频（ASR）、
+# 一个任务下载音频（TTS）。其余任务排队等待对应方向的租约，文本事件按 task_id 路由。
+# 服务端按任务顺序下发音频：被关闭但还没收到 task-finished 的下载任务（retiring）期间到达的音频帧
+# 都属于它，直接丢弃，因此 close() 后租约可以立即交给下一个任务（打断后马上开始新任务）。
+class MultiplexConnection:
+    def __init__(
+            self,
+            api_key: str,
+            url: str = DASHSCOPE_WS_URL,
+            max_pending_frames: int = 64,
+            close_timeout: float = 5.0,
+    ):
+        if max_pending_frames <= 0:
+            raise ValueError("max_pending_frames must be positive")
+        self.api_key = api_key
+        self.url = url
+        # 下载任务最多缓冲这么多帧（信用），用完后接收循环暂停读取连接，直到消费端取走音频：
+        # 反压传到 TCP 和服务端，不丢音频；文本事件在暂停期间同样排在后面
+        self.max_pending_frames = max_pending_frames
+        self.close_timeout = close_timeout  # close() 之后等待 task-finished 的上限，超时后不再把音频帧当作它的
+        self.stale_frames = 0
+        self.ws: Optional[websockets.WebSocketClientProtocol] = None
+
+        self._tasks: Dict[str, "MuxTask"] = {}
+        self._upload_lock = asyncio.Lock()
+        self._download_lock = asyncio.Lock()
+        self._downloader: Optional["MuxTask"] = None
+        self._retiring: List["MuxTask"] = []
+        self._connect_lock = asyncio.Lock()
+        self._receive_task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def active_tasks(self) -> int:
+        return len(self._tasks)
+
+    async def connect(self):
+        async with self._connect_lock:
+            if self.ws:
+                return
+            self.ws = await websockets.connect(
+                self.url,
+                additional_headers={"Authorization": f"Bearer {self.api_key}"}
+            )
+            self._receive_task = asyncio.create_task(self._receive_loop(self.ws))
+
+    async def close(self):
+        # 先取出连接：接收循环退出时会把 self.ws 置空
+        ws, self.ws = self.ws, None
+        receive, self._receive_task = self._receive_task, None
+        await cancel_and_wait(receive)
+        if ws:
+            await ws.close()
+        self._fail_all(None)
+
+    async def open_task(self, task_id: str, upload: bool = False, download: bool = False) -> "MuxTask":
+        await self.connect()
+        task = MuxTask(self, task_id, self.max_pending_frames)
+        self._tasks[task_id] = task
+        try:
+            if upload:
+                await self._upload_lock.acquire()
+                task._upload = True
+            if download:
+                await self._download_lock.acquire()
+                task._download = True
+                self._downloader = task
+        except BaseException:
+            task._closed = True
+            self._release(task)
+            raise
+        return task
+
+    def _release(self, task: "MuxTask"):
+        if task._upload:
+            task._upload = False
+            self._upload_lock.release()
+        if task._download:
+            task._download = False
+            if self._downloader is task:
+                self._downloader = None
+            self._download_lock.release()
+        if task._retiring:
+            return  # 等 task-finished 或超时后再注销
+        if task._close_timer is not None:
+            task._close_timer.cancel()
+            task._close_timer = None
+        if task in self._retiring:
+            self._retiring.remove(task)
+        if task._closed and self._tasks.get(task.task_id) is task:
+            del self._tasks[task.task_id]
+
+    async def _receive_loop(self, ws):
+        try:
+            async for message in ws:
+                if isinstance(message, bytes):
+                    if self._retiring:
+                        # 被关闭的下载任务还没结束，这是它剩余的音频
+                        self.stale_frames += 1
+                        continue
+                    task = self._downloader
+                    if task is not None:
+                        await task._feed_binary(message)
+                    continue
+                try:
+                    header = protocol.loads(message).get("header", {})
+                except protocol.DECODE_ERRORS:
+                    logger.warning("multiplexed connection got invalid JSON frame")
+                    continue
+                task = self._tasks.get(header.get("task_id"))
+                if task is None:
+                    continue
+                task._feed_text(message)
+                if header.get("event") in _TERMINAL_EVENTS:
+                    task._terminated = True
+                    task._retiring = False
+                    self._release(task)
+            self._fail_all(ConnectionError("multiplexed connection closed by server"))
+        except Exception as e:
+            self._fail_all(e)
+        finally:
+            if self.ws is ws:
+                self.ws = None
+
+    def _fail_all(self, error: Optional[Exception]):
+        for task in list(self._tasks.values()):
+            if error is not None:
+                task._fail(error)
+            task._closed = True
+            task._retiring = False
+            task._readable.set()
+            task._has_credit.set()
+            self._release(task)
+
+
+# 对 ASR / TTS 表现得像一个 websocket：send()、async for、close()
+class MuxTask:
+    def __init__(self, conn: MultiplexConnection, task_id: str, max_pending_frames: int):
+        self.task_id = task_id
+        self._conn = conn
+        self._messages: Deque[Union[str, bytes]] = deque()
+        self._readable = asyncio.Event()
+        self._max_pending_frames = max_pending_frames
+        self._pending_frames = 0
+        self._has_credit = asyncio.Event()
+        self._has_credit.set()
+        self._error: Optional[Exception] = None
+        self._upload = False
+        self._download = False
+        self._terminated = False
+        self._retiring = False
+        self._closed = False
+        self._started = False
+        self._close_timer: Optional[asyncio.TimerHandle] = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Union[str, bytes]:
+        while not self._messages:
+            if self._error is not None:
+                raise self._error
+            if self._closed:
+                raise StopAsyncIteration
+            self._readable.clear()
+            await self._readable.wait()
+        message = self._messages.popleft()
+        if isinstance(message, bytes):
+            self._pending_frames -= 1
+            self._has_credit.set()
+        return message
+
+    async def send(self, message: Union[str, bytes]):
+        if self._closed or self._conn.ws is None:
+            raise ConnectionError("multiplexed task %s is closed" % self.task_id)
+        if not isinstance(message, str) and not self._upload:
+            raise RuntimeError("task %s does not hold the upload channel" % self.task_id)
+        if isinstance(message, str):
+            self._started = True
+        await self._conn.ws.send(message)
+
+    async def ping(self):
+        return await self._conn.ws.ping()
+
+    async def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._drop_pending()
+        if self._started and not self._terminated and self._conn.ws is not None:
+            # 还没结束的任务先通知服务端结束，然后立即交出租约：finish-task 之后上传的音频属于下一个任务，
+            # 而它剩余的下载音频在收到 task-finished / task-failed 之前都会被接收循环丢弃；
+            # 服务端迟迟不结束时超时注销
+            try:
+                await self._conn.ws.send(protocol.finish_task(self.task_id))
+            except Exception:
+                pass
+            else:
+                if not self._terminated:
+                    self._retiring = True
+                    if self._download:
+                        self._conn._retiring.append(self)
+                    loop = asyncio.get_running_loop()
+                    self._close_timer = loop.call_later(self._conn.close_timeout, self._expire)
+        self._conn._release(self)
+
+    def _expire(self):
+        self._close_timer = None
+        logger.warning("multiplexed task %s did not finish within %gs after close, no longer treating "
+                       "downloaded audio as its", self.task_id, self._conn.close_timeout)
+        self._retiring = False
+        self._conn._release(self)
+
+    async def _feed_binary(self, message: bytes):
+        # 信用用完时在这里等待，接收循环随之暂停读取连接
+        while self._pending_frames >= self._max_pending_frames and not self._closed:
+            self._has_credit.clear()
+            await self._has_credit.wait()
+        if self._closed:
+            return
+        self._pending_frames += 1
+        self._messages.append(message)
+        self._readable.set()
+
+    def _feed_text(self, message: str):
+        if self._closed:
+            return
+        self._messages.append(message)
+        self._readable.set()
+
+    def _drop_pending(self):
+        self._messages.clear()
+        self._pending_frames = 0
+        self._readable.set()
+        self._has_credit.set()
+
+    def _fail(self, error: Exception):
+        if self._error is None and not self._closed:
+            self._error = error
+        self._readable.set()
@@ -0,0 +1,235 @@
+import asyncio
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Callable, Deque, List, Optional, Union
+
+from .metrics import MetricsSink, NULL_METRICS
+from .tasks import TaskGroup
+from .tts import DashScopeRealtimeTTS
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    lanes: int = 2  # 同时合成的段数，每条 lane 是一个独立的 TTS 连接
+    max_ahead: int = 8  # 最多提前合成多少段
+
+
+class Segment:
+    QUEUED = "queued"
+    SYNTHESIZING = "synthesizing"
+    PLAYING = "playing"
+    DONE = "done"
+    CANCELLED = "cancelled"
+
+    def __init__(self, segment_id: int, source: Union[str, AsyncIterable[bytes]]):
+        self.id = segment_id
+        self.text = source if isinstance(source, str) else None
+        self.state = Segment.QUEUED
+        self.submitted_at = time.perf_counter()
+        self.first_audio_at: Optional[float] = None
+        self.gap: Optional[float] = None  # 与上一段之间可听到的静音（秒），不是紧接着上一段提交的为 None
+        self._source = None if isinstance(source, str) else source
+        self._audio: Deque[Optional[bytes]] = deque()
+        self._readable = asyncio.Event()
+        self._synthesis: Optional[asyncio.Task] = None
+        self._ahead = False
+        self._lane: Optional[DashScopeRealtimeTTS] = None
+        self._done = asyncio.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.state == Segment.CANCELLED
+
+    def cancel(self):
+        # 排队中的直接跳过，合成中的停止合成，播放中的在下一块之前停下
+        if self.state in (Segment.DONE, Segment.CANCELLED):
+            return
+        self.state = Segment.CANCELLED
+        if self._synthesis is not None:
+            self._synthesis.cancel()
+        self._end()
+
+    async def wait(self):
+        await self._done.wait()
+
+    def _put(self, chunk: Optional[bytes]):
+        self._audio.append(chunk)
+        self._readable.set()
+
+    def _end(self):
+        self._put(None)
+        self._done.set()
+
+    async def _chunks(self) -> AsyncIterator[bytes]:
+        while not self.cancelled:
+            if not self._audio:
+                self._readable.clear()
+                await self._readable.wait()
+                continue
+            chunk = self._audio.popleft()
+            if chunk is None:
+                return
+            yield chunk
+
+
+# 多段播报流水线：后面的文本在前面的音频还在输出时就分配到空闲的 lane 上开始合成，
+# 输出严格按提交顺序；每段都可以单独取消。衔接处的静音按播放时钟估算并记录
+class TTSPipeline:
+    def __init__(
+            self,
+            lanes: List[DashScopeRealtimeTTS],
+            config: PipelineConfig = PipelineConfig(),
+            send_audio: Optional[Callable[[bytes], None]] = None,
+            metrics: Optional[MetricsSink] = None,
+    ):
+        if not lanes:
+            raise ValueError("pipeline needs at least one TTS lane")
+        self.lanes = lanes
+        self.config = config
+        self.send_audio = send_audio
+        self.metrics = metrics or NULL_METRICS
+        self.tasks = TaskGroup("pipeline")
+        self.last_gap: Optional[float] = None
+        fmt = lanes[0].output_format
+        self._bytes_per_second = fmt.sample_rate * fmt.sample_bytes
+        self._ids = itertools.count()
+        self._segments: Deque[Segment] = deque()  # 已提交、还没播完的段，按提交顺序
+        self._pending: "asyncio.Queue[Segment]" = asyncio.Queue()
+        self._ahead = asyncio.Semaphore(config.max_ahead)
+        self._idle_lanes: "asyncio.Queue[DashScopeRealtimeTTS]" = asyncio.Queue()
+        self._has_segments = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._play_clock = 0.0  # 已交出的音频按实时播放预计结束的时刻
+        self._gap_pending: Optional[Segment] = None
+        self._started = False
+        for lane in lanes:
+            lane.send_audio = self._emit
+            self._idle_lanes.put_nowait(lane)
+
+    @property
+    def playing(self) -> bool:
+        return bool(self._segments)
+
+    async def start(self):
+        if self._started:
+            return
+        self._started = True
+        await asyncio.gather(*(lane.connect() for lane in self.lanes))
+        self.tasks.spawn(self._schedule())
+        self.tasks.spawn(self._play())
+
+    def submit(self, source: Union[str, AsyncIterable[bytes]]) -> Segment:
+        # 文本交给 lane 合成；也可以直接提交已有的音频（缓存、预合成），同样按顺序播放
+        segment = Segment(next(self._ids), source)
+        self._segments.append(segment)
+        self._pending.put_nowait(segment)
+        self._drained.clear()
+        self._has_segments.set()
+        return segment
+
+    async def drain(self):
+        # 等所有已提交的段播完（或被取消）
+        await self._drained.wait()
+
+    async def interrupt(self):
+        segments = list(self._segments)
+        for segment in segments:
+            segment.cancel()
+        # 取消的合成会在 lane 上 interrupt，等它们结束再接受新的段
+        await asyncio.gather(*(s._synthesis for s in segments if s._synthesis), return_exceptions=True)
+
+    async def close(self):
+        for segment in list(self._segments):
+            segment.cancel()
+        await self.tasks.cancel()
+        await asyncio.gather(*(lane.disconnect() for lane in self.lanes), return_exceptions=True)
+        self._started = False
+
+    async def _schedule(self):
+        while True:
+            segment = await self._pending.get()
+            if segment.cancelled:
+                continue
+            if segment._source is not None:
+                # 现成的音频不占用 lane
+                segment._synthesis = self.tasks.spawn(self._copy(segment))
+                continue
+            # 已合成但还没播完的段不超过 max_ahead，播放端跟不上时不再继续往前合成
+            await self._ahead.acquire()
+            segment._ahead = True
+            lane = await self._idle_lanes.get()
+            if segment.cancelled:
+                self._idle_lanes.put_nowait(lane)
+                self._release_ahead(segment)
+                continue
+            segment._lane = lane
+            segment.state = Segment.SYNTHESIZING
+            segment._synthesis = self.tasks.spawn(self._synthesize(segment, lane))
+
+    async def _synthesize(self, segment: Segment, lane: DashScopeRealtimeTTS):
+        try:
+            async for chunk in lane.stream(segment.text):
+                segment._put(chunk)
+        finally:
+            segment._put(None)
+            self._idle_lanes.put_nowait(lane)
+
+    async def _copy(self, segment: Segment):
+        try:
+            async for chunk in segment._source:
+                segment._put(chunk)
+        finally:
+            segment._put(None)
+
+    async def _play(self):
+        while True:
+            if not self._segments:
+                self._has_segments.clear()
+                self._drained.set()
+                await self._has_segments.wait()
+                continue
+            segment = self._segments[0]
+            if not segment.cancelled:
+                if segment.state == Segment.QUEUED and segment._source is None:
+                    segment.state = Segment.SYNTHESIZING
+                self._gap_pending = segment
+                lane = segment._lane or self.lanes[0]
+                try:
+                    await lane.play(self._playing(segment))
+                except Exception as e:
+                    if lane.on_error:
+                        lane.on_error(e)
+                if not segment.cancelled:
+                    segment.state = Segment.DONE
+                    segment._done.set()
+            self._segments.popleft()
+            self._release_ahead(segment)
+
+    def _release_ahead(self, segment: Segment):
+        if segment._ahead:
+            segment._ahead = False
+            self._ahead.release()
+
+    async def _playing(self, segment: Segment) -> AsyncIterator[bytes]:
+        async for chunk in segment._chunks():
+            segment.state = Segment.PLAYING
+            yield chunk
+
+    async def _emit(self, chunk: bytes):
+        now = time.perf_counter()
+        segment, self._gap_pending = self._gap_pending, None
+        if segment is not None:
+            segment.first_audio_at = now
+            # 只统计上一段还在播放时就已经提交的段，空闲后的第一段不算衔接
+            if segment.submitted_at < self._play_clock:
+                segment.gap = max(0.0, now - self._play_clock)
+                self.last_gap = segment.gap
+                self.metrics.observe("tts_segment_gap_seconds", segment.gap)
+        self._play_clock = max(self._play_clock, now) + len(chunk) / self._bytes_per_second
+        if self.send_audio:
+            result = self.send_audio(chunk)
+            if asyncio.iscoroutine(result):
+                await result
@@ -0,0 +1,243 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional, Deque, Set, Tuple
+
+import websockets
+from websockets.protocol import State
+
+from .config import DASHSCOPE_WS_URL, logger
+
+
+class PoolClosedError(RuntimeError):
+    pass
+
+
+# 预热的 WebSocket 连接池。run-task 中携带了完整的模型配置，
+# 所以同一个 (url, api_key) 下的连接可以被不同配置的 ASR / TTS 共用。
+class SessionPool:
+    def __init__(
+            self,
+            api_key: str,
+            url: str = DASHSCOPE_WS_URL,
+            min_size: int = 1,
+            max_size: int = 8,
+            idle_timeout: float = 60.0,
+            health_check_interval: float = 15.0,
+            ping_timeout: float = 5.0,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("invalid pool size: min_size=%r max_size=%r" % (min_size, max_size))
+        self.api_key = api_key
+        self.url = url
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.ping_timeout = ping_timeout
+
+        self._idle: Deque[Tuple[object, float]] = deque()
+        self._in_use: Set[object] = set()
+        self._connecting = 0
+        self._warming = 0  # _fill 正在预热的连接数
+        self._warm_waiters = 0
+        self._cond = asyncio.Condition()
+        self._maintain_task: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
+        self._fills: Set[asyncio.Task] = set()  # 后台预热任务，close() 时取消
+        self._closed = False
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def size(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._connecting
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    @property
+    def in_use(self) -> int:
+        return len(self._in_use)
+
+    async def start(self):
+        self._ensure_maintenance()
+        await self._fill()
+
+    async def acquire(self, timeout: Optional[float] = None):
+        if timeout is None:
+            return await self._acquire()
+        return await asyncio.wait_for(self._acquire(), timeout)
+
+    def release(self, ws):
+        self._in_use.discard(ws)
+        if self._closed or not _is_open(ws):
+            self._spawn(_close_quietly(ws))
+        else:
+            self._idle.append((ws, time.monotonic()))
+        self._spawn(self._notify())
+
+    def discard(self, ws):
+        self._in_use.discard(ws)
+        self._spawn(_close_quietly(ws))
+        self._spawn(self._notify())
+        if not self._closed:
+            self._spawn_fill(self._fill())
+
+    async def close(self):
+        self._closed = True
+        if self._maintain_task:
+            self._maintain_task.cancel()
+            try:
+                await self._maintain_task
+            except asyncio.CancelledError:
+                pass
+            self._maintain_task = None
+        for task in list(self._fills):
+            task.cancel()
+        # 借出中的连接也一并关闭，使用方随后会收到 ConnectionClosed
+        sockets = [ws for ws, _ in self._idle] + list(self._in_use)
+        self._idle.clear()
+        self._in_use.clear()
+        await asyncio.gather(*(_close_quietly(ws) for ws in sockets))
+        current = asyncio.current_task()
+        await asyncio.gather(*(t for t in list(self._background) if t is not current), return_exceptions=True)
+        await self._notify()
+
+    async def _acquire(self):
+        self._ensure_maintenance()
+        while True:
+            if self._closed:
+                raise PoolClosedError("session pool is closed")
+            while self._idle:
+                ws, _ = self._idle.popleft()
+                if _is_open(ws):
+                    self._in_use.add(ws)
+                    # 被取走一个后在后台补齐预热连接
+                    self._spawn_fill(self._fill())
+                    return ws
+                self._spawn(_close_quietly(ws))
+            if self._warming > self._warm_waiters:
+                # 预热中的连接很快就绪，等它比另建一条更快（preconnect 之后的第一次 acquire）
+                self._warm_waiters += 1
+                try:
+                    async with self._cond:
+                        await self._cond.wait()
+                finally:
+                    self._warm_waiters -= 1
+                continue
+            if self.size < self.max_size:
+                self._connecting += 1
+                try:
+                    ws = await self._open()
+                finally:
+                    self._connecting -= 1
+                self._in_use.add(ws)
+                return ws
+            async with self._cond:
+                await self._cond.wait()
+
+    async def _open(self):
+        return await websockets.connect(
+            self.url,
+            additional_headers={"Authorization": f"Bearer {self.api_key}"}
+        )
+
+    async def _fill(self):
+        missing = min(self.min_size - len(self._idle) - self._connecting, self.max_size - self.size)
+        if missing <= 0 or self._closed:
+            return
+        self._connecting += missing
+        self._warming += missing
+        try:
+            results = await asyncio.gather(*(self._open() for _ in range(missing)), return_exceptions=True)
+        finally:
+            self._connecting -= missing
+            self._warming -= missing
+        for result in results:
+            if isinstance(result, BaseException):
+                if not self._closed:
+                    logger.warning("session pool failed to open connection: %r", result)
+            elif self._closed:
+                await _close_quietly(result)
+            else:
+                self._idle.append((result, time.monotonic()))
+        await self._notify()
+
+    async def _notify(self):
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def _check_health(self):
+        now = time.monotonic()
+        candidates = list(self._idle)
+        alive = await asyncio.gather(*(self._ping(ws) for ws, _ in candidates))
+        keep = len(self._idle)
+        for (ws, released_at), ok in zip(candidates, alive):
+            if (ws, released_at) not in self._idle:
+                continue
+            expired = now - released_at > self.idle_timeout and keep > self.min_size
+            if not ok or expired:
+                self._idle.remove((ws, released_at))
+                keep -= 1
+                await _close_quietly(ws)
+        await self._fill()
+
+    async def _ping(self, ws) -> bool:
+        if not _is_open(ws):
+            return False
+        try:
+            pong = await ws.ping()
+            await asyncio.wait_for(pong, self.ping_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def _maintain(self):
+        while not self._closed:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                await self._check_health()
+            except Exception as e:
+                logger.warning("session pool health check failed: %r", e)
+
+    def _ensure_maintenance(self):
+        if self._maintain_task is None or self._maintain_task.done():
+            self._maintain_task = asyncio.create_task(self._maintain())
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def _spawn_fill(self, coro):
+        task = self._spawn(coro)
+        self._fills.add(task)
+        task.add_done_callback(self._fills.discard)
+
+
+def preconnect(api_key: str, url: str = DASHSCOPE_WS_URL, size: int = 1, **kwargs) -> SessionPool:
+    # 在应用初始化阶段（事件循环中）调用：立即返回连接池，DNS、TCP / TLS 和 WebSocket 握手在后台进行，
+    # 与应用其余的启动过程重叠；之后把连接池传给 ASR / TTS / RealtimeClient，第一次 acquire 会等预热的连接
+    kwargs.setdefault("max_size", max(size, 8))
+    pool = SessionPool(api_key, url, min_size=size, **kwargs)
+    pool._spawn_fill(pool.start())
+    return pool
+
+
+def _is_open(ws) -> bool:
+    return ws.state is State.OPEN
+
+
+async def _close_quietly(ws):
+    try:
+        await ws.close()
+    except Exception:
+        pass
@@ -0,0 +1,81 @@
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# 控制帧的 JSON 文本模板：常量部分只序列化一次，发送时只拼接 task_id 和文本。
+# task_id 由 uuid4().hex 生成，不含需要转义的字符，可以直接拼接。
+_FINISH_HEAD = '{"header":{"action":"finish-task","task_id":"'
+_FINISH_TAIL = '","streaming":"duplex"},"payload":{"input":{}}}'
+_CONTINUE_HEAD = '{"header":{"action":"continue-task","task_id":"'
+_CONTINUE_MID = '","streaming":"duplex"},"payload":{"input":{"text":'
+_CONTINUE_TAIL = '}}}'
+_TASK_ID_SLOT = "\x00task_id\x00"
+
+
+def _stdlib_backend():
+    return json.loads, lambda s: json.dumps(s, ensure_ascii=False), (ValueError,)
+
+
+def _orjson_backend():
+    import orjson
+    dumps = orjson.dumps
+    return orjson.loads, lambda s: dumps(s).decode("utf-8"), (orjson.JSONDecodeError,)
+
+
+def _msgspec_backend():
+    import msgspec
+    encode = msgspec.json.encode
+    return msgspec.json.Decoder().decode, lambda s: encode(s).decode("utf-8"), (msgspec.DecodeError, ValueError)
+
+
+_BACKENDS: Dict[str, Callable[[], Tuple[Callable[[Any], Any], Callable[[str], str], tuple]]] = {
+    "orjson": _orjson_backend,
+    "msgspec": _msgspec_backend,
+    "json": _stdlib_backend,
+}
+
+backend = "json"
+loads, encode_str, DECODE_ERRORS = _stdlib_backend()
+
+
+def use_backend(name: Optional[str] = None) -> str:
+    # 不指定时按 orjson → msgspec → json 的顺序选第一个可用的实现
+    global backend, loads, encode_str, DECODE_ERRORS
+    for candidate in ([name] if name else list(_BACKENDS)):
+        factory = _BACKENDS.get(candidate)
+        if factory is None:
+            raise ValueError("unknown JSON backend %r" % candidate)
+        try:
+            loads, encode_str, DECODE_ERRORS = factory()
+        except ImportError:
+            if name:
+                raise
+            continue
+        backend = candidate
+        return backend
+    return backend
+
+
+use_backend()
+
+
+def finish_task(task_id: str) -> str:
+    return _FINISH_HEAD + task_id + _FINISH_TAIL
+
+
+def continue_task(task_id: str, text: str) -> str:
+    return _CONTINUE_HEAD + task_id + _CONTINUE_MID + encode_str(text) + _CONTINUE_TAIL
+
+
+# run-task 帧只有 task_id 会变，按配置序列化一次后切成前后两段
+class RunTaskTemplate:
+    __slots__ = ("_head", "_tail")
+
+    def __init__(self, payload: dict):
+        text = json.dumps({
+            "header": {"action": "run-task", "task_id": _TASK_ID_SLOT, "streaming": "duplex"},
+            "payload": payload,
+        }, separators=(",", ":"), ensure_ascii=False)
+        self._head, self._tail = text.split(json.dumps(_TASK_ID_SLOT)[1:-1], 1)
+
+    def render(self, task_id: str) -> str:
+        return self._head + task_id + self._tail
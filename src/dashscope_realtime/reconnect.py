@@ -0,0 +1,72 @@
+import random
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Iterator, List, Tuple
+
+
+@dataclass(frozen=True)
+class ReconnectPolicy:
+    max_attempts: int = 8
+    base_delay: float = 0.2  # 第 n 次重试的退避上限为 base_delay * 2^n
+    max_delay: float = 5.0
+    replay_ms: int = 30000  # 最多保留多少毫秒未确认的音频用于重放
+
+    def delays(self) -> Iterator[float]:
+        # full jitter：在 [0, 上限] 之间均匀取值，避免大量会话同时断线后一起重连
+        for attempt in range(self.max_attempts):
+            yield random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+# 已发送但服务端尚未确认（还没出现在句末结果里）的音频，按流内的绝对字节偏移记录。
+# 起点始终对齐到 align 字节（一帧采样），重放不会从半个采样开始
+class ReplayBuffer:
+    def __init__(self, max_bytes: int, align: int = 1):
+        self.max_bytes = max_bytes
+        self.align = align
+        self._chunks: Deque[Tuple[int, bytes]] = deque()
+        self._start = 0
+        self._end = 0
+
+    @property
+    def start(self) -> int:
+        return self._start
+
+    @property
+    def end(self) -> int:
+        return self._end
+
+    @property
+    def nbytes(self) -> int:
+        return self._end - self._start
+
+    def append(self, data: bytes):
+        self._chunks.append((self._end, data))
+        self._end += len(data)
+        trimmed = False
+        while self._chunks and self._end - self._chunks[0][0] > self.max_bytes:
+            offset, chunk = self._chunks.popleft()
+            self._start = offset + len(chunk)
+            trimmed = True
+        if trimmed and self._start % self.align:
+            # 丢弃整块后起点可能落在采样中间，把下一块开头的残余字节也丢掉
+            self._trim(min(self._start + self.align - self._start % self.align, self._end))
+
+    def ack(self, offset: int):
+        # 服务端已经给出句末结果的音频不需要再重放
+        self._trim(min(offset - offset % self.align, self._end))
+
+    def _trim(self, offset: int):
+        chunks = self._chunks
+        while chunks and chunks[0][0] + len(chunks[0][1]) <= offset:
+            chunks.popleft()
+        if chunks and chunks[0][0] < offset:
+            first, chunk = chunks[0]
+            chunks[0] = (offset, chunk[offset - first:])
+        self._start = max(self._start, offset)
+
+    def chunks_from(self, offset: int) -> List[Tuple[int, bytes]]:
+        return [(o, c) for o, c in self._chunks if o >= offset]
+
+    def clear(self):
+        self._chunks.clear()
+        self._start = self._end = 0
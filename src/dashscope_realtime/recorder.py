@@ -0,0 +1,304 @@
+import asyncio
+import concurrent.futures
+import os
+import queue
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from .audio import AudioFormat
+from .config import logger
+from .metrics import MetricsSink, NULL_METRICS
+
+try:
+    import soundfile
+except ImportError:  # soundfile 是可选依赖，只有需要压缩编码时才用到
+    soundfile = None
+
+_WAV_CODES = {"s16le": 1, "f32le": 3, "alaw": 6, "mulaw": 7}
+_ENCODINGS = {"flac": ("FLAC", "PCM_16", ".flac"), "opus": ("OGG", "OPUS", ".opus")}
+
+_OPEN, _WRITE, _CLOSE, _STOP = range(4)
+
+
+@dataclass(frozen=True)
+class RecorderConfig:
+    directory: str = "."
+    max_pending_bytes: int = 16 * 1024 * 1024  # 写盘跟不上时排队的上限，超出的音频块直接丢弃并计数
+    preallocate_bytes: int = 4 * 1024 * 1024  # 每次预分配的磁盘空间，减少追加写时的元数据更新
+    fsync: bool = True  # 关闭文件前落盘
+    encode: Optional[str] = None  # 关闭后转码成 "flac" / "opus"，需要 soundfile；转码成功后删除 WAV
+
+
+def _wav_header(fmt: AudioFormat, data_bytes: int) -> bytes:
+    block = fmt.sample_bytes
+    code = _WAV_CODES[fmt.encoding]
+    fmt_chunk = struct.pack("<HHIIHH", code, fmt.channels, fmt.sample_rate, fmt.sample_rate * block, block,
+                            block // fmt.channels * 8)
+    fact = b""
+    if code != 1:
+        # 非 PCM 编码（float / A-law / μ-law）的 fmt 块带 cbSize，并且需要 fact 块记录采样帧数
+        fmt_chunk += struct.pack("<H", 0)
+        fact = struct.pack("<4sII", b"fact", 4, data_bytes // block)
+    head = 4 + 8 + len(fmt_chunk) + len(fact) + 8
+    data_bytes = min(data_bytes, 0xFFFFFFFF - head)
+    return (struct.pack("<4sI4s4sI", b"RIFF", head + data_bytes, b"WAVE", b"fmt ", len(fmt_chunk)) + fmt_chunk
+            + fact + struct.pack("<4sI", b"data", data_bytes))
+
+
+class Track:
+    def __init__(self, recorder: "Recorder", name: str, path: str, fmt: Optional[AudioFormat]):
+        self.name = name
+        self.path = path
+        self.format = fmt  # None 表示原样写入、不加 WAV 头（例如 mp3 / opus 流）
+        self.frames = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self.error: Optional[Exception] = None
+        self._recorder = recorder
+        self._closing = False
+        self._closed: Optional[concurrent.futures.Future] = None
+        self._detach: List[Callable[[], None]] = []
+        self._fd: Optional[int] = None
+        self._header = len(_wav_header(fmt, 0)) if fmt is not None else 0
+        self._allocated = 0
+
+    def write(self, chunk: Union[bytes, bytearray, memoryview]):
+        # 作为 tap 使用：只入队，不阻塞事件循环
+        self._recorder._enqueue(self, chunk)
+
+    __call__ = write
+
+    async def close(self) -> str:
+        # 摘掉 tap、写完剩余数据并修正 WAV 头，返回最终的文件路径
+        if self._closed is None:
+            self._closing = True
+            for detach in self._detach:
+                detach()
+            self._detach.clear()
+            self._closed = concurrent.futures.Future()
+            self._recorder._queue.put((_CLOSE, self, self._closed, 0.0))
+        return await asyncio.wrap_future(self._closed)
+
+
+# 会话录音：ASR 输入和 TTS 输出通过 tap 交给 Recorder，由后台线程攒批写盘。
+# 事件循环上只做一次入队；写盘跟不上时丢弃并计数，不会反压到实时链路
+class Recorder:
+    def __init__(self, config: RecorderConfig = RecorderConfig(), metrics: Optional[MetricsSink] = None):
+        if config.encode is not None:
+            if config.encode not in _ENCODINGS:
+                raise ValueError("unsupported encoding %r, expected one of %s" % (config.encode, sorted(_ENCODINGS)))
+            if soundfile is None:
+                raise ImportError("recording encode requires soundfile: pip install 'dashscope-realtime[record]'")
+        self.config = config
+        self.metrics = metrics or NULL_METRICS
+        self.tracks: Dict[str, Track] = {}
+        self.lag = 0.0  # 最近一批数据从入队到写盘的耗时（秒）
+        self._queue: "queue.SimpleQueue[Tuple[int, Optional[Track], object, float]]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._pending_bytes = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def dropped(self) -> int:
+        return sum(track.dropped for track in self.tracks.values())
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._pending_bytes
+
+    def track(self, name: str, fmt: Optional[AudioFormat] = None) -> Track:
+        if name in self.tracks:
+            raise ValueError("track %r already exists" % name)
+        path = os.path.join(self.config.directory, name + (".wav" if fmt is not None else ".raw"))
+        track = self.tracks[name] = Track(self, name, path, fmt)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="dashscope-recorder", daemon=True)
+            self._thread.start()
+        self._queue.put((_OPEN, track, None, 0.0))
+        return track
+
+    def tap_asr(self, asr, name: str) -> Track:
+        # 录的是发给服务端的音频（input_format 转换之后）
+        fmt = AudioFormat(asr.config.sample_rate) if asr.config.format in ("pcm", "wav") else None
+        track = self.track(name, fmt)
+        self._attach(track, asr)
+        return track
+
+    def tap_tts(self, tts, name: str, track: Optional[Track] = None) -> Track:
+        # 录的是交给 send_audio 的音频（output_format 转换之后）；多个 TTS 可以写同一个 track
+        if track is None:
+            fmt = tts.output_format if tts.config.audio_format == "pcm" else None
+            track = self.track(name, fmt)
+        self._attach(track, tts)
+        return track
+
+    def record(self, client, session: str) -> Tuple[Track, Track]:
+        # 录下一个 RealtimeClient 的用户输入和全部播报（包括预合成和流水线的连接）
+        inbound = self.tap_asr(client.asr, session + ".input")
+        lanes = client.pipeline.lanes if client.pipeline else [client.tts]
+        outbound = None
+        for tts in lanes + ([client.spec_tts] if client.spec_tts else []):
+            outbound = self.tap_tts(tts, session + ".output", outbound)
+        return inbound, outbound
+
+    async def close(self):
+        # 某个 track 写盘失败也要先关完其余的 track、停掉写盘线程，最后再抛出第一个错误
+        results = await asyncio.gather(*(track.close() for track in list(self.tracks.values())),
+                                       return_exceptions=True)
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put((_STOP, None, None, 0.0))
+            await asyncio.get_running_loop().run_in_executor(None, thread.join)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    def _attach(self, track: Track, source):
+        source.add_tap(track.write)
+        track._detach.append(lambda: source.remove_tap(track.write))
+
+    def _enqueue(self, track: Track, chunk: Union[bytes, bytearray, memoryview]):
+        if track._closing or track.error is not None:
+            return
+        size = len(chunk)
+        with self._lock:
+            accepted = self._pending_bytes + size <= self.config.max_pending_bytes
+            if accepted:
+                self._pending_bytes += size
+            else:
+                # 写盘线程也会更新 dropped，统一在锁里改
+                track.dropped += 1
+        if not accepted:
+            self.metrics.inc("recorder_dropped_frames")
+            return
+        track.frames += 1
+        self._queue.put((_WRITE, track, bytes(chunk), time.monotonic()))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # 已经在队列里的全部取出，同一个文件的数据合并成一次写入
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            writes: Dict[Track, List[bytes]] = {}
+            oldest = None
+            stop = False
+            for op, track, payload, enqueued in batch:
+                if op == _WRITE:
+                    writes.setdefault(track, []).append(payload)
+                    if oldest is None:
+                        oldest = enqueued
+                    continue
+                self._flush(writes)
+                writes = {}
+                if op == _OPEN:
+                    self._open(track)
+                elif op == _CLOSE:
+                    self._finalize(track, payload)
+                else:
+                    stop = True
+            self._flush(writes)
+            if oldest is not None:
+                self.lag = time.monotonic() - oldest
+                self.metrics.set_gauge("recorder_lag_seconds", self.lag)
+                self.metrics.set_gauge("recorder_pending_bytes", self._pending_bytes)
+            if stop:
+                return
+
+    def _open(self, track: Track):
+        try:
+            os.makedirs(os.path.dirname(track.path) or ".", exist_ok=True)
+            track._fd = os.open(track.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            if track.format is not None:
+                # 先写占位的头，关闭时再填上真实长度
+                self._write_all(track._fd, _wav_header(track.format, 0))
+        except OSError as e:
+            self._fail(track, e)
+
+    def _flush(self, writes: Dict[Track, List[bytes]]):
+        for track, chunks in writes.items():
+            data = b"".join(chunks)
+            with self._lock:
+                self._pending_bytes -= len(data)
+                if track._fd is None:
+                    track.dropped += len(chunks)
+                    continue
+            try:
+                self._reserve(track, track._header + track.bytes_written + len(data))
+                self._write_all(track._fd, data)
+                track.bytes_written += len(data)
+            except OSError as e:
+                with self._lock:
+                    track.dropped += len(chunks)
+                self._fail(track, e)
+
+    def _reserve(self, track: Track, end: int):
+        if end <= track._allocated or not self.config.preallocate_bytes or not hasattr(os, "posix_fallocate"):
+            return
+        size = end + self.config.preallocate_bytes
+        try:
+            os.posix_fallocate(track._fd, track._allocated, size - track._allocated)
+            track._allocated = size
+        except OSError:
+            # 有的文件系统不支持，之后不再尝试
+            track._allocated = float("inf")
+
+    def _finalize(self, track: Track, done: concurrent.futures.Future):
+        try:
+            if track._fd is not None:
+                fd, track._fd = track._fd, None
+                try:
+                    # 截掉预分配但没用到的部分并修正 WAV 头
+                    os.ftruncate(fd, track._header + track.bytes_written)
+                    if track.format is not None:
+                        os.lseek(fd, 0, os.SEEK_SET)
+                        self._write_all(fd, _wav_header(track.format, track.bytes_written))
+                    if self.config.fsync:
+                        os.fsync(fd)
+                finally:
+                    os.close(fd)
+                if self.config.encode is not None and track.format is not None and track.bytes_written:
+                    self._encode(track)
+        except OSError as e:
+            self._fail(track, e)
+        if track.error is not None:
+            done.set_exception(track.error)
+        else:
+            done.set_result(track.path)
+
+    def _encode(self, track: Track):
+        container, subtype, suffix = _ENCODINGS[self.config.encode]
+        target = os.path.splitext(track.path)[0] + suffix
+        try:
+            with soundfile.SoundFile(track.path) as src, soundfile.SoundFile(
+                    target, "w", src.samplerate, src.channels, subtype, format=container) as dst:
+                for block in src.blocks(blocksize=65536, dtype="float32"):
+                    dst.write(block)
+        except Exception as e:
+            # 例如 Opus 不支持 22050Hz；保留 WAV
+            logger.warning("failed to encode %s as %s, keeping WAV: %r", track.path, self.config.encode, e)
+            if os.path.exists(target):
+                os.remove(target)
+            return
+        os.remove(track.path)
+        track.path = target
+
+    def _fail(self, track: Track, error: Exception):
+        if track.error is None:
+            track.error = error
+            logger.warning("recording %s failed: %r", track.path, error)
+        if track._fd is not None:
+            fd, track._fd = track._fd, None
+            os.close(fd)
+
+    @staticmethod
+    def _write_all(fd: int, data: bytes):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
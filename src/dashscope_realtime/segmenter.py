@@ -0,0 +1,106 @@
+import asyncio
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Optional
+
+# 中文标点后可以直接切分；英文标点后面必须跟空白才算边界（避免切开 3.14、e.g.、1,000、3:00）
+_CJK_STRONG = "。！？；…\n"
+_LATIN_STRONG = ".!?;"
+_WEAK = "，、：）)"
+_LATIN_WEAK = ",:"
+_CLOSERS = "”’\"')】》」』"
+_END = object()
+
+
+@dataclass(frozen=True)
+class SegmenterConfig:
+    min_chars: int = 12  # 在逗号等弱边界切分所需的最小长度
+    first_min_chars: int = 4  # 第一段更早切出，尽快拿到首包音频
+    max_chars: int = 120
+    max_wait: float = 0.4  # 缓冲区里最老的文本最多等待的秒数
+
+
+async def segment_text(
+        tokens: AsyncIterable[str],
+        config: SegmenterConfig = SegmenterConfig(),
+) -> AsyncIterator[str]:
+    queue: asyncio.Queue = asyncio.Queue()
+    pump = asyncio.create_task(_pump(tokens, queue))
+    loop = asyncio.get_running_loop()
+    buf = ""
+    deadline: Optional[float] = None
+    first = True
+    try:
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                token = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                # 上游停顿太久，把已有文本先送出去
+                segment, buf = buf.strip(), ""
+                deadline = None
+                if segment:
+                    first = False
+                    yield segment
+                continue
+            if token is _END:
+                break
+            if isinstance(token, BaseException):
+                raise token
+            if not token:
+                continue
+            buf += token
+            if deadline is None:
+                deadline = loop.time() + config.max_wait
+            while True:
+                cut = _find_cut(buf, config.first_min_chars if first else config.min_chars, config.max_chars)
+                if not cut:
+                    break
+                segment, buf = buf[:cut].strip(), buf[cut:]
+                if segment:
+                    first = False
+                    yield segment
+                deadline = loop.time() + config.max_wait if buf.strip() else None
+        segment = buf.strip()
+        if segment:
+            yield segment
+    finally:
+        pump.cancel()
+
+
+async def _pump(tokens: AsyncIterable[str], queue: asyncio.Queue):
+    try:
+        async for token in tokens:
+            queue.put_nowait(token)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        queue.put_nowait(e)
+        return
+    queue.put_nowait(_END)
+
+
+def _find_cut(buf: str, min_chars: int, max_chars: int) -> int:
+    weak = 0
+    for i, ch in enumerate(buf):
+        if ch in _CJK_STRONG:
+            return _skip_closers(buf, i + 1)
+        if ch in _LATIN_STRONG and i + 1 < len(buf) and buf[i + 1].isspace():
+            return _skip_closers(buf, i + 1)
+        if i + 1 >= min_chars and not weak:
+            if ch in _WEAK or (ch in _LATIN_WEAK and i + 1 < len(buf) and buf[i + 1].isspace()):
+                weak = i + 1
+        if i + 1 >= max_chars:
+            break
+    if weak:
+        return weak
+    if len(buf) >= max_chars:
+        # 没有标点时尽量在空白处切开，避免截断英文单词
+        space = buf.rfind(" ", 0, max_chars)
+        return space + 1 if space > 0 else max_chars
+    return 0
+
+
+def _skip_closers(buf: str, pos: int) -> int:
+    while pos < len(buf) and buf[pos] in _CLOSERS:
+        pos += 1
+    return pos
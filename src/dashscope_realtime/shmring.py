@@ -0,0 +1,235 @@
+import asyncio
+import os
+import struct
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Deque, Optional, Tuple
+
+# 单生产者 / 单消费者的共享内存环形缓冲区。
+# 布局：[0:8] 生产者写位置，[64:72] 消费者读位置（分开放在不同缓存行），数据区从 128 开始。
+# 两个位置都是单调递增的字节计数，只由各自的一方写入，因此不需要锁。
+# 每条消息：session(u32) kind(u8) length(u32) + payload，允许跨越环尾回绕。
+_POS = struct.Struct("<Q")
+_RECORD = struct.Struct("<IBI")
+_HEAD = 0
+_TAIL = 64
+_DATA = 128
+
+
+class ShmRing:
+    def __init__(self, capacity: int = 4 * 1024 * 1024, name: Optional[str] = None):
+        if name is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=_DATA + capacity)
+            self._shm.buf[:_DATA] = bytes(_DATA)
+            self._owner = True
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._owner = False
+        self.capacity = capacity
+        self._buf = self._shm.buf
+        # 门铃：消费者空闲时生产者往管道里写一个字节把它唤醒
+        self._bell_r, self._bell_w = os.pipe()
+        self._prepare_bell()
+
+    def __getstate__(self):
+        return {"name": self._shm.name, "capacity": self.capacity,
+                "bell": (_PickledFd(self._bell_r), _PickledFd(self._bell_w))}
+
+    def __setstate__(self, state):
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self.capacity = state["capacity"]
+        self._buf = self._shm.buf
+        self._bell_r, self._bell_w = (fd.detach() for fd in state["bell"])
+        self._prepare_bell()
+
+    def _prepare_bell(self):
+        os.set_blocking(self._bell_r, False)
+        os.set_blocking(self._bell_w, False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def used(self) -> int:
+        return _POS.unpack_from(self._buf, _HEAD)[0] - _POS.unpack_from(self._buf, _TAIL)[0]
+
+    def write(self, session: int, kind: int, payload: bytes = b"") -> bool:
+        size = _RECORD.size + len(payload)
+        if size > self.capacity:
+            raise ValueError("message of %d bytes does not fit in ring of %d bytes" % (size, self.capacity))
+        head = _POS.unpack_from(self._buf, _HEAD)[0]
+        tail = _POS.unpack_from(self._buf, _TAIL)[0]
+        if self.capacity - (head - tail) < size:
+            return False
+        pos = self._copy_in(head, _RECORD.pack(session, kind, len(payload)))
+        if payload:
+            self._copy_in(pos, payload)
+        # 数据写完后再推进写位置，消费者看到新位置时数据一定已经就绪
+        _POS.pack_into(self._buf, _HEAD, head + size)
+        # 发布之后重新读消费者位置：消费者可能在上面两次读取之间已经把环读空并睡下，
+        # 只看发布前读到的 tail 会漏按门铃
+        if _POS.unpack_from(self._buf, _TAIL)[0] == head:
+            self.ring()
+        return True
+
+    def read(self) -> Optional[Tuple[int, int, bytes]]:
+        head = _POS.unpack_from(self._buf, _HEAD)[0]
+        tail = _POS.unpack_from(self._buf, _TAIL)[0]
+        if head == tail:
+            return None
+        session, kind, length = _RECORD.unpack(self._copy_out(tail, _RECORD.size))
+        payload = self._copy_out(tail + _RECORD.size, length) if length else b""
+        _POS.pack_into(self._buf, _TAIL, tail + _RECORD.size + length)
+        return session, kind, payload
+
+    def ring(self):
+        try:
+            os.write(self._bell_w, b"\x01")
+        except BlockingIOError:
+            pass  # 管道已满说明消费者还没来得及处理，已经会被唤醒
+
+    def clear_bell(self):
+        try:
+            while os.read(self._bell_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    @property
+    def bell_fd(self) -> int:
+        return self._bell_r
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        for fd in (self._bell_r, self._bell_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _copy_in(self, pos: int, data: bytes) -> int:
+        offset = pos % self.capacity
+        first = min(len(data), self.capacity - offset)
+        self._buf[_DATA + offset:_DATA + offset + first] = data[:first]
+        if first < len(data):
+            self._buf[_DATA:_DATA + len(data) - first] = data[first:]
+        return pos + len(data)
+
+    def _copy_out(self, pos: int, length: int) -> bytes:
+        offset = pos % self.capacity
+        first = min(length, self.capacity - offset)
+        data = bytes(self._buf[_DATA + offset:_DATA + offset + first])
+        if first < length:
+            data += bytes(self._buf[_DATA:_DATA + length - first])
+        return data
+
+
+class _PickledFd:
+    # 通过 multiprocessing 的 DupFd 把管道 fd 传给子进程，只能在启动子进程时序列化
+    def __init__(self, fd: int):
+        from multiprocessing.reduction import DupFd
+        self._dup = DupFd(fd)
+
+    def detach(self) -> int:
+        return self._dup.detach()
+
+
+# 在事件循环里发送：环满时按顺序排队，定时重试，保证同一个环上的消息不乱序。
+# send() 会等到消息真正写入环（反压），send_nowait() 只排队
+class RingWriter:
+    def __init__(self, ring: ShmRing, retry_interval: float = 0.001):
+        self.ring = ring
+        self.retry_interval = retry_interval
+        self._pending: Deque[Tuple[int, int, bytes, Optional[asyncio.Future]]] = deque()
+        self._pending_bytes = 0
+        self._flusher: Optional[asyncio.Task] = None
+
+    @property
+    def backlog(self) -> int:
+        return len(self._pending)
+
+    @property
+    def backlog_bytes(self) -> int:
+        return self._pending_bytes
+
+    def send_nowait(self, session: int, kind: int, payload: bytes = b""):
+        if not self._pending and self.ring.write(session, kind, payload):
+            return
+        self._enqueue(session, kind, payload, None)
+
+    async def send(self, session: int, kind: int, payload: bytes = b""):
+        if not self._pending and self.ring.write(session, kind, payload):
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._enqueue(session, kind, payload, future)
+        await future
+
+    def _enqueue(self, session, kind, payload, future):
+        self._pending.append((session, kind, payload, future))
+        self._pending_bytes += len(payload)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        while self._pending:
+            session, kind, payload, future = self._pending[0]
+            if not self.ring.write(session, kind, payload):
+                await asyncio.sleep(self.retry_interval)
+                continue
+            self._pending.popleft()
+            self._pending_bytes -= len(payload)
+            if future is not None and not future.done():
+                future.set_result(None)
+
+    def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+        for _, _, _, future in self._pending:
+            if future is not None and not future.done():
+                future.cancel()
+        self._pending.clear()
+        self._pending_bytes = 0
+
+
+# 在事件循环里消费：门铃可读时把环里的消息读空；另外每隔 poll_interval 秒兜底查一次环，
+# 门铃万一丢失也不会一直睡下去（0 表示只靠门铃）
+class RingReader:
+    def __init__(self, ring: ShmRing, poll_interval: float = 0.1):
+        self.ring = ring
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(ring.bell_fd, self._on_bell)
+
+    def _on_bell(self):
+        self.ring.clear_bell()
+        self._wakeup.set()
+
+    async def get(self) -> Tuple[int, int, bytes]:
+        while True:
+            message = self.ring.read()
+            if message is not None:
+                return message
+            self._wakeup.clear()
+            # 清掉标志后再查一次，避免漏掉在两次检查之间写入并按过门铃的消息
+            message = self.ring.read()
+            if message is not None:
+                return message
+            if not self.poll_interval:
+                await self._wakeup.wait()
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def close(self):
+        self._loop.remove_reader(self.ring.bell_fd)
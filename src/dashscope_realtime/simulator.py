@@ -0,0 +1,299 @@
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Set
+
+import websockets
+
+from .config import logger
+
+
+@dataclass(frozen=True)
+class SimulatorConfig:
+    handshake_latency: float = 0.0  # 模拟 TLS 握手 + 网络往返（秒）
+    task_start_latency: float = 0.0  # run-task → task-started
+    result_latency: float = 0.0  # 识别结果相对音频的处理延迟
+    partial_ms: int = 200  # 每收到这么多毫秒音频产出一次中间结果
+    sentence_ms: int = 2000  # 每句话的音频时长
+    tts_bytes_per_char: int = 1764  # 22.05kHz 16bit 约 40ms/字
+    tts_chunk_bytes: int = 3528
+    tts_chunk_interval: float = 0.0  # 两块音频之间的间隔（秒）
+    tts_first_chunk_latency: float = 0.0
+    failure_rate: float = 0.0  # run-task 返回 task-failed 的概率
+    disconnect_rate: float = 0.0  # 任务进行中连接被断开的概率
+    endpointing: bool = False  # 按静音断句：全零音频视为静音，静音达到 max_sentence_silence 时输出句末
+    max_concurrent_tasks: int = 0  # 模拟 API Key 的并发配额，超出时 run-task 返回 task-failed；0 表示不限
+    idle_timeout: float = 0.0  # ASR 任务这么久没有有效音频时失败并断开；开启 heartbeat 时静音也算有效音频，0 表示不超时
+    seed: Optional[int] = None
+
+
+class _Task:
+    def __init__(self, task_id: str, kind: str, params: dict):
+        self.task_id = task_id
+        self.kind = kind
+        self.params = params
+        self.audio_bytes = 0
+        self.sentence_begin = 0
+        self.next_partial = 0
+        self.sentence_index = 0
+        self.speech_ms = 0
+        self.silence_ms = 0
+        self.synthesis: Optional[asyncio.Task] = None
+        self.watchdog: Optional[asyncio.Task] = None
+        self.last_audio_at = time.monotonic()
+        self.texts: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+
+
+# 本地 DashScope 协议模拟器：支持 ASR / TTS 的 run-task / continue-task / finish-task 双工流程，
+# 可配置延迟、分块大小以及故障注入，用于基准测试和回归测试。
+class DashScopeSimulator:
+    def __init__(self, config: SimulatorConfig = SimulatorConfig(), host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self.host = host
+        self.port = port
+        self.server = None
+        self.connections = 0
+        self.tasks_started = 0
+        self.tasks_failed = 0
+        self.tasks_throttled = 0
+        self.tasks_timed_out = 0
+        self._active: Set[_Task] = set()
+        self.audio_bytes_received = 0
+        self.audio_bytes_sent = 0
+        self._random = random.Random(config.seed)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def start(self) -> str:
+        self.server = await websockets.serve(
+            self._handler, self.host, self.port, process_request=self._process_request, max_size=None)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.url
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _process_request(self, connection, request):
+        if self.config.handshake_latency:
+            await asyncio.sleep(self.config.handshake_latency)
+
+    async def _handler(self, ws):
+        self.connections += 1
+        tasks: Dict[str, _Task] = {}
+        recognizing: Optional[_Task] = None
+        speaking = asyncio.Lock()  # 音频帧不带 task_id，同一连接上的 TTS 任务按顺序下发音频
+        pending = set()
+        try:
+            async for msg in ws:
+                if isinstance(msg, bytes):
+                    self.audio_bytes_received += len(msg)
+                    if recognizing is not None:
+                        await self._on_audio(ws, recognizing, msg)
+                    continue
+                data = json.loads(msg)
+                header = data.get("header", {})
+                task_id = header.get("task_id")
+                action = header.get("action")
+                payload = data.get("payload", {})
+
+                if action == "run-task":
+                    task = await self._run_task(ws, task_id, payload, speaking)
+                    if task is None:
+                        continue
+                    tasks[task_id] = task
+                    if task.kind == "asr":
+                        recognizing = task
+                elif action == "continue-task":
+                    task = tasks.get(task_id)
+                    if task is not None and task.kind == "tts":
+                        task.texts.put_nowait(payload.get("input", {}).get("text", ""))
+                elif action == "finish-task":
+                    task = tasks.pop(task_id, None)
+                    if task is None:
+                        continue
+                    if task is recognizing:
+                        recognizing = None
+                        if task.watchdog:
+                            task.watchdog.cancel()
+                        await self._finish_task(ws, task)
+                    else:
+                        # TTS 需要等剩余文本合成完，不阻塞同一连接上的其他任务
+                        pending.add(asyncio.create_task(self._finish_task(ws, task)))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for task in tasks.values():
+                self._active.discard(task)
+                if task.synthesis:
+                    task.synthesis.cancel()
+                if task.watchdog:
+                    task.watchdog.cancel()
+            for finishing in pending:
+                finishing.cancel()
+
+    async def _run_task(self, ws, task_id: str, payload: dict, speaking: asyncio.Lock) -> Optional[_Task]:
+        if self.config.task_start_latency:
+            await asyncio.sleep(self.config.task_start_latency)
+        if self._random.random() < self.config.failure_rate:
+            self.tasks_failed += 1
+            await self._send_event(ws, "task-failed", task_id, {"message": "simulated failure"})
+            return None
+        if self.config.max_concurrent_tasks and len(self._active) >= self.config.max_concurrent_tasks:
+            self.tasks_throttled += 1
+            await self._send_event(ws, "task-failed", task_id, {"message": "Throttling.RateQuota"})
+            return None
+        kind = payload.get("task", "asr")
+        task = _Task(task_id, kind, payload.get("parameters", {}))
+        self._active.add(task)
+        self.tasks_started += 1
+        await self._send_event(ws, "task-started", task_id)
+        if kind == "tts":
+            task.synthesis = asyncio.create_task(self._synthesize(ws, task, speaking))
+        elif self.config.idle_timeout:
+            task.watchdog = asyncio.create_task(self._watch_idle(ws, task))
+        if self._random.random() < self.config.disconnect_rate:
+            asyncio.create_task(self._drop_later(ws))
+        return task
+
+    async def _drop_later(self, ws):
+        await asyncio.sleep(self._random.uniform(0.05, 1.0))
+        logger.debug("simulator dropping connection")
+        await ws.close(1011, "simulated disconnect")
+
+    async def _watch_idle(self, ws, task: _Task):
+        while True:
+            remaining = task.last_audio_at + self.config.idle_timeout - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(remaining)
+        self.tasks_timed_out += 1
+        self._active.discard(task)
+        await self._send_event(ws, "task-failed", task.task_id, {"message": "idle timeout"})
+        await ws.close(1011, "idle timeout")
+
+    async def _on_audio(self, ws, task: _Task, frame: bytes):
+        task.audio_bytes += len(frame)
+        if self.config.idle_timeout and (task.params.get("heartbeat") or frame.count(0) != len(frame)):
+            task.last_audio_at = time.monotonic()
+        bytes_per_ms = task.params.get("sample_rate", 16000) * 2 / 1000
+        audio_ms = int(task.audio_bytes / bytes_per_ms)
+        if self.config.endpointing:
+            silent = frame.count(0) == len(frame)
+            await self._endpoint(ws, task, silent, audio_ms, int(len(frame) / bytes_per_ms))
+        elif audio_ms - task.sentence_begin >= self.config.sentence_ms:
+            while audio_ms - task.sentence_begin >= self.config.sentence_ms:
+                await self._send_sentence(ws, task, task.sentence_begin + self.config.sentence_ms, True)
+        elif audio_ms >= task.next_partial:
+            task.next_partial = audio_ms + self.config.partial_ms
+            await self._send_sentence(ws, task, audio_ms, False)
+
+    async def _endpoint(self, ws, task: _Task, silent: bool, audio_ms: int, frame_ms: int):
+        # 静音期间中间结果保持不变，和真实服务一样在静音足够长之后才断句
+        if silent:
+            task.silence_ms += frame_ms
+            if not task.speech_ms:
+                task.sentence_begin = task.next_partial = audio_ms
+                return
+            if task.silence_ms >= task.params.get("max_sentence_silence", 800):
+                await self._send_sentence(ws, task, audio_ms - task.silence_ms, True, task.speech_ms // 200)
+                task.sentence_begin = task.next_partial = audio_ms
+                task.speech_ms = 0
+                return
+        else:
+            task.speech_ms += frame_ms
+            task.silence_ms = 0
+        if audio_ms >= task.next_partial:
+            task.next_partial = audio_ms + self.config.partial_ms
+            await self._send_sentence(ws, task, audio_ms, False, task.speech_ms // 200)
+
+    async def _send_sentence(self, ws, task: _Task, end_ms: int, sentence_end: bool, chars: Optional[int] = None):
+        if self.config.result_latency:
+            await asyncio.sleep(self.config.result_latency)
+        chars = max(1, (end_ms - task.sentence_begin) // 200 if chars is None else chars)
+        words = []
+        for i in range(chars):
+            begin = task.sentence_begin + i * 200
+            words.append({"begin_time": begin, "end_time": begin + 200, "text": "语", "punctuation": ""})
+        sentence = {
+            "sentence_id": task.sentence_index,
+            "begin_time": task.sentence_begin,
+            "end_time": end_ms if sentence_end else None,
+            "text": "语" * chars + ("。" if sentence_end else ""),
+            "words": words,
+            "sentence_end": sentence_end,
+        }
+        await self._send_event(ws, "result-generated", task.task_id, {
+            "output": {"sentence": sentence},
+            "usage": {"duration": end_ms // 1000} if sentence_end else None,
+        })
+        if sentence_end:
+            task.sentence_begin = end_ms
+            task.next_partial = end_ms + self.config.partial_ms
+            task.sentence_index += 1
+
+    async def _synthesize(self, ws, task: _Task, speaking: asyncio.Lock):
+        config = self.config
+        text = await task.texts.get()
+        if text is None:
+            await self._send_event(ws, "task-finished", task.task_id)
+            return
+        # 前一个 TTS 任务的音频和 task-finished 都发完之后才轮到这个任务
+        async with speaking:
+            while text is not None:
+                if config.tts_first_chunk_latency:
+                    await asyncio.sleep(config.tts_first_chunk_latency)
+                remaining = len(text) * config.tts_bytes_per_char
+                while remaining > 0:
+                    size = min(remaining, config.tts_chunk_bytes)
+                    await ws.send(b"\x00" * size)
+                    self.audio_bytes_sent += size
+                    remaining -= size
+                    if config.tts_chunk_interval:
+                        await asyncio.sleep(config.tts_chunk_interval)
+                text = await task.texts.get()
+            await self._send_event(ws, "task-finished", task.task_id)
+
+    async def _finish_task(self, ws, task: _Task):
+        try:
+            await self._complete(ws, task)
+        finally:
+            self._active.discard(task)
+
+    async def _complete(self, ws, task: _Task):
+        if task.kind == "asr":
+            bytes_per_ms = task.params.get("sample_rate", 16000) * 2 / 1000
+            audio_ms = int(task.audio_bytes / bytes_per_ms)
+            if self.config.endpointing:
+                if task.speech_ms:
+                    await self._send_sentence(ws, task, audio_ms - task.silence_ms, True, task.speech_ms // 200)
+            elif audio_ms > task.sentence_begin:
+                await self._send_sentence(ws, task, audio_ms, True)
+        elif task.synthesis:
+            # 和真实服务一样，finish-task 之前已经提交的文本会全部合成完
+            task.texts.put_nowait(None)
+            try:
+                await task.synthesis  # 合成任务最后发出 task-finished
+            except websockets.ConnectionClosed:
+                pass
+            return
+        await self._send_event(ws, "task-finished", task.task_id)
+
+    async def _send_event(self, ws, event: str, task_id: str, payload: Optional[dict] = None):
+        await ws.send(json.dumps({
+            "header": {"event": event, "task_id": task_id, "attributes": {}},
+            "payload": payload or {},
+        }))
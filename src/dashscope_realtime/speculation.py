@@ -0,0 +1,142 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Optional
+
+from .cache import normalize_text
+from .metrics import MetricsSink, NULL_METRICS
+from .tasks import TaskGroup
+from .tts import DashScopeRealtimeTTS
+
+# 句末标点不影响是否命中：中间结果通常还没有句号
+_TRAILING = "。．.！!？?，,、；;：:…~～ "
+
+
+def _match_key(text: str) -> str:
+    return normalize_text(text).rstrip(_TRAILING)
+
+
+@dataclass(frozen=True)
+class SpeculationConfig:
+    stable_ms: int = 300  # 中间结果保持不变这么久才开始预合成
+    min_chars: int = 2  # 太短的回复不值得预合成
+
+
+class Speculation:
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.key = _match_key(reply)
+        self.started = time.perf_counter()
+        self.first_audio_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._audio: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        # 先产出已经缓冲的音频，之后边合成边产出
+        while True:
+            chunk = await self._audio.get()
+            if chunk is None:
+                return
+            yield chunk
+
+
+# 中间结果稳定后用回复函数算出回复并在单独的 TTS 任务上预合成、缓冲音频；
+# 句末结果的回复与预合成的一致时直接使用缓冲的音频，否则取消预合成
+class Speculator:
+    def __init__(
+            self,
+            tts: DashScopeRealtimeTTS,
+            respond: Callable[[str], Optional[str]],
+            config: SpeculationConfig = SpeculationConfig(),
+            metrics: Optional[MetricsSink] = None,
+    ):
+        self.tts = tts
+        self.respond = respond
+        self.config = config
+        self.metrics = metrics or NULL_METRICS
+        self.tasks = TaskGroup("speculation")
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        self._current: Optional[Speculation] = None
+        self._last_task: Optional[asyncio.Task] = None
+        self._candidate = ""
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def observe_partial(self, text: str):
+        if text == self._candidate:
+            return
+        self._candidate = text
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(self.config.stable_ms / 1000, self._start, text)
+
+    def commit(self, reply: Optional[str]) -> Optional[Speculation]:
+        # 句末调用；返回可以直接播放的预合成结果
+        self._reset_candidate()
+        spec, self._current = self._current, None
+        if spec is None:
+            return None
+        task = spec.task
+        failed = task.done() and (task.cancelled() or task.exception() is not None)
+        if reply is not None and spec.key == _match_key(reply) and not failed:
+            now = time.perf_counter()
+            self.hits += 1
+            self.metrics.inc("speculation_hits")
+            # 不做预合成时要从现在开始等首包；已经等过的部分就是节省的时间
+            self.metrics.observe("speculation_saved_seconds", min(now, spec.first_audio_at or now) - spec.started)
+            return spec
+        self.misses += 1
+        self.metrics.inc("speculation_misses")
+        task.cancel()
+        return None
+
+    async def cancel(self):
+        # 打断时停止所有预合成，包括已经提交、正在播放的
+        self._reset_candidate()
+        self._current = None
+        await self.tasks.cancel()
+
+    def _reset_candidate(self):
+        self._candidate = ""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _start(self, text: str):
+        self._timer = None
+        reply = self.respond(text)
+        if reply is None:
+            return
+        key = _match_key(reply)
+        if len(key) < self.config.min_chars:
+            return
+        current = self._current
+        if current is not None:
+            if current.key == key:
+                return
+            # 用户还在说，之前的预合成作废
+            self.discarded += 1
+            self.metrics.inc("speculation_discarded")
+            current.task.cancel()
+        spec = Speculation(reply)
+        spec.task = self.tasks.spawn(self._synthesize(spec, self._last_task))
+        self._current = spec
+        self._last_task = spec.task
+
+    async def _synthesize(self, spec: Speculation, previous: Optional[asyncio.Task]):
+        try:
+            # 同一个 TTS 上一次只能有一个 stream，等上一次预合成（或它的取消）完成
+            if previous is not None and not previous.done():
+                await asyncio.wait({previous})
+            async for chunk in self.tts.stream(spec.reply):
+                if spec.first_audio_at is None:
+                    spec.first_audio_at = time.perf_counter()
+                spec._audio.put_nowait(chunk)
+        finally:
+            spec._audio.put_nowait(None)
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Awaitable, Optional, Set
+
+from .config import logger
+
+
+# 后台任务的归属者（asyncio.TaskGroup 需要 3.11）：统一创建、记录异常，关闭时取消并在期限内等待退出
+class TaskGroup:
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Set[asyncio.Task] = set()
+
+    def spawn(self, coro: Awaitable) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+        return task
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def cancel(self, timeout: Optional[float] = None) -> int:
+        # 返回期限内仍未退出的任务数
+        tasks = [t for t in self._tasks if t is not asyncio.current_task()]
+        if not tasks:
+            return 0
+        for task in tasks:
+            task.cancel()
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            logger.warning("%d %s task(s) did not exit within %.1fs", len(pending), self.name, timeout)
+        return len(pending)
+
+    def _done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("%s background task failed", self.name, exc_info=task.exception())
+
+
+async def cancel_and_wait(task: Optional[asyncio.Task], timeout: Optional[float] = None):
+    # 取消并等待任务退出，不抛出任务自身的异常；在任务内部调用时只取消不等待
+    if task is None or task.done():
+        return
+    task.cancel()
+    if task is not asyncio.current_task():
+        await asyncio.wait({task}, timeout=timeout)
@@ -1,11 +1,24 @@
 import asyncio
-import json
+import time
 import uuid
 from dataclasses import dataclass
-from typing import Optional, Callable
+from typing import Optional, Callable, AsyncIterator, AsyncIterable, Iterable, List, Tuple
 
 import websockets
 
+from . import protocol
+from .admission import AdmissionController, Permit, Priority
+from .audio import AudioFormat, converter_for
+from .cache import AudioCache, cache_key
+from .channel import Channel, ChannelClosed
+from .config import logger
+from .jitter import JitterBuffer, JitterConfig
+from .metrics import MetricsSink, NULL_METRICS
+from .mux import MultiplexConnection
+from .pool import SessionPool
+from .segmenter import SegmenterConfig, segment_text
+from .tasks import TaskGroup, cancel_and_wait
+
 
 @dataclass(frozen=True)
 class TTSConfig:
@@ -27,22 +40,76 @@ class DashScopeRealtimeTTS:
             send_audio: Optional[Callable[[bytes], None]] = None,
             on_end: Optional[Callable[[], None]] = None,
             on_error: Optional[Callable[[Exception], None]] = None,
+            pool: Optional[SessionPool] = None,
+            mux: Optional[MultiplexConnection] = None,
+            jitter: JitterConfig = JitterConfig(),
+            segmenter: SegmenterConfig = SegmenterConfig(),
+            on_first_audio: Optional[Callable[[float], None]] = None,
+            cache: Optional[AudioCache] = None,
+            metrics: Optional[MetricsSink] = None,
+            drain_timeout: float = 1.0,
+            output_format: Optional[AudioFormat] = None,
+            admission: Optional[AdmissionController] = None,
+            priority: int = Priority.NORMAL,
+            standby: bool = False,
     ):
         self.api_key = api_key
         self.config = config
         self.url = url
         self.task_id = uuid.uuid4().hex[:32]
         self.ws: Optional[websockets.WebSocketClientProtocol] = None
+        self.pool = pool
+        self.mux = mux
+        self.admission = admission
+        self.priority = priority
+        self._permit: Optional[Permit] = None  # 当前任务的许可，任务结束时归还
+        self._key: Optional[str] = None  # 当前连接使用的 api_key，连接上的后续任务沿用
+        self.jitter = jitter
+        self.segmenter = segmenter
+        self.cache = cache
+        self.metrics = metrics or NULL_METRICS
+        self.drain_timeout = drain_timeout
 
         self.send_audio = send_audio  # 真正发送 chunk 的函数
         self.on_end = on_end
         self.on_error = on_error
+        self.on_first_audio = on_first_audio  # 参数为首包耗时（秒）
+        # 旁路：每块交给 send_audio 的音频也交给这些回调，例如录音；回调不能阻塞
+        self._taps: List[Callable[[bytes], None]] = []
+
+        # 从一次播报的第一段文本发出到收到第一块音频的耗时
+        self.last_ttfb: Optional[float] = None
+        self._utterance_started: Optional[float] = None
+        self._first_audio_pending = False
+        self._last_chunk_at: Optional[float] = None
+        self._run_task_sent_at: Optional[float] = None
+        self._run_task_template: Optional[protocol.RunTaskTemplate] = None
 
         self.done_event: Optional[asyncio.Event] = None
         self._say_lock = asyncio.Lock()
-        self._audio_queue: Optional[asyncio.Queue[Optional[bytes]]] = None
+        self._audio_queue: Optional[JitterBuffer] = None
         self._play_task: Optional[asyncio.Task] = None
+        self._cached_play: Optional[asyncio.Task] = None  # 正在直接播放缓存音频的任务
+        self._recording: Optional[Tuple[str, List[bytes]]] = None  # (缓存键, 音频块)
+        self._receive_task: Optional[asyncio.Task] = None
+        self.tasks = TaskGroup("tts")
         self._interrupted = False
+        self._stream_channel: Optional[Channel[bytes]] = None
+
+        # 打断后旧任务的残留帧全部丢弃，直到收到它的 task-finished / task-failed
+        self._stale_task_id: Optional[str] = None
+        self._drained = asyncio.Event()
+        # 打断时同时预建一条新连接，旧任务排空和新连接就绪谁先完成就用谁。
+        # 开启 standby 时（仅直连）平时就保持一条备用连接，打断后立即切过去，旧任务在后台排空
+        self.standby = standby and not (pool or mux)
+        self._spare: Optional[asyncio.Task] = None
+        # 交给 send_audio 之前转换成播放端需要的格式；stream() 产出的仍是服务端原始格式
+        self._converter = None
+        self.output_format = output_format or AudioFormat(config.sample_rate)  # 交给 send_audio 的音频格式
+        if output_format is not None:
+            if config.audio_format != "pcm":
+                raise ValueError("output_format requires TTSConfig.audio_format='pcm'")
+            self._converter = converter_for(AudioFormat(config.sample_rate), output_format)
 
     async def __aenter__(self):
         await self.connect()
@@ -54,51 +121,186 @@ class DashScopeRealtimeTTS:
     async def connect(self):
         if self.ws:
             return
-        self.ws = await websockets.connect(
-            self.url,
-            additional_headers={"Authorization": f"Bearer {self.api_key}"}
-        )
+        self.task_id = uuid.uuid4().hex[:32]
+        await self._admit()
+        started = time.perf_counter()
+        try:
+            if self.mux:
+                self.ws = await self.mux.open_task(self.task_id, download=True)
+            elif self.pool:
+                self.ws = await self.pool.acquire()
+            else:
+                self.ws = await self._open_socket()
+        except BaseException:
+            self._release_permit()
+            raise
+        self.metrics.observe("tts_connect_seconds", time.perf_counter() - started)
+        self._utterance_started = None
+        self._recording = None
+        self._first_audio_pending = False
         self.done_event = asyncio.Event()
-        self._audio_queue = asyncio.Queue()
+        self._audio_queue = JitterBuffer(self.config.sample_rate, self.jitter, self.metrics)
         await self._send_run_task()
-        asyncio.create_task(self._receive_loop())
+        self._receive_task = self.tasks.spawn(self._receive_loop())
+        self._ensure_standby()
 
     async def disconnect(self):
-        if self.ws:
-            await self.ws.close()
-            self.ws = None
+        if not self.ws:
+            return
+        ws, self.ws = self.ws, None
+        self._release_permit()
+        self._discard_spare()
+        receive, self._receive_task = self._receive_task, None
+        play, self._play_task = self._play_task, None
+        await cancel_and_wait(receive)
+        await cancel_and_wait(play)
+        if self.pool:
+            # 任务已正常结束的连接可以放回池中复用，否则直接丢弃
+            if self.done_event and self.done_event.is_set():
+                self.pool.release(ws)
+            else:
+                self.pool.discard(ws)
+        else:
+            await ws.close()
 
     async def say(self, text: str):
+        await self._say(text, use_cache=True)
+
+    async def _say(self, text: str, use_cache: bool):
         self._interrupted = False
         async with self._say_lock:
+            open_task = self._task_open()
+            key, cached = None, None
+            if use_cache and (not open_task or self._utterance_started is None):
+                # 只在任务还没有发过文本时使用缓存，否则缓存的音频会和服务端还没返回的音频乱序
+                key, cached = await self._lookup(text)
+            if cached is not None and not open_task:
+                # 没有进行中的任务：直接播放缓存（排在上一段播放之后），不建连、不开任务
+                self._play_task = self._cached_play = self.tasks.spawn(self._play_cached(self._play_task, cached))
+                return
+
             if not self.ws:
                 await self.connect()
+            elif not open_task:
+                # 上一个任务已经结束或被打断，在同一条连接上开启新任务
+                await self._start_next_task()
 
-            # 启动后台播放任务
-            if self._play_task is None or self._play_task.done():
-                self._play_task = asyncio.create_task(self._start_audio_streamer())
+            # 启动后台播放任务，接在正在播放的缓存音频后面
+            if self._play_task is None or self._play_task.done() or self._play_task is self._cached_play:
+                self._play_task = self.tasks.spawn(self._start_audio_streamer(self._play_task))
+                self._cached_play = None
 
-            await self.ws.send(json.dumps({
-                "header": {
-                    "action": "continue-task",
-                    "task_id": self.task_id,
-                    "streaming": "duplex"
-                },
-                "payload": {
-                    "input": {"text": text}
-                }
-            }))
+            first = self._utterance_started is None
+            if first:
+                self._utterance_started = time.perf_counter()
+                self._first_audio_pending = True
+
+            self._audio_queue.request()
+            if cached is not None:
+                for chunk in cached:
+                    await self._audio_queue.put(chunk)
+                return
+            # 任务里只有这一段文本时，把它的音频记下来，任务正常结束后写入缓存
+            self._recording = (key, []) if key and first else None
+            await self.ws.send(protocol.continue_task(self.task_id, text))
+
+    def _task_open(self) -> bool:
+        return (self.ws is not None and self._stale_task_id is None
+                and not (self.done_event and self.done_event.is_set()))
+
+    async def _play_cached(self, previous: Optional[asyncio.Task], chunks: List[bytes]):
+        if previous is not None and not previous.done():
+            await previous
+        for chunk in chunks:
+            await self._deliver(chunk)
+        await self._deliver_tail()
+        if self.on_end:
+            self.on_end()
+
+    async def _lookup(self, text: str) -> Tuple[Optional[str], Optional[List[bytes]]]:
+        # 各合成入口共用的缓存查询，命中与未命中都计入指标
+        if self.cache is None:
+            return None, None
+        key = cache_key(text, self.config)
+        cached = await self.cache.get(key)
+        self.metrics.inc("tts_cache_hits" if cached is not None else "tts_cache_misses")
+        return key, cached
+
+    async def say_stream(self, tokens: AsyncIterable[str]):
+        # 把 LLM 的 token 流切成合适大小的段落，逐段 continue-task
+        async for segment in segment_text(tokens, self.segmenter):
+            await self.say(segment)
+
+    async def stream(self, text: str, maxsize: int = 64) -> AsyncIterator[bytes]:
+        # 合成一段完整文本并逐块产出音频，期间不会调用 send_audio
+        key, cached = await self._lookup(text)
+        if cached is not None:
+            for chunk in cached:
+                yield chunk
+            return
+
+        previous, self._stream_channel = self._stream_channel, None
+        if previous is not None and not previous.closed:
+            # 上一个 stream() 的消费方提前退出，但生成器还没被清理（break 后由事件循环异步 aclose），
+            # 这里先结束它，不能让新文本接在它的任务后面
+            previous.close()
+            await self.interrupt()
+
+        chunks = []
+        channel: Channel[bytes] = Channel(maxsize)
+        self._stream_channel = channel
+        try:
+            await self._say(text, use_cache=False)  # 上面已经查过缓存
+            await self.finish()
+            async for chunk in channel:
+                if key:
+                    chunks.append(chunk)
+                yield chunk
+            if key and chunks and self.done_event.is_set() and not self._interrupted:
+                await self.cache.put(key, chunks)
+        finally:
+            # 先关闭通道，阻塞在 put 上的播放任务会立即醒来退出
+            finished = channel.closed
+            channel.close()
+            if self._stream_channel is channel:
+                self._stream_channel = None
+                if not finished:
+                    # 消费方提前退出，停止本次合成
+                    await self.interrupt()
+
+    async def speak(self, text: str):
+        # 一次性播报一段文本，命中缓存时直接把缓存的音频交给 send_audio
+        await self.play(self.stream(text))
+
+    async def play(self, chunks: AsyncIterable[bytes]):
+        # 把已有的音频块（缓存、预合成）经过 output_format 转换后交给 send_audio
+        async for chunk in chunks:
+            await self._deliver(chunk)
+        await self._deliver_tail()
+
+    async def prewarm(self, phrases: Iterable[str]):
+        if self.cache is None:
+            raise RuntimeError("prewarm requires an AudioCache")
+        for phrase in phrases:
+            if await self.cache.contains(cache_key(phrase, self.config)):
+                continue
+            async for _ in self.stream(phrase):
+                pass
+
+    def add_tap(self, tap: Callable[[bytes], None]):
+        self._taps.append(tap)
+
+    def remove_tap(self, tap: Callable[[bytes], None]):
+        if tap in self._taps:
+            self._taps.remove(tap)
+
+    @property
+    def audio_buffer(self) -> Optional[JitterBuffer]:
+        return self._audio_queue
 
     async def finish(self):
-        if self.ws:
-            await self.ws.send(json.dumps({
-                "header": {
-                    "action": "finish-task",
-                    "task_id": self.task_id,
-                    "streaming": "duplex"
-                },
-                "payload": {"input": {}}
-            }))
+        if self._task_open():
+            await self.ws.send(protocol.finish_task(self.task_id))
 
     async def wait_done(self):
         if self.done_event:
@@ -108,79 +310,211 @@ class DashScopeRealtimeTTS:
 
     async def interrupt(self):
         self._interrupted = True
+        started = time.perf_counter()
 
-        # Cancel audio playback
-        if self._play_task and not self._play_task.done():
-            self._play_task.cancel()
-            try:
-                await self._play_task
-            except asyncio.CancelledError:
-                print("🔁 播放任务被取消")
-
-        # Cancel receive task
-        if hasattr(self, "_receive_task") and self._receive_task and not self._receive_task.done():
-            self._receive_task.cancel()
-            try:
-                await self._receive_task
-            except asyncio.CancelledError:
-                print("⛔️ 接收任务被取消")
-
-        # 重置队列，清掉残余音频
+        # 立即停止播放并清掉已缓冲的音频
+        await cancel_and_wait(self._play_task)
         if self._audio_queue:
-            self._audio_queue = asyncio.Queue()
+            self._audio_queue.clear()
+        if self._stream_channel:
+            self._stream_channel.close()
+        if self._converter:
+            self._converter.reset()
 
-        # 重置 done 状态
-        if self.done_event:
-            self.done_event.clear()
+        self._utterance_started = None
+        self._recording = None
+        self._first_audio_pending = False
+        self.metrics.observe("tts_interrupt_to_silence_seconds", time.perf_counter() - started)
 
-        # 重新生成 task_id，确保服务端认为你是新任务
+        if not self.ws:
+            return
+        if self.pool or self.mux:
+            # 旧连接交给连接池在后台关闭，新任务直接用预热好的连接
+            await self.disconnect()
+            await self.connect()
+        elif not self.done_event.is_set():
+            await self.finish()
+            spare = self._spare
+            if spare is not None and spare.done() and not spare.cancelled() and spare.exception() is None:
+                # 备用连接已经就绪：立即在上面开启新任务，旧任务在原连接上排空后关闭
+                self._spare = None
+                await self._adopt(spare.result(), self.task_id)
+                self._ensure_standby()
+            else:
+                # 服务端收到 finish-task 后仍会把剩余文本合成完才发 task-finished，
+                # 同时新建一条连接，排空和新连接就绪谁先完成就用谁（下一次 say() 时）
+                self._stale_task_id = self.task_id
+                self._drained.clear()
+                if spare is None:
+                    self._spare = self.tasks.spawn(self._open_socket())
+        self.metrics.observe("tts_interrupt_seconds", time.perf_counter() - started)
+        logger.debug("tts task %s interrupted", self._stale_task_id or self.task_id)
+
+    async def _start_next_task(self):
+        if self._stale_task_id is not None:
+            spare, self._spare = self._spare, None
+            drained = asyncio.ensure_future(self._drained.wait())
+            waiters = {drained, spare} if spare else {drained}
+            done, _ = await asyncio.wait(waiters, timeout=self.drain_timeout, return_when=asyncio.FIRST_COMPLETED)
+            stale, self._stale_task_id = self._stale_task_id, None
+            if drained not in done:
+                drained.cancel()
+                if spare in done and spare.exception() is None:
+                    # 新连接先就绪，旧任务在后台排空后关闭
+                    await self._adopt(spare.result(), stale)
+                    self._ensure_standby()
+                    return
+                # 旧任务迟迟没有结束，放弃这条连接
+                await self.disconnect()
+                await self.connect()
+                return
+            self._spare = spare
+            if not self.standby:
+                self._discard_spare()
+        if self.mux:
+            await self.disconnect()
+            await self.connect()
+            return
         self.task_id = uuid.uuid4().hex[:32]
+        self._utterance_started = None
+        self._recording = None
+        self._first_audio_pending = False
+        self.done_event.clear()
+        self._audio_queue.clear()
+        await self._admit_task()
+        await self._send_run_task()
 
-        # 重建连接（服务端这次不会继续推老任务）
-        await self.disconnect()
-        await self.connect()
+    async def _adopt(self, ws, stale_task_id: Optional[str]):
+        old = self.ws
+        await cancel_and_wait(self._receive_task)
+        # 旧任务的许可等它在后台排空后再归还
+        permit, self._permit = self._permit, None
+        self.tasks.spawn(self._retire(old, stale_task_id, permit))
+        await self._admit_task()
+        self.ws = ws
+        self.task_id = uuid.uuid4().hex[:32]
+        self._utterance_started = None
+        self._recording = None
+        self._first_audio_pending = False
+        self.done_event = asyncio.Event()
+        self._audio_queue.clear()
+        await self._send_run_task()
+        self._receive_task = self.tasks.spawn(self._receive_loop())
+
+    async def _open_socket(self):
+        api_key = self._key or self.api_key
+        return await websockets.connect(
+            self.url,
+            additional_headers={"Authorization": f"Bearer {api_key}"}
+        )
+
+    async def _admit(self):
+        # 每个 run-task 取一个许可（令牌 + 并发名额），任务结束时归还；建连时决定这条连接用哪个 key
+        if self.admission is None:
+            return
+        spread = self.admission.api_keys and not (self.pool or self.mux)
+        self._permit = await self.admission.acquire(
+            self.config.model, self.priority, None if spread else self.api_key)
+        self._key = self._permit.api_key
+
+    async def _admit_task(self):
+        # 同一连接上的后续任务：沿用连接的 key 再取一个许可
+        if self.admission is not None and self._permit is None:
+            self._permit = await self.admission.acquire(self.config.model, self.priority, self._key)
 
-        print("⛔️ 播报被中断，队列已清空")
+    def _release_permit(self):
+        permit, self._permit = self._permit, None
+        if permit is not None:
+            permit.release()
+
+    def _discard_spare(self):
+        spare, self._spare = self._spare, None
+        if spare is None:
+            return
+        if spare.done():
+            if not spare.cancelled() and spare.exception() is None:
+                self._close_later(spare.result())
+        else:
+            spare.cancel()
+
+    def _ensure_standby(self):
+        if self.standby and self._spare is None:
+            self._spare = self.tasks.spawn(self._open_socket())
+
+    async def _retire(self, ws, task_id: Optional[str], permit: Optional[Permit] = None):
+        # 旧连接上的任务已经 finish-task，读完它剩余的帧（最多 drain_timeout）再关闭
+        async def drain():
+            async for msg in ws:
+                if isinstance(msg, str):
+                    header = protocol.loads(msg).get("header", {})
+                    if header.get("task_id") == task_id and header.get("event") in ("task-finished", "task-failed"):
+                        return
+        try:
+            if task_id is not None:
+                await asyncio.wait_for(drain(), self.drain_timeout)
+        except Exception:
+            pass
+        finally:
+            if permit is not None:
+                permit.release()
+            await ws.close()
+
+    def _close_later(self, ws):
+        self.tasks.spawn(ws.close())
 
     async def _send_run_task(self):
-        params = {
-            "text_type": "PlainText",
-            "voice": self.config.voice,
-            "format": self.config.audio_format,
-            "sample_rate": self.config.sample_rate,
-            "volume": self.config.volume,
-            "rate": self.config.speech_rate,
-            "pitch": self.config.pitch_rate
-        }
-
-        await self.ws.send(json.dumps({
-            "header": {
-                "action": "run-task",
-                "task_id": self.task_id,
-                "streaming": "duplex"
-            },
-            "payload": {
+        if self._run_task_template is None:
+            self._run_task_template = protocol.RunTaskTemplate({
                 "task_group": "audio",
                 "task": "tts",
                 "function": "SpeechSynthesizer",
                 "model": self.config.model,
-                "parameters": params,
+                "parameters": {
+                    "text_type": "PlainText",
+                    "voice": self.config.voice,
+                    "format": self.config.audio_format,
+                    "sample_rate": self.config.sample_rate,
+                    "volume": self.config.volume,
+                    "rate": self.config.speech_rate,
+                    "pitch": self.config.pitch_rate
+                },
                 "input": {}
-            }
-        }))
+            })
+
+        self._run_task_sent_at = time.perf_counter()
+        await self.ws.send(self._run_task_template.render(self.task_id))
 
     async def _receive_loop(self):
         try:
             async for msg in self.ws:
-                if isinstance(msg, bytes) and not self._interrupted:
-                    if self._audio_queue:
+                if isinstance(msg, bytes):
+                    if self._audio_queue and self._stale_task_id is None and not self._interrupted:
+                        if self._recording is not None:
+                            self._recording[1].append(msg)
                         await self._audio_queue.put(msg)
                 elif isinstance(msg, str):
                     try:
-                        data = json.loads(msg)
-                        event = data.get("header", {}).get("event")
+                        data = protocol.loads(msg)
+                        header = data.get("header", {})
+                        event = header.get("event")
+                        task_id = header.get("task_id")
+
+                        if task_id and (task_id != self.task_id or task_id == self._stale_task_id):
+                            if task_id == self._stale_task_id and event in ("task-finished", "task-failed"):
+                                self._release_permit()
+                                self._drained.set()
+                            continue
 
-                        if event == "task-finished":
+                        if event == "task-started":
+                            if self._run_task_sent_at is not None:
+                                self.metrics.observe("tts_task_start_seconds",
+                                                     time.perf_counter() - self._run_task_sent_at)
+
+                        elif event == "task-finished":
+                            self._release_permit()
+                            recording, self._recording = self._recording, None
+                            if recording is not None and recording[1] and not self._interrupted:
+                                self.tasks.spawn(self.cache.put(*recording))
                             if self._audio_queue:
                                 await self._audio_queue.put(None)  # 播放结束标志
                             if self.on_end:
@@ -189,29 +523,71 @@ class DashScopeRealtimeTTS:
                                 self.done_event.set()
 
                         elif event == "task-failed":
+                            self._release_permit()
                             if self.on_error:
                                 self.on_error(RuntimeError(data.get("payload", {}).get("message", "Unknown error")))
-                    except json.JSONDecodeError as e:
-                        print(f"⚠️ JSON 解码失败: {e}")
+                    except protocol.DECODE_ERRORS as e:
+                        logger.warning("TTS got invalid JSON frame: %s", e)
                 else:
-                    print(f"⚠️ 收到未知类型的 WebSocket 消息: {type(msg)}")
+                    logger.warning("TTS got unexpected websocket message type %s", type(msg).__name__)
 
         except Exception as e:
             if self.on_error:
                 self.on_error(e)
 
-    async def _start_audio_streamer(self):
+    async def _deliver(self, chunk: bytes):
+        if self._converter:
+            chunk = self._converter.convert(chunk)
+            if not chunk:
+                return
+        await self._emit_audio(chunk)
+
+    async def _deliver_tail(self):
+        # 一段话结束时把重采样滤波器里剩余的样本送出去
+        if self._converter:
+            tail = self._converter.flush()
+            if tail:
+                await self._emit_audio(tail)
+
+    async def _emit_audio(self, chunk: bytes):
+        for tap in self._taps:
+            tap(chunk)
+        if self.send_audio:
+            result = self.send_audio(chunk)
+            if asyncio.iscoroutine(result):
+                await result
+
+    async def _start_audio_streamer(self, previous: Optional[asyncio.Task] = None):
         try:
+            if previous is not None and not previous.done():
+                await previous
             while True:
                 chunk = await self._audio_queue.get()
+                if chunk is None and not self._interrupted and not self._stream_channel:
+                    await self._deliver_tail()
                 if chunk is None or self._interrupted:
                     break
-                if self.send_audio:
-                    result = self.send_audio(chunk)
-                    if asyncio.iscoroutine(result):
-                        await result
-        except asyncio.CancelledError:
+                now = time.perf_counter()
+                if self._first_audio_pending:
+                    self._first_audio_pending = False
+                    self.last_ttfb = now - self._utterance_started
+                    self.metrics.observe("tts_first_audio_seconds", self.last_ttfb)
+                    if self.on_first_audio:
+                        self.on_first_audio(self.last_ttfb)
+                elif self._last_chunk_at is not None:
+                    self.metrics.observe("tts_chunk_gap_seconds", now - self._last_chunk_at)
+                self._last_chunk_at = now
+                self.metrics.set_gauge("tts_audio_buffer_bytes", self._audio_queue.depth_bytes)
+                if self._stream_channel:
+                    await self._stream_channel.put(chunk)
+                else:
+                    await self._deliver(chunk)
+        except (asyncio.CancelledError, ChannelClosed):
             pass
         except Exception as e:
             if self.on_error:
                 self.on_error(e)
+        finally:
+            self._last_chunk_at = None
+            if self._stream_channel:
+                self._stream_channel.close()
@@ -0,0 +1,156 @@
+import asyncio
+import math
+import sys
+from abc import ABC, abstractmethod
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Optional, Union
+
+from .audio import import_numpy
+
+
+@dataclass(frozen=True)
+class VADConfig:
+    frame_ms: int = 20
+    threshold_db: float = -45.0  # 帧能量（dBFS）高于它才可能是语音
+    max_zcr: float = 0.4  # 过零率高于它视为噪声（如风声、气流声）
+    onset_ms: int = 60  # 连续这么久的语音帧才算开始说话，过滤掉敲击声
+    pre_roll_ms: int = 300  # 开始说话时一并补发之前的音频，避免切掉字头
+    hangover_ms: int = 1000  # 静音持续这么久才停止发送；需要比服务端断句的静音时长长
+    sample_width: int = 2
+
+
+# 检测器接口：判断一帧 16bit PCM 是否是语音，可以替换成 WebRTC VAD、Silero 等实现
+class VoiceDetector(ABC):
+    @abstractmethod
+    def is_speech(self, frame: memoryview) -> bool:
+        ...
+
+    def reset(self):
+        pass
+
+
+class EnergyDetector(VoiceDetector):
+    def __init__(self, threshold_db: float = -45.0, max_zcr: float = 0.4):
+        self.threshold_db = threshold_db
+        self.max_zcr = max_zcr
+        # 均方值阈值，省去每帧的 log 运算
+        self._threshold = (32768.0 ** 2) * (10 ** (threshold_db / 10))
+        self.last_db = -math.inf
+        self.last_zcr = 0.0
+        # numpy 是可选依赖，没有时退回纯 Python 实现
+        self._np = import_numpy()
+
+    def is_speech(self, frame: memoryview) -> bool:
+        np = self._np
+        if np is not None:
+            samples = np.frombuffer(frame, dtype="<i2").astype(np.float32)
+            n = samples.size
+            if n < 2:
+                return False
+            power = float(np.dot(samples, samples)) / n
+            crossings = int(np.count_nonzero(np.signbit(samples[1:]) != np.signbit(samples[:-1])))
+        else:
+            samples = array("h")
+            samples.frombytes(frame)
+            if sys.byteorder != "little":
+                samples.byteswap()
+            n = len(samples)
+            if n < 2:
+                return False
+            power = sum(s * s for s in samples) / n
+            crossings = sum(1 for a, b in zip(samples, samples[1:]) if (a < 0) != (b < 0))
+        zcr = crossings / (n - 1)
+        self.last_db = 10 * math.log10(power / (32768.0 ** 2)) if power > 0 else -math.inf
+        self.last_zcr = zcr
+        return power >= self._threshold and zcr <= self.max_zcr
+
+
+# 放在 ASR 前面的门控：静音期间不发送音频，检测到语音时先补发 pre-roll
+class VADGate:
+    def __init__(
+            self,
+            send: Callable[[bytes], Awaitable[None]],
+            sample_rate: int,
+            config: VADConfig = VADConfig(),
+            detector: Optional[VoiceDetector] = None,
+            on_speech_start: Optional[Callable[[], None]] = None,
+            on_speech_end: Optional[Callable[[], None]] = None,
+    ):
+        self.send = send
+        self.config = config
+        self.detector = detector or EnergyDetector(config.threshold_db, config.max_zcr)
+        self.on_speech_start = on_speech_start
+        self.on_speech_end = on_speech_end
+        self.frame_bytes = sample_rate * config.sample_width * config.frame_ms // 1000
+        self._pre_roll: Deque[bytes] = deque(maxlen=max(1, config.pre_roll_ms // config.frame_ms))
+        self._onset_frames = max(1, config.onset_ms // config.frame_ms)
+        self._hangover_frames = max(1, config.hangover_ms // config.frame_ms)
+        self._pending = bytearray()
+        self._lock = asyncio.Lock()  # 并发写入时各帧仍按写入顺序处理
+        self._voiced = 0
+        self._silent = 0
+        self.speaking = False
+
+        self.frames_sent = 0
+        self.frames_dropped = 0
+
+    async def write(self, data: Union[bytes, bytearray, memoryview]):
+        # 先同步取出完整的帧再 await：不在 await 期间持有 _pending 的 memoryview，并发写入可以随时扩容
+        self._pending += data
+        size = self.frame_bytes
+        usable = len(self._pending) - len(self._pending) % size
+        if not usable:
+            return
+        frames = bytes(self._pending[:usable])
+        del self._pending[:usable]
+        async with self._lock:
+            for offset in range(0, usable, size):
+                await self._process(frames[offset:offset + size])
+
+    async def _process(self, frame: bytes):
+        speech = self.detector.is_speech(memoryview(frame))
+        if self.speaking:
+            await self.send(frame)
+            self.frames_sent += 1
+            if speech:
+                self._silent = 0
+                return
+            self._silent += 1
+            if self._silent >= self._hangover_frames:
+                self.speaking = False
+                self._voiced = 0
+                if self.on_speech_end:
+                    self.on_speech_end()
+            return
+
+        self._voiced = self._voiced + 1 if speech else 0
+        if len(self._pre_roll) == self._pre_roll.maxlen:
+            self.frames_dropped += 1
+        self._pre_roll.append(frame)
+        if self._voiced < self._onset_frames:
+            return
+        self.speaking = True
+        self._silent = 0
+        if self.on_speech_start:
+            self.on_speech_start()
+        while self._pre_roll:
+            await self.send(self._pre_roll.popleft())
+            self.frames_sent += 1
+
+    async def flush(self):
+        # 结束前把说话中未满一帧的尾巴发出去；静音中的内容直接丢弃
+        tail = bytes(self._pending)
+        self._pending.clear()
+        async with self._lock:
+            if self.speaking and tail:
+                await self.send(tail)
+
+    def reset(self):
+        self._pending.clear()
+        self._pre_roll.clear()
+        self._voiced = 0
+        self._silent = 0
+        self.speaking = False
+        self.detector.reset()
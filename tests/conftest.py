@@ -0,0 +1,16 @@
+import asyncio
+
+import pytest
+
+from dashscope_realtime import DashScopeSimulator, SimulatorConfig
+
+
+@pytest.fixture
+def simulate():
+    # 在本地模拟器上跑一个异步场景：simulate(scenario, config)，scenario 接收模拟器实例
+    def run(scenario, config: SimulatorConfig = SimulatorConfig(), timeout: float = 10.0):
+        async def main():
+            async with DashScopeSimulator(config) as sim:
+                return await asyncio.wait_for(scenario(sim), timeout)
+        return asyncio.run(main())
+    return run
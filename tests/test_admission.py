@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from dashscope_realtime import (AdmissionConfig, AdmissionController, AdmissionRejectedError, DashScopeRealtimeTTS,
+                                Priority, SimulatorConfig)
+
+
+def test_rate_limited_key_does_not_block_other_keys():
+    async def scenario():
+        controller = AdmissionController(config=AdmissionConfig(rate=0.5, burst=1))
+        first = await controller.acquire("m", api_key="a")
+        waiting = asyncio.ensure_future(controller.acquire("m", api_key="a"))
+        await asyncio.sleep(0)
+        assert controller.queue_depth("m", "a") == 1
+        other = await asyncio.wait_for(controller.acquire("m", api_key="b"), 0.1)
+        assert not waiting.done()
+        waiting.cancel()
+        first.release()
+        other.release()
+
+    asyncio.run(scenario())
+
+
+def test_tts_takes_a_token_per_task(simulate):
+    async def scenario(sim):
+        controller = AdmissionController(config=AdmissionConfig(rate=0.001, burst=1, queue_timeout=0))
+        tts = DashScopeRealtimeTTS("test", url=sim.url, admission=controller)
+        await tts.say("你好")
+        await tts.finish()
+        await asyncio.wait_for(tts.done_event.wait(), 5)
+        assert controller.active("cosyvoice-v1") == 0
+        # 同一条连接上的下一个任务同样要过令牌桶
+        with pytest.raises(AdmissionRejectedError):
+            await tts.say("再见")
+        await tts.disconnect()
+
+    simulate(scenario, SimulatorConfig())
+
+
+def test_released_slot_goes_to_higher_priority_any_key_waiter():
+    async def scenario():
+        controller = AdmissionController(["a"], AdmissionConfig(max_concurrency=1, rate=1000, burst=1000))
+        held = await controller.acquire("m")
+        live = asyncio.ensure_future(controller.acquire("m", Priority.LIVE))
+        batch = asyncio.ensure_future(controller.acquire("m", Priority.BATCH, api_key="a"))
+        await asyncio.sleep(0)
+        held.release()
+        granted = await asyncio.wait_for(live, 1)
+        assert not batch.done()
+        granted.release()
+        (await asyncio.wait_for(batch, 1)).release()
+
+    asyncio.run(scenario())
+
+
+def test_pinned_request_does_not_jump_queued_live_request():
+    async def scenario():
+        controller = AdmissionController(["a"], AdmissionConfig(rate=10, burst=1))
+        await controller.acquire("m")
+        live = asyncio.ensure_future(controller.acquire("m", Priority.LIVE))
+        await asyncio.sleep(0)
+        # 令牌已经补上，但重试定时器还没来得及运行时来了一个指定 key 的低优先级请求
+        time.sleep(0.12)
+        batch = asyncio.ensure_future(controller.acquire("m", Priority.BATCH, api_key="a"))
+        await asyncio.wait_for(live, 1)
+        assert not batch.done()
+        batch.cancel()
+
+    asyncio.run(scenario())
@@ -0,0 +1,248 @@
+import asyncio
+
+from dashscope_realtime import ASRConfig, DashScopeRealtimeASR, IngestConfig, ReconnectPolicy, SimulatorConfig
+
+SPEECH = b"\x01\x00" * 1600  # 16kHz 100ms
+
+
+async def send(asr: DashScopeRealtimeASR, ms: int):
+    for _ in range(ms // 100):
+        await asr.send_audio(SPEECH)
+
+
+def test_partial_and_final(simulate):
+    async def scenario(sim):
+        partials, sentences, finals = [], [], []
+        asr = DashScopeRealtimeASR("test", url=sim.url, on_partial=partials.append,
+                                   on_sentence_end=sentences.append, on_final=finals.append)
+        await asr.connect()
+        await send(asr, 2500)
+        await asr.finish()
+        await asyncio.wait_for(_finished(asr), 5)
+        await asr.disconnect()
+        return partials, sentences, finals
+
+    partials, sentences, finals = simulate(scenario)
+    assert partials
+    assert sentences == ["语" * 10 + "。", "语" * 2 + "。"]
+    assert finals == ["".join(sentences)]
+
+
+def test_results_iterator(simulate):
+    async def scenario(sim):
+        asr = DashScopeRealtimeASR("test", url=sim.url)
+        await asr.connect()
+
+        async def collect():
+            return [result async for result in asr.results()]
+
+        consumer = asyncio.ensure_future(collect())
+        await asyncio.sleep(0)
+        await send(asr, 2000)
+        await asr.finish()
+        results = await consumer
+        await asr.disconnect()
+        return results
+
+    results = simulate(scenario)
+    assert results[-1].is_sentence_end
+    assert results[-1].end_time == 2000
+
+
+def test_results_consumer_leaving_does_not_stall_receive_loop(simulate):
+    async def scenario(sim):
+        partials = []
+        asr = DashScopeRealtimeASR("test", url=sim.url, on_partial=partials.append)
+        await asr.connect()
+
+        async def slow_consumer():
+            async for _ in asr.results(maxsize=2):
+                await asyncio.sleep(0.05)
+                break
+
+        consumer = asyncio.ensure_future(slow_consumer())
+        await send(asr, 5000)
+        await consumer
+        await asr.finish()
+        await asyncio.wait_for(_finished(asr), 5)
+        await asr.disconnect()
+        return partials
+
+    # 每 200ms 一个中间结果，消费方退出后接收循环不能卡在已满的通道上
+    assert len(simulate(scenario)) >= 20
+
+
+def test_reconnect_replays_unacknowledged_audio(simulate):
+    async def scenario(sim):
+        results = []
+        asr = DashScopeRealtimeASR("test", url=sim.url, on_result=results.append,
+                                   reconnect=ReconnectPolicy(base_delay=0.01))
+        await asr.connect()
+        await send(asr, 2500)
+        await asyncio.sleep(0.1)
+        for connection in list(sim.server.connections):
+            await connection.close(1011, "test disconnect")
+        while not asr.reconnects:
+            await asyncio.sleep(0.01)
+        await send(asr, 500)
+        await asr.finish()
+        await asyncio.wait_for(_finished(asr), 5)
+        await asr.disconnect()
+        return asr, [result for result in results if result.is_sentence_end]
+
+    asr, results = simulate(scenario, SimulatorConfig())
+    assert asr.reconnects == 1
+    # 第一句在 2000ms 处确认，之后的 500ms 需要重放
+    assert asr.replayed_ms == 500
+    assert [(r.begin_time, r.end_time) for r in results] == [(0, 2000), (2000, 3000)]
+
+
+class _DropDuringReplay(DashScopeRealtimeASR):
+    # 第一次重放开始前，服务端把刚建好的新连接也断开
+    async def _replay_tail(self):
+        if not getattr(self, "dropped", False):
+            self.dropped = True
+            await _drop_all(self.sim)
+            await asyncio.sleep(0.05)
+        return await super()._replay_tail()
+
+
+def test_replacement_dropping_during_replay_keeps_results_open(simulate):
+    async def scenario(sim):
+        errors = []
+        asr = _DropDuringReplay("test", url=sim.url, on_error=errors.append,
+                                reconnect=ReconnectPolicy(base_delay=0.01))
+        asr.sim = sim
+        await asr.connect()
+
+        async def collect():
+            return [result async for result in asr.results() if result.is_sentence_end]
+
+        consumer = asyncio.ensure_future(collect())
+        await send(asr, 2500)
+        await asyncio.sleep(0.1)
+        await _drop_all(sim)
+        while not asr.reconnects:
+            await asyncio.sleep(0.01)
+        await send(asr, 500)
+        await asr.finish()
+        results = await asyncio.wait_for(consumer, 5)
+        await asr.disconnect()
+        return errors, asr.reconnects, [(r.begin_time, r.end_time) for r in results]
+
+    assert simulate(scenario) == ([], 1, [(0, 2000), (2000, 3000)])
+
+
+def test_reconnect_replay_stays_sample_aligned_at_22050hz(simulate):
+    async def scenario(sim):
+        results = []
+        asr = DashScopeRealtimeASR("test", url=sim.url, config=ASRConfig(sample_rate=22050),
+                                   on_result=results.append, reconnect=ReconnectPolicy(base_delay=0.01))
+        await asr.connect()
+        for _ in range(25):
+            await asr.send_audio(b"\x01\x00" * 2205)  # 100ms
+        await asyncio.sleep(0.1)
+        received = sim.audio_bytes_received
+        for connection in list(sim.server.connections):
+            await connection.close(1011, "test disconnect")
+        while not asr.reconnects:
+            await asyncio.sleep(0.01)
+        await asr.finish()
+        await asyncio.wait_for(_finished(asr), 5)
+        await asr.disconnect()
+        return asr, sim.audio_bytes_received - received, [r for r in results if r.is_sentence_end]
+
+    # 22.05kHz 下 1990ms 对应 87759 字节，按字节取整会从半个采样开始重放
+    asr, replayed, results = simulate(scenario, SimulatorConfig(sentence_ms=1990))
+    acked = 1990 * 22050 // 1000 * 2
+    assert replayed == 25 * 4410 - acked
+    assert results[0].end_time == 1990
+    assert results[-1].begin_time == acked // 2 * 1000 // 22050
+
+
+def test_send_keepalive_stops_after_finish(simulate):
+    async def scenario(sim):
+        asr = DashScopeRealtimeASR("test", url=sim.url)
+        await asr.connect()
+        before = await asr.send_keepalive(b"\x00" * 3200)
+        await asr.finish()
+        after = await asr.send_keepalive(b"\x00" * 3200)
+        await asyncio.wait_for(_finished(asr), 5)
+        await asr.disconnect()
+        return before, after, sim.audio_bytes_received
+
+    assert simulate(scenario) == (True, False, 3200)
+
+
+def test_send_keepalive_waits_for_partial_ingest_frame(simulate):
+    async def scenario(sim):
+        asr = DashScopeRealtimeASR("test", url=sim.url, ingest=IngestConfig(frame_ms=100))
+        await asr.connect()
+        await asr.send_audio(SPEECH[:1600])  # 半帧，还留在合帧缓冲里
+        skipped = await asr.send_keepalive(b"\x00" * 3200)
+        await asr.finish()
+        await asyncio.wait_for(_finished(asr), 5)
+        await asr.disconnect()
+        return skipped, sim.audio_bytes_received
+
+    assert simulate(scenario) == (False, 1600)
+
+
+def test_incremental_results_report_stable_prefix(simulate):
+    async def scenario(sim, incremental):
+        results = []
+        asr = DashScopeRealtimeASR("test", url=sim.url, on_result=results.append, incremental=incremental)
+        await asr.connect()
+        await send(asr, 600)
+        # 静音期间中间结果不变，增量模式下不再回调
+        for _ in range(4):
+            await asr.send_audio(b"\x00" * 3200)
+        await send(asr, 400)
+        await asr.finish()
+        await asyncio.wait_for(_finished(asr), 5)
+        await asr.disconnect()
+        return results
+
+    config = SimulatorConfig(endpointing=True)
+    full = simulate(lambda sim: scenario(sim, False), config)
+    results = simulate(lambda sim: scenario(sim, True), config)
+    assert len(full) == 8
+    assert [(r.text, r.stable, r.delta) for r in results] == [
+        ("语", 0, "语"), ("语语", 1, "语"), ("语语语", 2, "语"), ("语语语语", 3, "语"), ("语语语语语。", 4, "语。")]
+
+
+def test_sentence_ids_continue_across_reconnect(simulate):
+    async def scenario(sim):
+        results = []
+        asr = DashScopeRealtimeASR("test", url=sim.url, on_result=results.append, incremental=True,
+                                   reconnect=ReconnectPolicy(base_delay=0.01))
+        await asr.connect()
+        await send(asr, 2500)
+        await asyncio.sleep(0.1)
+        await _drop_all(sim)
+        while not asr.reconnects:
+            await asyncio.sleep(0.01)
+        await send(asr, 2500)
+        await asr.finish()
+        await asyncio.wait_for(_finished(asr), 5)
+        await asr.disconnect()
+        return results
+
+    results = simulate(scenario)
+    # 新任务的 sentence_id 从 0 开始，平移后接着第一句往下编号
+    assert [r.sentence_id for r in results if r.is_sentence_end] == [0, 1, 2]
+    ids = [r.sentence_id for r in results]
+    assert ids == sorted(ids)
+    # 重连后的第一个中间结果属于新的一句，没有可复用的前缀
+    first_after = next(r for r in results if r.sentence_id == 1)
+    assert first_after.stable == 0
+
+
+async def _drop_all(sim):
+    for connection in list(sim.server.connections):
+        await connection.close(1011, "test disconnect")
+
+
+async def _finished(asr: DashScopeRealtimeASR):
+    while not asr.task_finished:
+        await asyncio.sleep(0.01)
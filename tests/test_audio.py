@@ -0,0 +1,62 @@
+import warnings
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from dashscope_realtime import AudioConverter, AudioFormat  # noqa: E402
+from dashscope_realtime import audio  # noqa: E402
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import audioop
+    except ImportError:  # Python 3.13 起移除
+        audioop = None
+
+needs_audioop = pytest.mark.skipif(audioop is None, reason="audioop is not available")
+
+PCM = np.arange(-32768, 32768, dtype=np.int32)
+CODES = np.arange(256, dtype=np.uint8)
+
+
+@needs_audioop
+@pytest.mark.parametrize("encoding, encode, decode", [
+    ("mulaw", "lin2ulaw", "ulaw2lin"),
+    ("alaw", "lin2alaw", "alaw2lin"),
+])
+def test_g711_matches_audioop_exhaustively(encoding, encode, decode):
+    audio.import_numpy()
+    ours = audio._mulaw_encode(PCM) if encoding == "mulaw" else audio._alaw_encode(PCM)
+    assert ours.tobytes() == getattr(audioop, encode)(PCM.astype("<i2").tobytes(), 2)
+    decoded = audio._mulaw_decode(CODES) if encoding == "mulaw" else audio._alaw_decode(CODES)
+    assert decoded.astype("<i2").tobytes() == getattr(audioop, decode)(CODES.tobytes(), 2)
+
+
+@needs_audioop
+@pytest.mark.parametrize("encoding, encode", [("mulaw", "lin2ulaw"), ("alaw", "lin2alaw")])
+def test_converter_encodes_like_audioop(encoding, encode):
+    data = PCM.astype("<i2").tobytes()
+    converter = AudioConverter(AudioFormat(8000), AudioFormat(8000, encoding=encoding))
+    assert converter.convert(data) == getattr(audioop, encode)(data, 2)
+
+
+def test_chunked_conversion_matches_one_shot():
+    rng = np.random.default_rng(0)
+    data = (rng.standard_normal(22050) * 3000).astype("<i2").tobytes()
+    src, dst = AudioFormat(22050), AudioFormat(16000, channels=2, encoding="mulaw")
+    whole = AudioConverter(src, dst)
+    expected = whole.convert(data) + whole.flush()
+    chunked = AudioConverter(src, dst)
+    out = b"".join(chunked.convert(data[i:i + 1001]) for i in range(0, len(data), 1001)) + chunked.flush()
+    assert out == expected
+
+
+def test_converter_reuses_scratch_buffers():
+    converter = AudioConverter(AudioFormat(16000, channels=2), AudioFormat(16000, encoding="alaw"))
+    chunk = bytes(3200)
+    converter.convert(chunk)
+    buffers = {name: buf.__array_interface__["data"][0] for name, buf in converter._scratch.items()}
+    for _ in range(3):
+        converter.convert(chunk)
+    assert {name: buf.__array_interface__["data"][0] for name, buf in converter._scratch.items()} == buffers
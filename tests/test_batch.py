@@ -0,0 +1,123 @@
+import asyncio
+import gc
+
+from dashscope_realtime import BatchConfig, BatchTranscriber, DashScopeRealtimeASR, InProcessMetrics
+from dashscope_realtime.config import logger
+
+SPEECH = b"\x01\x00" * 16000  # 16kHz 1s
+
+
+def _write(tmp_path, name: str, seconds: int) -> str:
+    path = tmp_path / name
+    path.write_bytes(SPEECH * seconds)
+    return str(path)
+
+
+def test_checkpoint_skips_finished_files(simulate, tmp_path):
+    paths = [_write(tmp_path, "a.pcm", 2), _write(tmp_path, "b.pcm", 3)]
+    checkpoint = str(tmp_path / "done.jsonl")
+
+    async def scenario(sim):
+        batch = BatchTranscriber("test", url=sim.url, batch=BatchConfig(concurrency=2, checkpoint=checkpoint))
+        first = await batch.run(paths[:1])
+        tasks = sim.tasks_started
+        # 进程中途被杀时写了一半的行要跳过
+        with open(checkpoint, "a", encoding="utf-8") as f:
+            f.write('{"path": "b.pc')
+        second = await batch.run(paths)
+        return first, second, tasks, sim.tasks_started
+
+    first, second, tasks, total = simulate(scenario)
+    assert (first.resumed, second.resumed) == (0, 1)
+    assert (tasks, total) == (1, 2)
+    assert [t.text for t in second.transcripts] == [first.transcripts[0].text, "语" * 10 + "。" + "语" * 5 + "。"]
+    assert second.processed_seconds == 3.0
+    assert not second.failed
+
+
+def test_retry_after_connection_drops_mid_file(simulate, tmp_path):
+    path = _write(tmp_path, "a.pcm", 3)
+
+    async def scenario(sim):
+        unretrieved = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unretrieved.append(context))
+        metrics = InProcessMetrics()
+        batch = BatchTranscriber("test", url=sim.url, metrics=metrics,
+                                 batch=BatchConfig(chunk_ms=100, speed=10, max_retries=1))
+
+        async def drop_once():
+            while not sim.audio_bytes_received:
+                await asyncio.sleep(0.005)
+            for connection in list(sim.server.connections):
+                await connection.close(1011, "test disconnect")
+
+        dropper = asyncio.ensure_future(drop_once())
+        report = await batch.run([path])
+        await dropper
+        await asyncio.sleep(0.05)
+        gc.collect()
+        return report, metrics.counters.get(("batch_file_errors", ())), sim.tasks_started, unretrieved
+
+    report, errors, tasks, unretrieved = simulate(scenario)
+    assert not report.failed
+    assert report.transcripts[0].text == "语" * 10 + "。" + "语" * 5 + "。"
+    assert (errors, tasks) == (1, 2)
+    assert unretrieved == []
+
+
+def test_failure_after_retries_is_reported(simulate, tmp_path):
+    path = _write(tmp_path, "a.pcm", 1)
+
+    async def scenario(sim):
+        unretrieved = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unretrieved.append(context))
+        batch = BatchTranscriber("test", url=sim.url, batch=BatchConfig(chunk_ms=100, speed=5, max_retries=1,
+                                                                         checkpoint=str(tmp_path / "done.jsonl")))
+
+        async def drop_all():
+            while True:
+                for connection in list(sim.server.connections):
+                    if sim.audio_bytes_received:
+                        await connection.close(1011, "test disconnect")
+                await asyncio.sleep(0.005)
+
+        dropper = asyncio.ensure_future(drop_all())
+        report = await batch.run([path])
+        dropper.cancel()
+        await asyncio.sleep(0.05)
+        gc.collect()
+        return report, unretrieved
+
+    report, unretrieved = simulate(scenario)
+    assert len(report.failed) == 1 and report.failed[0].error
+    assert not (tmp_path / "done.jsonl").exists()
+    assert unretrieved == []
+
+
+def test_collector_error_is_retrieved_when_sending_fails(simulate, tmp_path, monkeypatch):
+    path = _write(tmp_path, "a.pcm", 1)
+    send_audio = DashScopeRealtimeASR.send_audio
+
+    async def failing_send(self, audio):
+        await send_audio(self, audio)
+        # 接收循环先发现断线、以错误关闭结果通道，之后发送才失败
+        for connection in list(self.sim.server.connections):
+            await connection.close(1011, "test disconnect")
+        while self._result_channels:
+            await asyncio.sleep(0.005)
+        raise ConnectionError("send failed")
+
+    async def scenario(sim):
+        unretrieved = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unretrieved.append(context))
+        monkeypatch.setattr(DashScopeRealtimeASR, "sim", sim, raising=False)
+        monkeypatch.setattr(DashScopeRealtimeASR, "send_audio", failing_send)
+        # pytest 的日志捕获会持有异常及其帧，任务就不会被回收
+        monkeypatch.setattr(logger, "warning", lambda *args, **kwargs: None)
+        batch = BatchTranscriber("test", url=sim.url, batch=BatchConfig(max_retries=0))
+        report = await batch.run([path])
+        await asyncio.sleep(0.05)
+        gc.collect()
+        return report.failed[0].error, [context["message"] for context in unretrieved]
+
+    assert simulate(scenario) == ("ConnectionError('send failed')", [])
@@ -0,0 +1,115 @@
+import asyncio
+
+from dashscope_realtime import AudioCache, DashScopeRealtimeTTS, InProcessMetrics, SimulatorConfig
+from dashscope_realtime.cache import cache_key
+
+BYTES_PER_CHAR = SimulatorConfig().tts_bytes_per_char
+
+
+def test_say_plays_cached_audio_without_a_task(simulate):
+    async def scenario(sim):
+        audio = []
+        metrics = InProcessMetrics()
+        tts = DashScopeRealtimeTTS("test", url=sim.url, cache=AudioCache(), metrics=metrics,
+                                   send_audio=audio.append)
+        await tts.prewarm(["你好"])
+        tasks = sim.tasks_started
+        await tts.say("你好")
+        await tts.finish()
+        await tts.wait_done()
+        await tts.disconnect()
+        return audio, sim.tasks_started - tasks, metrics
+
+    audio, tasks, metrics = simulate(scenario)
+    assert sum(map(len, audio)) == 2 * BYTES_PER_CHAR
+    assert tasks == 0
+    assert metrics.counters.get(("tts_cache_misses", ())) == 1
+    assert metrics.counters.get(("tts_cache_hits", ())) == 1
+
+
+def test_say_miss_fills_cache_and_hit_skips_connect(simulate):
+    async def scenario(sim):
+        cache = AudioCache()
+        ended = []
+        first = DashScopeRealtimeTTS("test", url=sim.url, cache=cache)
+        await first.say("请稍等")
+        await first.finish()
+        await first.wait_done()
+        await first.disconnect()
+        await asyncio.sleep(0)  # 写缓存在后台进行
+
+        audio = []
+        tts = DashScopeRealtimeTTS("test", url=sim.url, cache=cache, send_audio=audio.append,
+                                   on_end=lambda: ended.append(True))
+        connections = sim.connections
+        await tts.say("请稍等")
+        await tts.say("请稍等")  # 两段缓存音频依次播放
+        await tts.finish()
+        await tts.wait_done()
+        # 缓存音频播完之后，未命中的文本照常合成，音频排在后面
+        await tts.say("好")
+        await tts.finish()
+        await tts.wait_done()
+        await tts.disconnect()
+        return audio, sim.connections - connections, ended
+
+    audio, connections, ended = simulate(scenario)
+    assert sum(map(len, audio)) == 7 * BYTES_PER_CHAR
+    assert connections == 1
+    assert len(ended) == 3
+
+
+def test_speak_and_prewarm_use_disk_tier(simulate, tmp_path):
+    async def scenario(sim):
+        first = DashScopeRealtimeTTS("test", url=sim.url, cache=AudioCache(directory=str(tmp_path)))
+        await first.prewarm(["好的"])
+        await first.disconnect()
+
+        audio = []
+        metrics = InProcessMetrics()
+        cache = AudioCache(directory=str(tmp_path))
+        tts = DashScopeRealtimeTTS("test", url=sim.url, cache=cache, metrics=metrics, send_audio=audio.append)
+        key = cache_key("好的", tts.config)
+        assert key not in cache and await cache.contains(key)  # 只在磁盘层
+        await tts.prewarm(["好的"])
+        await tts.speak("好的")
+        return audio, cache, metrics, sim.tasks_started
+
+    audio, cache, metrics, tasks = simulate(scenario)
+    assert sum(map(len, audio)) == 2 * BYTES_PER_CHAR
+    assert tasks == 1
+    assert cache.disk_hits == 1
+    assert metrics.counters.get(("tts_cache_hits", ())) == 1
+
+
+def test_concurrent_puts_for_one_key_leave_a_whole_file(tmp_path):
+    async def scenario():
+        cache = AudioCache(directory=str(tmp_path))
+        values = [[bytes([i]) * 4096] * 64 for i in range(8)]
+        await asyncio.gather(*(cache.put("k", value) for value in values))
+        fresh = AudioCache(directory=str(tmp_path))
+        return values, await fresh.get("k"), sorted(p.name for p in tmp_path.iterdir())
+
+    values, stored, files = asyncio.run(scenario())
+    assert stored in values
+    assert files == ["k.audio"]
+
+
+def test_truncated_file_is_a_miss(tmp_path):
+    async def scenario():
+        await AudioCache(directory=str(tmp_path)).put("k", [b"\x01" * 100])
+        path = tmp_path / "k.audio"
+        path.write_bytes(path.read_bytes()[:-10])
+        return await AudioCache(directory=str(tmp_path)).get("k")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_oversized_value_evicts_old_entry():
+    async def scenario():
+        cache = AudioCache(max_bytes=100)
+        await cache.put("k", [b"\x00" * 10])
+        await cache.put("k", [b"\x00" * 200])
+        return "k" in cache, cache.memory_bytes, await cache.get("k")
+
+    assert asyncio.run(scenario()) == (False, 0, None)
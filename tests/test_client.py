@@ -0,0 +1,66 @@
+import asyncio
+
+from dashscope_realtime import RealtimeClient, RealtimeEvent, SimulatorConfig
+
+
+def test_end_voice_after_playback_went_idle(simulate):
+    async def scenario(sim):
+        client = RealtimeClient("test", url=sim.url)
+        await client.start()
+        await client.call_voice("你好")
+        await client._playback_queue.join()  # 文本已经发完，播放循环在等下一段
+        await asyncio.sleep(0.01)
+        await client.end_voice()
+        await client.wait_for(RealtimeEvent.TTS_END, 2)
+        playing = client.is_tts_playing()
+        await client.stop()
+        return playing
+
+    assert simulate(scenario) is False
+
+
+def test_start_timeout_cancels_both_sides(simulate):
+    async def scenario(sim):
+        ready = []
+        client = RealtimeClient("test", url=sim.url, start_timeout=0.1)
+        client.on(RealtimeEvent.READY, lambda *_: ready.append(True))
+        try:
+            await client.start()
+        except asyncio.TimeoutError:
+            timed_out = True
+        else:
+            timed_out = False
+        await asyncio.sleep(0.05)
+        return timed_out, ready, client.asr.ws, client.tts.ws, len(sim.server.connections)
+
+    assert simulate(scenario, SimulatorConfig(handshake_latency=0.5)) == (True, [], None, None, 0)
+
+
+def test_failed_start_cleans_up_the_side_that_connected(simulate):
+    async def scenario(sim):
+        client = RealtimeClient("test", url=sim.url)
+        connect = client.tts.connect
+
+        async def fail():
+            await asyncio.sleep(0.05)  # ASR 已经连上
+            raise ConnectionError("tts unavailable")
+
+        client.tts.connect = fail
+        try:
+            await client.start()
+        except ConnectionError as e:
+            error = str(e)
+        await asyncio.sleep(0.05)
+        leftover = client.asr.ws, len(sim.server.connections), client._playback_task
+        # 清理干净之后可以重新启动，stop 也可以重复调用
+        client.tts.connect = connect
+        await client.start()
+        await client.call_voice("你好")
+        await client.end_voice()
+        await client.wait_for(RealtimeEvent.TTS_END, 2)
+        await client.stop()
+        await client.stop()
+        await asyncio.sleep(0.05)
+        return error, leftover, len(sim.server.connections)
+
+    assert simulate(scenario) == ("tts unavailable", (None, 0, None), 0)
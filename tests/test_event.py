@@ -0,0 +1,112 @@
+import asyncio
+import gc
+
+import pytest
+
+from dashscope_realtime.event import EventEmitter
+
+
+def test_priority_order_then_registration_order():
+    emitter = EventEmitter()
+    calls = []
+    emitter.on("x", lambda: calls.append("low"), priority=-1)
+    emitter.on("x", lambda: calls.append("a"))
+    emitter.on("x", lambda: calls.append("high"), priority=5)
+    emitter.on("x", lambda: calls.append("b"))
+    emitter.emit("x")
+    assert calls == ["high", "a", "b", "low"]
+
+
+def test_once_runs_a_single_time():
+    emitter = EventEmitter()
+    calls = []
+    emitter.once("x", calls.append)
+    emitter.emit("x", 1)
+    emitter.emit("x", 2)
+    assert calls == [1]
+    assert emitter.listener_count("x") == 0
+
+
+def test_off_removes_one_handler_or_all():
+    emitter = EventEmitter()
+    calls = []
+
+    def first(value):
+        calls.append(("first", value))
+
+    def second(value):
+        calls.append(("second", value))
+
+    emitter.on("x", first)
+    emitter.on("x", second)
+    emitter.off("x", first)
+    emitter.emit("x", 1)
+    assert calls == [("second", 1)]
+    emitter.off("x")
+    emitter.emit("x", 2)
+    assert calls == [("second", 1)]
+    assert emitter.listener_count("x") == 0
+
+
+def test_weak_handlers_drop_with_their_owner():
+    class Owner:
+        def __init__(self, calls):
+            self.calls = calls
+
+        def handle(self, value):
+            self.calls.append(value)
+
+    emitter = EventEmitter()
+    calls = []
+    owner = Owner(calls)
+    emitter.on("x", owner.handle, weak=True)
+    emitter.emit("x", 1)
+    assert calls == [1]
+    # 绑定方法可以按 off 移除
+    emitter.off("x", owner.handle)
+    assert emitter.listener_count("x") == 0
+
+    emitter.on("x", owner.handle, weak=True)
+    del owner
+    gc.collect()
+    assert emitter.listener_count("x") == 0
+    emitter.emit("x", 2)
+    assert calls == [1]
+
+
+def test_coroutine_handlers_are_drained():
+    async def scenario():
+        emitter = EventEmitter(max_concurrency=1)
+        calls = []
+
+        async def handler(value):
+            await asyncio.sleep(0)
+            calls.append(value)
+
+        emitter.on("x", handler)
+        for value in range(3):
+            emitter.emit("x", value)
+        await emitter.drain()
+        return calls
+
+    assert asyncio.run(scenario()) == [0, 1, 2]
+
+
+def test_wait_for_returns_first_argument():
+    async def scenario():
+        emitter = EventEmitter()
+        loop = asyncio.get_running_loop()
+        loop.call_soon(emitter.emit, "x", "payload", "ignored")
+        return await emitter.wait_for("x", timeout=1)
+
+    assert asyncio.run(scenario()) == "payload"
+
+
+def test_wait_for_timeout_removes_handler():
+    async def scenario():
+        emitter = EventEmitter()
+        with pytest.raises(asyncio.TimeoutError):
+            await emitter.wait_for("x", timeout=0.01)
+        return emitter.listener_count("x")
+
+    assert asyncio.run(scenario()) == 0
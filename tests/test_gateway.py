@@ -0,0 +1,64 @@
+import asyncio
+import os
+
+from dashscope_realtime import ASRConfig, Gateway, GatewayConfig, RealtimeEvent, TTSConfig, gateway
+from dashscope_realtime.gateway import _AUDIO, _CLOSE, _END_VOICE, _OPEN, _SAY, _Inbox, _Worker
+from dashscope_realtime.shmring import ShmRing
+
+
+def test_inbox_drops_audio_but_keeps_control_messages():
+    async def scenario():
+        inbox = _Inbox(max_audio=2)
+        assert inbox.put(_AUDIO, b"1") and inbox.put(_AUDIO, b"2")
+        assert not inbox.put(_AUDIO, b"3")
+        assert inbox.put(_CLOSE, b"")
+        return [await inbox.get() for _ in range(3)], inbox.dropped
+
+    items, dropped = asyncio.run(scenario())
+    assert items == [(_AUDIO, b"1"), (_AUDIO, b"2"), (_CLOSE, b"")]
+    assert dropped == 1
+
+
+def test_session_round_trip(simulate):
+    async def scenario(sim):
+        async with Gateway("test", url=sim.url, config=GatewayConfig(workers=1, drain_timeout=5)) as gateway:
+            session = await gateway.open_session()
+            partial = asyncio.ensure_future(session.wait_for(RealtimeEvent.ASR_PARTIAL, 10))
+            audio = []
+            session.on(RealtimeEvent.TTS_AUDIO, audio.append)
+            for _ in range(3):
+                await session.send_audio_chunk(b"\x01\x00" * 1600)
+            await partial
+            await session.call_voice("你好")
+            await session.end_voice()
+            await session.wait_for(RealtimeEvent.TTS_END, 10)
+            await session.close()
+            return audio, gateway.session_count
+
+    audio, sessions = simulate(scenario, timeout=30)
+    assert sum(map(len, audio)) == 2 * 1764
+    assert sessions == 0
+
+
+def test_worker_exits_when_parent_is_gone(simulate, monkeypatch):
+    monkeypatch.setattr(gateway, "_PARENT_CHECK_INTERVAL", 0.05)
+    inbound, outbound = ShmRing(64 * 1024), ShmRing(4096)  # 没人读出站环，TTS 音频很快就写不进去
+
+    async def scenario(sim):
+        worker = _Worker("test", sim.url, ASRConfig(), TTSConfig(), GatewayConfig(), inbound, outbound)
+        run = asyncio.ensure_future(worker.run())
+        inbound.write(1, _OPEN)
+        inbound.write(1, _SAY, "你好".encode("utf-8") * 20)
+        inbound.write(1, _END_VOICE)
+        while getattr(worker, "writer", None) is None or not worker.writer.backlog:
+            await asyncio.sleep(0.01)
+        parent = os.getppid()
+        monkeypatch.setattr(os, "getppid", lambda: parent + 1)
+        await asyncio.wait_for(run, 5)
+        return worker.sessions, worker.writer.backlog > 0
+
+    try:
+        assert simulate(scenario) == ({}, True)
+    finally:
+        for ring in (inbound, outbound):
+            ring.close()
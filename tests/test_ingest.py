@@ -0,0 +1,121 @@
+import array
+import asyncio
+
+import pytest
+
+from dashscope_realtime import IngestConfig
+from dashscope_realtime.ingest import BLOCK, DROP_OLDEST, AudioIngest
+
+
+class _Sink:
+    # 发送回调拿到的是复用的帧缓冲，必须先拷贝
+    def __init__(self, blocked: bool = False):
+        self.frames = []
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+
+    async def send(self, frame):
+        await self.gate.wait()
+        self.frames.append(bytes(frame))
+
+
+def test_writes_are_coalesced_into_fixed_frames():
+    async def scenario():
+        sink = _Sink()
+        ingest = AudioIngest(sink.send, frame_bytes=4)
+        await ingest.write(b"abc")
+        await ingest.write(bytearray(b"defgh"))
+        await ingest.write(memoryview(b"ijklmno"))
+        assert not ingest.empty  # 还有 3 字节攒在缓冲里
+        await ingest.flush()
+        return sink.frames, ingest.sent_frames, ingest.empty
+
+    assert asyncio.run(scenario()) == ([b"abcd", b"efgh", b"ijkl", b"mno"], 4, True)
+
+
+def test_buffer_protocol_objects_are_cast_to_bytes():
+    async def scenario():
+        sink = _Sink()
+        ingest = AudioIngest.for_sample_rate(sink.send, 1000, IngestConfig(frame_ms=2))
+        samples = array.array("h", [1, 2, 3, 4, 5])
+        await ingest.write(samples)
+        await ingest.flush()
+        return sink.frames, samples.tobytes()
+
+    frames, raw = asyncio.run(scenario())
+    assert frames == [raw[:4], raw[4:8], raw[8:]]
+
+
+def test_block_policy_applies_backpressure():
+    async def scenario():
+        sink = _Sink(blocked=True)
+        ingest = AudioIngest(sink.send, frame_bytes=2, max_frames=2, policy=BLOCK)
+        writer = asyncio.ensure_future(ingest.write(b"\x00" * 10))
+        await asyncio.sleep(0.01)
+        # 一帧在发送中，两帧排队，写入方停在第四帧
+        blocked = not writer.done(), ingest.depth
+        sink.gate.set()
+        await writer
+        await ingest.flush()
+        return blocked, len(sink.frames), ingest.dropped_frames
+
+    assert asyncio.run(scenario()) == ((True, 2), 5, 0)
+
+
+def test_drop_oldest_policy_keeps_the_newest_frames():
+    async def scenario():
+        sink = _Sink(blocked=True)
+        ingest = AudioIngest(sink.send, frame_bytes=1, max_frames=2, policy=DROP_OLDEST)
+        await ingest.write(b"a")
+        await asyncio.sleep(0)  # 发送任务取走第一帧，卡在发送上
+        await ingest.write(b"bcde")
+        assert ingest.depth == 2
+        sink.gate.set()
+        await ingest.flush()
+        return sink.frames, ingest.dropped_frames
+
+    assert asyncio.run(scenario()) == ([b"a", b"d", b"e"], 2)
+
+
+def test_reset_discards_queued_frames():
+    async def scenario():
+        sink = _Sink(blocked=True)
+        ingest = AudioIngest(sink.send, frame_bytes=2, max_frames=4)
+        await ingest.write(b"\x00" * 7)
+        await ingest.reset()
+        sink.gate.set()
+        await ingest.write(b"zz")
+        await ingest.flush()
+        return sink.frames, ingest.depth_bytes, ingest.empty
+
+    assert asyncio.run(scenario()) == ([b"zz"], 0, True)
+
+
+def test_send_errors_are_reported_and_sending_continues():
+    async def scenario():
+        errors, frames = [], []
+
+        async def send(frame):
+            if not frames:
+                frames.append(None)
+                raise ConnectionError("boom")
+            frames.append(bytes(frame))
+
+        ingest = AudioIngest(send, frame_bytes=1, on_error=errors.append)
+        await ingest.write(b"ab")
+        await ingest.flush()
+        return [str(e) for e in errors], frames[1:], ingest.sent_frames
+
+    assert asyncio.run(scenario()) == (["boom"], [b"b"], 1)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        AudioIngest(_noop, frame_bytes=4, policy="spill")
+    with pytest.raises(ValueError):
+        AudioIngest(_noop, frame_bytes=0)
+
+
+async def _noop(frame):
+    pass
@@ -0,0 +1,68 @@
+import asyncio
+
+from dashscope_realtime import InProcessMetrics
+from dashscope_realtime.jitter import JitterBuffer, JitterConfig
+
+CHUNK = b"\x00" * 320
+
+
+async def _drain_until_waiting(buffer: JitterBuffer):
+    # 取空缓冲，直到播放端开始等待新数据
+    reader = asyncio.ensure_future(buffer.get())
+    await asyncio.sleep(0.01)
+    return reader
+
+
+def test_end_of_stream_and_idle_gaps_are_not_underruns():
+    async def scenario():
+        metrics = InProcessMetrics()
+        buffer = JitterBuffer(16000, metrics=metrics)
+        buffer.request()
+        await buffer.put(CHUNK)
+        assert await buffer.get() == CHUNK
+        # 这段文本的音频已经放完，下一次请求在断粮之后才发出：空闲，不算欠载
+        reader = await _drain_until_waiting(buffer)
+        await asyncio.sleep(0.01)
+        buffer.request()
+        await buffer.put(CHUNK)
+        assert await reader == CHUNK
+        # 正常结束
+        reader = await _drain_until_waiting(buffer)
+        await buffer.put(None)
+        assert await reader is None
+        return buffer.underruns, metrics
+
+    underruns, metrics = asyncio.run(scenario())
+    assert underruns == 0
+    assert not metrics.counters
+
+
+def test_mid_stream_starvation_is_an_underrun():
+    async def scenario():
+        metrics = InProcessMetrics()
+        buffer = JitterBuffer(16000, metrics=metrics)
+        buffer.request()
+        await buffer.put(CHUNK)
+        await buffer.get()
+        reader = await _drain_until_waiting(buffer)
+        await buffer.put(CHUNK)  # 同一个请求的后续音频来晚了
+        await reader
+        return buffer.underruns, metrics
+
+    underruns, metrics = asyncio.run(scenario())
+    assert underruns == 1
+    assert metrics.counters.get(("tts_jitter_underruns", ())) == 1
+
+
+def test_overruns_are_reported():
+    async def scenario():
+        metrics = InProcessMetrics()
+        buffer = JitterBuffer(16000, JitterConfig(max_ms=10), metrics=metrics)
+        await buffer.put(CHUNK)
+        writer = asyncio.ensure_future(buffer.put(CHUNK))
+        await asyncio.sleep(0)
+        await buffer.get()
+        await writer
+        return metrics
+
+    assert asyncio.run(scenario()).counters.get(("tts_jitter_overruns", ())) == 1
@@ -0,0 +1,98 @@
+import asyncio
+
+from dashscope_realtime import ASRConfig, Keepalive, KeepaliveConfig
+
+SILENCE = KeepaliveConfig(idle_after=0.05, silence_interval=0.02, silence_ms=10, ping_interval=0)
+PING = KeepaliveConfig(idle_after=0, silence_interval=0, ping_interval=0.01, ping_timeout=0.02)
+
+
+class _ASR:
+    def __init__(self, ws=None):
+        self.config = ASRConfig()
+        self.ws = ws
+        self.recovering = False
+        self.frames = []
+
+    async def send_keepalive(self, frame: bytes) -> bool:
+        self.frames.append(frame)
+        return True
+
+
+class _WebSocket:
+    def __init__(self, answer=True, error=None):
+        self.answer = answer
+        self.error = error
+        self.pings = 0
+
+    async def ping(self):
+        self.pings += 1
+        if self.error is not None:
+            raise self.error
+        pong = asyncio.get_running_loop().create_future()
+        if self.answer:
+            pong.set_result(0.0)
+        return pong
+
+
+def _run(keepalive: Keepalive, seconds: float, touch_every: float = 0):
+    async def scenario():
+        keepalive.start()
+        loop = asyncio.get_running_loop()
+        end = loop.time() + seconds
+        while loop.time() < end:
+            if touch_every:
+                keepalive.touch()
+            await asyncio.sleep(touch_every or seconds)
+        await keepalive.stop()
+
+    asyncio.run(scenario())
+
+
+def test_silence_waits_for_idle():
+    asr = _ASR()
+    keepalive = Keepalive(asr, SILENCE)
+    _run(keepalive, 0.2, touch_every=0.01)
+    assert asr.frames == []
+    assert not keepalive.idle
+
+
+def test_silence_is_injected_while_idle():
+    asr = _ASR()
+    keepalive = Keepalive(asr, SILENCE)
+    _run(keepalive, 0.2)
+    # 0.05s 之后开始，每 0.02s 一帧 10ms 的静音
+    assert 3 <= len(asr.frames) <= 8
+    assert set(asr.frames) == {b"\x00" * 320}
+    assert keepalive.silence_frames == len(asr.frames)
+
+
+def test_ping_measures_rtt():
+    ws = _WebSocket()
+    keepalive = Keepalive(_ASR(ws), PING)
+    _run(keepalive, 0.1)
+    assert keepalive.pings == ws.pings >= 3
+    assert keepalive.rtt is not None and keepalive.last_rtt is not None
+    assert keepalive.ping_timeouts == 0
+
+
+def test_ping_timeout_is_counted():
+    keepalive = Keepalive(_ASR(_WebSocket(answer=False)), PING)
+    _run(keepalive, 0.15)
+    assert keepalive.ping_timeouts >= 2
+    assert keepalive.pings == 0 and keepalive.rtt is None
+
+
+def test_unexpected_ping_error_keeps_the_loop_running():
+    ws = _WebSocket(error=AttributeError("'NoneType' object has no attribute 'ping'"))
+    keepalive = Keepalive(_ASR(ws), PING)
+    _run(keepalive, 0.1)
+    assert ws.pings >= 3
+    assert keepalive.pings == 0
+
+
+def test_no_ping_while_recovering():
+    ws = _WebSocket()
+    asr = _ASR(ws)
+    asr.recovering = True
+    _run(Keepalive(asr, PING), 0.05)
+    assert ws.pings == 0
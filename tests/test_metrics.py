@@ -0,0 +1,49 @@
+from dashscope_realtime import InProcessMetrics, prometheus_text
+
+
+def test_counters_and_gauges():
+    metrics = InProcessMetrics()
+    metrics.inc("tts_cache_hits")
+    metrics.inc("tts_cache_hits", 2)
+    metrics.inc("asr_errors", kind="timeout")
+    metrics.set_gauge("pool_idle", 1.5)
+    assert prometheus_text(metrics, prefix="x_") == (
+        "# TYPE x_asr_errors counter\n"
+        'x_asr_errors{kind="timeout"} 1\n'
+        "# TYPE x_tts_cache_hits counter\n"
+        "x_tts_cache_hits 3\n"
+        "# TYPE x_pool_idle gauge\n"
+        "x_pool_idle 1.5\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = InProcessMetrics(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3):
+        metrics.observe("latency", value, stage="asr")
+    assert prometheus_text(metrics, prefix="") == (
+        "# TYPE latency histogram\n"
+        'latency_bucket{stage="asr",le="0.1"} 1\n'
+        'latency_bucket{stage="asr",le="1"} 3\n'
+        'latency_bucket{stage="asr",le="+Inf"} 4\n'
+        'latency_sum{stage="asr"} 4.05\n'
+        'latency_count{stage="asr"} 4\n'
+    )
+
+
+def test_type_is_declared_once_per_metric():
+    metrics = InProcessMetrics(buckets=(1.0,))
+    metrics.observe("latency", 0.5, stage="asr")
+    metrics.observe("latency", 0.5, stage="tts")
+    lines = prometheus_text(metrics).splitlines()
+    assert lines.count("# TYPE dashscope_realtime_latency histogram") == 1
+    assert 'dashscope_realtime_latency_count{stage="tts"} 1' in lines
+
+
+def test_label_values_are_escaped():
+    metrics = InProcessMetrics()
+    metrics.inc("errors", message='say "hi"\\now\nthen')
+    assert prometheus_text(metrics, prefix="") == (
+        "# TYPE errors counter\n"
+        'errors{message="say \\"hi\\"\\\\now\\nthen"} 1\n'
+    )
@@ -0,0 +1,182 @@
+import asyncio
+import time
+
+from dashscope_realtime import (DashScopeRealtimeASR, DashScopeRealtimeTTS, JitterConfig, MultiplexConnection,
+                                SimulatorConfig)
+
+BYTES_PER_CHAR = SimulatorConfig().tts_bytes_per_char
+
+
+async def _idle(mux: MultiplexConnection):
+    while mux.active_tasks:
+        await asyncio.sleep(0.01)
+
+
+def test_download_lease_is_exclusive(simulate):
+    async def scenario(sim):
+        async with MultiplexConnection("test", url=sim.url) as mux:
+            first_audio, second_audio = [], []
+            first = DashScopeRealtimeTTS("test", url=sim.url, mux=mux, send_audio=first_audio.append)
+            second = DashScopeRealtimeTTS("test", url=sim.url, mux=mux, send_audio=second_audio.append)
+            await first.say("一二三四五")
+            await first.finish()
+            # 下载租约被第一个任务占用，第二个任务要等它结束才能开始
+            waiting = asyncio.ensure_future(second.say("六"))
+            await asyncio.sleep(0.02)
+            assert not waiting.done()
+            await asyncio.wait_for(first.done_event.wait(), 5)
+            await asyncio.wait_for(waiting, 5)
+            await second.finish()
+            await asyncio.wait_for(second.done_event.wait(), 5)
+            await asyncio.sleep(0.05)
+            await first.disconnect()
+            await second.disconnect()
+            await asyncio.wait_for(_idle(mux), 5)
+            return first_audio, second_audio
+
+    first_audio, second_audio = simulate(scenario, SimulatorConfig(tts_chunk_interval=0.01))
+    assert sum(map(len, first_audio)) == 5 * BYTES_PER_CHAR
+    assert sum(map(len, second_audio)) == BYTES_PER_CHAR
+
+
+def test_asr_and_tts_share_one_connection(simulate):
+    async def scenario(sim):
+        async with MultiplexConnection("test", url=sim.url) as mux:
+            partials, audio = [], []
+            asr = DashScopeRealtimeASR("test", url=sim.url, mux=mux, on_partial=partials.append)
+            tts = DashScopeRealtimeTTS("test", url=sim.url, mux=mux, send_audio=audio.append)
+            await asr.connect()
+            await tts.say("你好")
+            await tts.finish()
+            for _ in range(5):
+                await asr.send_audio(b"\x01\x00" * 1600)
+            await asyncio.wait_for(tts.done_event.wait(), 5)
+            await asyncio.sleep(0.05)
+            await tts.disconnect()
+            await asr.disconnect()
+            # ASR 任务没有 finish 就断开：收到 task-finished 后释放租约
+            await asyncio.wait_for(_idle(mux), 5)
+            return partials, audio, sim.connections
+
+    partials, audio, connections = simulate(scenario)
+    assert partials
+    assert sum(map(len, audio)) == 2 * BYTES_PER_CHAR
+    assert connections == 1
+
+
+def test_slow_tts_consumer_within_credit_does_not_block_asr_events(simulate):
+    async def scenario(sim):
+        # 100 块音频都在下载信用之内，接收循环不会因为播放端卡住而暂停
+        async with MultiplexConnection("test", url=sim.url, max_pending_frames=128) as mux:
+            partials = []
+            stalled = asyncio.Event()
+
+            async def send_audio(chunk):
+                await stalled.wait()  # 播放端卡住
+
+            asr = DashScopeRealtimeASR("test", url=sim.url, mux=mux, on_partial=partials.append)
+            tts = DashScopeRealtimeTTS("test", url=sim.url, mux=mux, send_audio=send_audio,
+                                       jitter=JitterConfig(max_ms=100))
+            await asr.connect()
+            await tts.say("长" * 200)
+            await asyncio.sleep(0.1)
+            for _ in range(20):
+                await asr.send_audio(b"\x01\x00" * 1600)
+            await asyncio.sleep(0.1)
+            stalled.set()
+            await tts.disconnect()
+            await asr.disconnect()
+            return partials
+
+    # 每 200ms 音频一个中间结果
+    assert len(simulate(scenario)) >= 9
+
+
+def test_slow_tts_consumer_gets_backpressure_not_drops(simulate):
+    async def scenario(sim):
+        async with MultiplexConnection("test", url=sim.url, max_pending_frames=4) as mux:
+            audio = []
+            stalled = asyncio.Event()
+
+            async def send_audio(chunk):
+                await stalled.wait()
+                audio.append(chunk)
+
+            tts = DashScopeRealtimeTTS("test", url=sim.url, mux=mux, send_audio=send_audio,
+                                       jitter=JitterConfig(max_ms=100))
+            await tts.say("长" * 50)
+            await tts.finish()
+            await asyncio.sleep(0.2)
+            task = mux._downloader
+            buffered = task._pending_frames
+            stalled.set()
+            await asyncio.wait_for(tts.done_event.wait(), 5)
+            await tts.wait_done()
+            await tts.disconnect()
+            return buffered, audio
+
+    buffered, audio = simulate(scenario)
+    assert buffered <= 4
+    assert sum(map(len, audio)) == 50 * BYTES_PER_CHAR
+
+
+def test_barge_in_does_not_wait_for_old_task(simulate):
+    async def scenario(sim):
+        async with MultiplexConnection("test", url=sim.url) as mux:
+            audio = []
+            got = asyncio.Event()
+
+            def send_audio(chunk):
+                audio.append(chunk)
+                got.set()
+
+            tts = DashScopeRealtimeTTS("test", url=sim.url, mux=mux, send_audio=send_audio)
+            await tts.say("长" * 100)  # 服务端还要约 1 秒才能合成完
+            await asyncio.wait_for(got.wait(), 5)
+            started = time.perf_counter()
+            await tts.interrupt()
+            elapsed = time.perf_counter() - started
+            audio.clear()
+            await tts.say("好的")
+            await tts.finish()
+            await asyncio.wait_for(tts.done_event.wait(), 5)
+            await tts.wait_done()
+            await tts.disconnect()
+            return elapsed, audio, mux.stale_frames
+
+    elapsed, audio, stale = simulate(scenario, SimulatorConfig(tts_chunk_interval=0.02))
+    assert elapsed < 0.5
+    # 旧任务剩余的音频被丢弃，新任务只收到自己的音频
+    assert sum(map(len, audio)) == 2 * BYTES_PER_CHAR
+    assert stale > 0
+
+
+def test_close_unfinished_task_releases_lease_after_task_finished(simulate):
+    async def scenario(sim):
+        async with MultiplexConnection("test", url=sim.url) as mux:
+            tts = DashScopeRealtimeTTS("test", url=sim.url, mux=mux)
+            await tts.say("你好")
+            await tts.disconnect()
+            await asyncio.wait_for(_idle(mux), 5)
+            # 租约已经释放，下一个任务可以拿到下载通道
+            task = await asyncio.wait_for(mux.open_task("b" * 32, download=True), 1)
+            await task.close()
+            return mux.active_tasks
+
+    assert simulate(scenario) == 0
+
+
+def test_close_hands_over_lease_and_expires_after_timeout(simulate):
+    async def scenario(sim):
+        async with MultiplexConnection("test", url=sim.url, close_timeout=0.1) as mux:
+            tts = DashScopeRealtimeTTS("test", url=sim.url, mux=mux)
+            await tts.say("长" * 200)  # 服务端需要很久才能合成完并发出 task-finished
+            await tts.disconnect()
+            # 租约立即交出，旧任务仍然登记着，直到超时
+            task = await asyncio.wait_for(mux.open_task("b" * 32, download=True), 0.05)
+            await task.close()
+            assert mux.active_tasks == 1
+            await asyncio.wait_for(_idle(mux), 1)
+            return mux.active_tasks
+
+    assert simulate(scenario, SimulatorConfig(tts_chunk_interval=0.05)) == 0
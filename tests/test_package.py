@@ -0,0 +1,7 @@
+import dashscope_realtime
+
+
+def test_all_matches_lazy_exports():
+    assert sorted(dashscope_realtime.__all__) == sorted(dashscope_realtime._EXPORTS)
+    for name in dashscope_realtime.__all__:
+        assert getattr(dashscope_realtime, name).__name__ == name
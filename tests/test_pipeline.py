@@ -0,0 +1,38 @@
+from dashscope_realtime import (DashScopeRealtimeTTS, InProcessMetrics, PipelineConfig, RealtimeClient, RealtimeEvent,
+                                SimulatorConfig, TTSPipeline)
+
+CONFIG = SimulatorConfig(task_start_latency=0.05, tts_first_chunk_latency=0.05, tts_chunk_interval=0.02)
+
+
+def test_segments_play_in_order(simulate):
+    async def scenario(sim):
+        audio = []
+        pipeline = TTSPipeline([DashScopeRealtimeTTS("test", url=sim.url) for _ in range(2)], send_audio=audio.append)
+        await pipeline.start()
+        first, second, third = pipeline.submit("一二三"), pipeline.submit("四五"), pipeline.submit("六")
+        second.cancel()
+        await pipeline.drain()
+        await pipeline.close()
+        return [s.state for s in (first, second, third)], audio
+
+    states, audio = simulate(scenario, CONFIG)
+    assert states == ["done", "cancelled", "done"]
+    assert sum(map(len, audio)) == 4 * CONFIG.tts_bytes_per_char
+
+
+def test_client_reports_gap_for_every_segment(simulate):
+    async def scenario(sim):
+        metrics = InProcessMetrics()
+        client = RealtimeClient("test", url=sim.url, pipeline=PipelineConfig(lanes=2), metrics=metrics)
+        assert all(lane.send_audio == client.pipeline._emit for lane in client.pipeline.lanes)
+        await client.start()
+        for text in ["你好。", "今天天气不错。", "再见。", "好的。"]:
+            await client.call_voice(text)
+        await client.end_voice()
+        await client.wait_for(RealtimeEvent.TTS_END, 5)
+        await client.stop()
+        return metrics
+
+    metrics = simulate(scenario, CONFIG)
+    # 第一段之前没有上一段，其余三段都有一次段间间隔
+    assert metrics.histogram("tts_segment_gap_seconds").count == 3
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from dashscope_realtime import SessionPool, SimulatorConfig, preconnect
+from dashscope_realtime.pool import PoolClosedError, _is_open
+
+
+async def _until(predicate, timeout: float = 2.0):
+    async def poll():
+        while not predicate():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def test_release_reuses_connection(simulate):
+    async def scenario(sim):
+        async with SessionPool("test", url=sim.url, min_size=0) as pool:
+            first = await pool.acquire()
+            pool.release(first)
+            second = await pool.acquire()
+            return first is second, pool.in_use, pool.idle, sim.connections
+
+    assert simulate(scenario) == (True, 1, 0, 1)
+
+
+def test_discard_refills_in_background(simulate):
+    async def scenario(sim):
+        async with SessionPool("test", url=sim.url, min_size=1, max_size=2) as pool:
+            ws = await pool.acquire()
+            await _until(lambda: pool.idle == 1)
+            pool.discard(ws)
+            await _until(lambda: not _is_open(ws))
+            replacement = await pool.acquire()
+            await _until(lambda: pool.idle == 1)
+            return replacement is not ws, pool.size, sim.connections
+
+    assert simulate(scenario) == (True, 2, 3)
+
+
+def test_health_check_drops_dead_and_expired_sockets(simulate):
+    async def scenario(sim):
+        async with SessionPool("test", url=sim.url, min_size=1, max_size=4, idle_timeout=0,
+                               health_check_interval=3600) as pool:
+            sockets = [await pool.acquire() for _ in range(3)]
+            for ws in sockets:
+                pool.release(ws)
+            await _until(lambda: pool.idle == 3)
+            # 服务端断开其中一条，其余两条都超过了 idle_timeout
+            await list(sim.server.connections)[0].close(1011, "test disconnect")
+            await asyncio.sleep(0.05)
+            await pool._check_health()
+            return pool.idle, all(_is_open(ws) for ws, _ in pool._idle)
+
+    # 超时的连接只回收到 min_size 为止
+    assert simulate(scenario) == (1, True)
+
+
+def test_max_size_blocks_until_release(simulate):
+    async def scenario(sim):
+        async with SessionPool("test", url=sim.url, min_size=0, max_size=2) as pool:
+            first = await pool.acquire()
+            await pool.acquire()
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.acquire(timeout=0.05)
+            waiting = asyncio.ensure_future(pool.acquire(timeout=1))
+            await asyncio.sleep(0.01)
+            pool.release(first)
+            return await waiting is first, sim.connections
+
+    assert simulate(scenario) == (True, 2)
+
+
+def test_invalid_sizes():
+    with pytest.raises(ValueError):
+        SessionPool("test", min_size=3, max_size=2)
+
+
+def test_preconnect_first_acquire_waits_for_warm_socket(simulate):
+    async def scenario(sim):
+        pool = preconnect("test", url=sim.url)
+        await asyncio.sleep(0.05)  # 握手进行中
+        await pool.acquire()
+        connections = sim.connections
+        await pool.close()
+        return connections
+
+    assert simulate(scenario, SimulatorConfig(handshake_latency=0.2)) == 1
+
+
+def test_close_closes_in_use_sockets_and_cancels_fills(simulate):
+    async def scenario(sim):
+        pool = SessionPool("test", url=sim.url, min_size=2)
+        await pool.start()
+        ws = await pool.acquire()  # 后台开始补连接（握手 0.2 秒）
+        await pool.close()
+        with pytest.raises(PoolClosedError):
+            await pool.acquire()
+        return _is_open(ws), len(pool._background), pool.size
+
+    assert simulate(scenario, SimulatorConfig(handshake_latency=0.2)) == (False, 0, 0)
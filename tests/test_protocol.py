@@ -0,0 +1,68 @@
+import json
+import uuid
+
+import pytest
+
+from dashscope_realtime import protocol
+
+TEXTS = ["你好，世界", 'say "hi"\\n', "line\nbreak\ttab", "emoji 😀   \x00", ""]
+
+
+def _dumps(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+@pytest.fixture(params=["json", "orjson", "msgspec"])
+def backend(request):
+    previous = protocol.backend
+    try:
+        protocol.use_backend(request.param)
+    except ImportError:
+        pytest.skip("%s is not installed" % request.param)
+    yield request.param
+    protocol.use_backend(previous)
+
+
+def test_finish_task_matches_json_dumps():
+    task_id = uuid.uuid4().hex
+    assert protocol.finish_task(task_id) == _dumps({
+        "header": {"action": "finish-task", "task_id": task_id, "streaming": "duplex"},
+        "payload": {"input": {}},
+    })
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_continue_task_matches_json_dumps(backend, text):
+    task_id = uuid.uuid4().hex
+    message = {
+        "header": {"action": "continue-task", "task_id": task_id, "streaming": "duplex"},
+        "payload": {"input": {"text": text}},
+    }
+    rendered = protocol.continue_task(task_id, text)
+    assert json.loads(rendered) == message
+    if backend == "json":
+        assert rendered == _dumps(message)
+
+
+def test_run_task_template_matches_json_dumps():
+    payload = {
+        "task_group": "audio",
+        "task": "tts",
+        "function": "SpeechSynthesizer",
+        "model": "cosyvoice-v2",
+        "parameters": {"voice": "longxiaochun", "format": "pcm", "sample_rate": 22050, "volume": 50,
+                       "rate": 1.0, "enable_ssml": False, "instruction": '带"引号"的说明\n'},
+        "input": {},
+    }
+    template = protocol.RunTaskTemplate(payload)
+    for _ in range(2):
+        task_id = uuid.uuid4().hex
+        assert template.render(task_id) == _dumps({
+            "header": {"action": "run-task", "task_id": task_id, "streaming": "duplex"},
+            "payload": payload,
+        })
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        protocol.use_backend("yaml")
@@ -0,0 +1,20 @@
+from dashscope_realtime.reconnect import ReplayBuffer
+
+
+def test_ack_rounds_down_to_sample_boundary():
+    buffer = ReplayBuffer(1 << 20, align=2)
+    buffer.append(b"\x00" * 1000)
+    # 22.05kHz 下 1ms = 44.1 字节，确认位置不能落在采样中间
+    buffer.ack(int(3 * 44.1))
+    assert buffer.start == 132
+    assert [offset for offset, _ in buffer.chunks_from(buffer.start)] == [132]
+
+
+def test_trim_keeps_start_aligned():
+    buffer = ReplayBuffer(10, align=2)
+    for size in (3, 5, 7):
+        buffer.append(b"\x00" * size)
+    assert buffer.start % 2 == 0
+    chunks = buffer.chunks_from(buffer.start)
+    assert chunks[0][0] == buffer.start
+    assert sum(len(chunk) for _, chunk in chunks) == buffer.nbytes
@@ -0,0 +1,96 @@
+import asyncio
+import struct
+import wave
+
+import pytest
+
+from dashscope_realtime import AudioFormat, Recorder, RecorderConfig
+from dashscope_realtime.batch import _locate_pcm
+
+CHUNK = b"\x01\x02" * 160
+
+
+def _chunks(path: str):
+    with open(path, "rb") as f:
+        data = f.read()
+    chunks, pos = {}, 12
+    while pos + 8 <= len(data):
+        chunk_id, size = struct.unpack_from("<4sI", data, pos)
+        chunks[chunk_id] = data[pos + 8:pos + 8 + size]
+        pos += 8 + size + (size & 1)
+    return data, chunks
+
+
+def test_close_fixes_up_pcm_wav_header(tmp_path):
+    async def scenario():
+        recorder = Recorder(RecorderConfig(directory=str(tmp_path), fsync=False))
+        track = recorder.track("call", AudioFormat(16000))
+        for _ in range(10):
+            track.write(CHUNK)
+        path = await track.close()
+        await recorder.close()
+        return path, track
+
+    path, track = asyncio.run(scenario())
+    assert track.bytes_written == len(CHUNK) * 10
+    # 预分配的空间已经截掉，头里的长度是真实长度
+    with wave.open(path, "rb") as wav:
+        assert (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) == (16000, 1, 2)
+        assert wav.readframes(wav.getnframes()) == CHUNK * 10
+    data, chunks = _chunks(path)
+    assert struct.unpack_from("<I", data, 4)[0] == len(data) - 8
+    assert b"fact" not in chunks
+
+
+@pytest.mark.parametrize("encoding", ["mulaw", "alaw"])
+def test_companded_wav_has_fact_chunk(tmp_path, encoding):
+    fmt = AudioFormat(8000, encoding=encoding)
+
+    async def scenario():
+        recorder = Recorder(RecorderConfig(directory=str(tmp_path), fsync=False))
+        track = recorder.track("call", fmt)
+        track.write(b"\xff" * 800)
+        await recorder.close()
+        return track.path
+
+    data, chunks = _chunks(asyncio.run(scenario()))
+    assert struct.unpack_from("<I", data, 4)[0] == len(data) - 8
+    assert len(chunks[b"fmt "]) == 18
+    assert struct.unpack("<I", chunks[b"fact"]) == (800,)
+    assert chunks[b"data"] == b"\xff" * 800
+    with memoryview(data) as view:
+        offset, size, located = _locate_pcm(view)
+    assert (data[offset:offset + size], located) == (b"\xff" * 800, fmt)
+
+
+def test_chunks_over_pending_limit_are_dropped(tmp_path):
+    async def scenario():
+        recorder = Recorder(RecorderConfig(directory=str(tmp_path), max_pending_bytes=len(CHUNK), fsync=False))
+        track = recorder.track("call")
+        track.write(CHUNK)
+        track.write(CHUNK + b"\x00")  # 单块就超过上限
+        await recorder.close()
+        with open(track.path, "rb") as f:
+            return f.read(), track.frames, track.dropped, recorder.dropped, recorder.pending_bytes
+
+    assert asyncio.run(scenario()) == (CHUNK, 1, 1, 1, 0)
+
+
+def test_failing_track_does_not_stop_the_others_closing(tmp_path):
+    (tmp_path / "blocked").write_bytes(b"")  # 同名文件占住了目录
+
+    async def scenario():
+        recorder = Recorder(RecorderConfig(directory=str(tmp_path), fsync=False))
+        bad = recorder.track("blocked/call", AudioFormat(16000))
+        good = recorder.track("call", AudioFormat(16000))
+        bad.write(CHUNK)
+        good.write(CHUNK)
+        with pytest.raises(OSError):
+            await recorder.close()
+        return bad, good, recorder._thread
+
+    bad, good, thread = asyncio.run(scenario())
+    assert bad.error is not None and bad.dropped == 1
+    assert thread is None
+    with wave.open(good.path, "rb") as wav:
+        assert wav.readframes(wav.getnframes()) == CHUNK
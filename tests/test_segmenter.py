@@ -0,0 +1,29 @@
+import asyncio
+
+from dashscope_realtime import SegmenterConfig, segment_text
+
+CONFIG = SegmenterConfig(min_chars=4, first_min_chars=4, max_wait=5)
+
+
+def _segments(tokens, config=CONFIG):
+    async def source():
+        for token in tokens:
+            yield token
+
+    async def collect():
+        return [segment async for segment in segment_text(source(), config)]
+
+    return asyncio.run(collect())
+
+
+def test_latin_weak_marks_need_whitespace():
+    text = "It costs 1,000 dollars at 3:00 today, then more: later"
+    assert _segments([text]) == ["It costs 1,000 dollars at 3:00 today,", "then more:", "later"]
+
+
+def test_number_split_across_tokens():
+    assert _segments(["price is 1,", "000 yuan"]) == ["price is 1,000 yuan"]
+
+
+def test_cjk_weak_marks_cut_directly():
+    assert _segments(["你好呀朋友，今天天气：不错"]) == ["你好呀朋友，", "今天天气：", "不错"]
@@ -0,0 +1,84 @@
+import asyncio
+import random
+import select
+import threading
+import time
+
+from dashscope_realtime.shmring import RingReader, ShmRing
+
+
+class _RacingRing(ShmRing):
+    # 在写入数据的过程中让消费者把环读空，复现"发布前读到的 tail 已经过时"
+    race = False
+
+    def _copy_in(self, pos, data):
+        if self.race:
+            self.race = False
+            self.clear_bell()
+            assert self.read() is not None
+        return super()._copy_in(pos, data)
+
+
+def test_write_rings_when_consumer_drains_during_write():
+    ring = _RacingRing(capacity=1024)
+    try:
+        assert ring.write(1, 1, b"first")
+        ring.race = True
+        assert ring.write(1, 1, b"second")
+        readable, _, _ = select.select([ring.bell_fd], [], [], 0)
+        assert readable
+        assert ring.read() == (1, 1, b"second")
+    finally:
+        ring.close()
+
+
+def test_sparse_writes_are_all_delivered():
+    count = 2000
+    ring = ShmRing(capacity=4096)
+
+    def produce():
+        rng = random.Random(1)
+        for i in range(count):
+            while not ring.write(0, 1, i.to_bytes(4, "little") * rng.randint(1, 64)):
+                time.sleep(0.0001)
+            if rng.random() < 0.3:
+                time.sleep(rng.random() * 0.0005)
+
+    async def consume():
+        reader = RingReader(ring, poll_interval=0)  # 只靠门铃，漏按就会超时
+        try:
+            for i in range(count):
+                _, _, payload = await asyncio.wait_for(reader.get(), 5)
+                assert payload[:4] == i.to_bytes(4, "little")
+        finally:
+            reader.close()
+
+    producer = threading.Thread(target=produce)
+    try:
+        async def main():
+            producer.start()
+            await consume()
+        asyncio.run(main())
+    finally:
+        producer.join()
+        ring.close()
+
+
+def test_reader_polls_without_bell():
+    ring = ShmRing(capacity=1024)
+
+    async def main():
+        reader = RingReader(ring, poll_interval=0.01)
+        try:
+            get = asyncio.ensure_future(reader.get())
+            await asyncio.sleep(0.02)  # 消费者已经在等门铃
+            ring.write(2, 3, b"x")
+            ring.clear_bell()  # 门铃丢失
+            return await asyncio.wait_for(get, 1)
+        finally:
+            reader.close()
+
+    try:
+        assert asyncio.run(main()) == (2, 3, b"x")
+    finally:
+        ring.close()
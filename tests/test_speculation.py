@@ -0,0 +1,111 @@
+import asyncio
+
+from dashscope_realtime import DashScopeRealtimeTTS, InProcessMetrics, SimulatorConfig, SpeculationConfig, Speculator
+
+BYTES_PER_CHAR = SimulatorConfig().tts_bytes_per_char
+CONFIG = SpeculationConfig(stable_ms=20)
+SLOW = SimulatorConfig(tts_first_chunk_latency=0.1)  # 预合成在被取消之前不会完成
+
+
+def _reply(text: str) -> str:
+    return "好的，" + text
+
+
+async def _speculator(sim, **kwargs):
+    tts = DashScopeRealtimeTTS("test", url=sim.url)
+    await tts.connect()
+    return tts, Speculator(tts, _reply, CONFIG, **kwargs)
+
+
+async def _started(speculator: Speculator):
+    while speculator._current is None:
+        await asyncio.sleep(0.005)
+    return speculator._current
+
+
+def test_hit_returns_buffered_audio(simulate):
+    async def scenario(sim):
+        metrics = InProcessMetrics()
+        tts, speculator = await _speculator(sim, metrics=metrics)
+        speculator.observe_partial("明天去上海")
+        started = await _started(speculator)
+        await started.task
+        # 句末结果多了句号，回复仍然一致
+        spec = speculator.commit(_reply("明天去上海。"))
+        audio = b"".join([chunk async for chunk in spec.chunks()])
+        await tts.disconnect()
+        return (spec is started, len(audio), speculator.hits, speculator.misses,
+                metrics.counters.get(("speculation_hits", ())),
+                metrics.histogram("speculation_saved_seconds").count)
+
+    assert simulate(scenario) == (True, len("好的，明天去上海") * BYTES_PER_CHAR, 1, 0, 1, 1)
+
+
+def test_miss_cancels_the_speculation(simulate):
+    async def scenario(sim):
+        tts, speculator = await _speculator(sim)
+        speculator.observe_partial("明天去上海")
+        started = await _started(speculator)
+        spec = speculator.commit(_reply("明天去北京"))
+        await asyncio.wait({started.task})
+        await tts.disconnect()
+        return spec, started.task.cancelled(), speculator.hits, speculator.misses, speculator.hit_rate
+
+    assert simulate(scenario, SLOW) == (None, True, 0, 1, 0.0)
+
+
+def test_changed_partial_discards_previous_speculation(simulate):
+    async def scenario(sim):
+        tts, speculator = await _speculator(sim)
+        speculator.observe_partial("明天去上")
+        first = await _started(speculator)
+        speculator.observe_partial("明天去上海")
+        while speculator._current is first:
+            await asyncio.sleep(0.005)
+        second = speculator._current
+        await second.task
+        spec = speculator.commit(_reply("明天去上海"))
+        audio = b"".join([chunk async for chunk in spec.chunks()])
+        await tts.disconnect()
+        return first.task.cancelled(), speculator.discarded, spec is second, len(audio)
+
+    assert simulate(scenario, SLOW) == (True, 1, True, len("好的，明天去上海") * BYTES_PER_CHAR)
+
+
+def test_unstable_or_short_partials_do_not_start(simulate):
+    async def scenario(sim):
+        tts = DashScopeRealtimeTTS("test", url=sim.url)
+        await tts.connect()
+        speculator = Speculator(tts, lambda text: text or None, SpeculationConfig(stable_ms=50, min_chars=3))
+        # 中间结果一直在变，计时器不断重置
+        for text in ("明", "明天", "明天去", "明天去上"):
+            speculator.observe_partial(text)
+            await asyncio.sleep(0.02)
+        speculator._reset_candidate()
+        speculator.observe_partial("好。")  # 去掉标点只剩一个字
+        await asyncio.sleep(0.1)
+        await tts.disconnect()
+        return speculator._current, speculator._last_task
+
+    assert simulate(scenario) == (None, None)
+
+
+def test_cancel_stops_committed_playback(simulate):
+    async def scenario(sim):
+        tts, speculator = await _speculator(sim)
+        speculator.observe_partial("今天天气怎么样" * 10)
+        started = await _started(speculator)
+        spec = speculator.commit(_reply("今天天气怎么样" * 10))
+        chunks = spec.chunks()
+        first = await chunks.__anext__()
+        await speculator.cancel()
+        # 预合成被取消后缓冲结束，消费方不会一直等下去
+        rest = await asyncio.wait_for(_drain(chunks), 1)
+        await tts.disconnect()
+        return bool(first), started.task.cancelled(), rest < len(spec.reply) * BYTES_PER_CHAR // 2
+
+    assert simulate(scenario, SimulatorConfig(tts_chunk_interval=0.01)) == (True, True, True)
+
+
+async def _drain(chunks) -> int:
+    return sum([len(chunk) async for chunk in chunks])
@@ -0,0 +1,73 @@
+import asyncio
+
+from dashscope_realtime import DashScopeRealtimeTTS, SimulatorConfig
+
+BYTES_PER_CHAR = SimulatorConfig().tts_bytes_per_char
+
+
+def test_stream_yields_all_audio(simulate):
+    async def scenario(sim):
+        tts = DashScopeRealtimeTTS("test", url=sim.url)
+        chunks = [chunk async for chunk in tts.stream("你好世界")]
+        await tts.disconnect()
+        return chunks
+
+    assert sum(map(len, simulate(scenario))) == 4 * BYTES_PER_CHAR
+
+
+def test_stream_consumer_leaving_early(simulate):
+    async def scenario(sim):
+        tts = DashScopeRealtimeTTS("test", url=sim.url)
+        async for _ in tts.stream("长" * 40, maxsize=1):
+            await asyncio.sleep(0.02)
+            break
+        chunks = [chunk async for chunk in tts.stream("好的")]
+        await tts.disconnect()
+        return chunks
+
+    config = SimulatorConfig(tts_chunk_interval=0.01)
+    assert sum(map(len, simulate(scenario, config))) == 2 * BYTES_PER_CHAR
+
+
+def _interrupt_scenario(**kwargs):
+    async def scenario(sim):
+        audio = []
+        got = asyncio.Event()
+
+        def send_audio(chunk):
+            audio.append(chunk)
+            got.set()
+
+        tts = DashScopeRealtimeTTS("test", url=sim.url, send_audio=send_audio, **kwargs)
+        await tts.say("长" * 50)
+        await got.wait()
+        await asyncio.sleep(0.05)
+        await tts.interrupt()
+        # 打断后不能再收到旧任务的音频
+        played = len(audio)
+        await asyncio.sleep(0.1)
+        assert len(audio) == played
+        audio.clear()
+        got.clear()
+        await tts.say("好的")
+        await tts.finish()
+        await asyncio.wait_for(tts.done_event.wait(), 5)
+        await asyncio.sleep(0.05)
+        await tts.disconnect()
+        return audio, sim.connections
+
+    return scenario
+
+
+def test_interrupt_same_socket(simulate):
+    config = SimulatorConfig(tts_chunk_interval=0.01)
+    audio, _ = simulate(_interrupt_scenario(), config)
+    assert sum(map(len, audio)) == 2 * BYTES_PER_CHAR
+
+
+def test_interrupt_switches_to_standby_socket(simulate):
+    config = SimulatorConfig(tts_chunk_interval=0.01, handshake_latency=0.05)
+    audio, connections = simulate(_interrupt_scenario(standby=True), config)
+    assert sum(map(len, audio)) == 2 * BYTES_PER_CHAR
+    # 一条主连接、打断前预建的备用连接，以及切换后补上的新备用连接
+    assert connections == 3
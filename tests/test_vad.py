@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from dashscope_realtime import RealtimeClient, VADConfig, VoiceDetector
+from dashscope_realtime.vad import VADGate
+
+FRAME = 320 * 2  # 16kHz 20ms
+
+
+class AlwaysSpeech(VoiceDetector):
+    def is_speech(self, frame: memoryview) -> bool:
+        return True
+
+
+def test_detector_interface_is_abstract():
+    with pytest.raises(TypeError):
+        VoiceDetector()
+
+
+def test_concurrent_writes_keep_frame_order():
+    async def scenario():
+        sent = []
+
+        async def send(frame):
+            await asyncio.sleep(0)
+            sent.append(frame)
+
+        gate = VADGate(send, 16000, VADConfig(onset_ms=20, pre_roll_ms=20), AlwaysSpeech())
+        frames = [bytes([i]) * FRAME for i in range(1, 9)]
+        # 写入方并发、且每次不是整帧，处理中 _pending 会被扩容
+        await gate.write(frames[0][:100])
+        await asyncio.gather(gate.write(frames[0][100:] + frames[1]), gate.write(b"".join(frames[2:])))
+        await gate.flush()
+        return sent, frames
+
+    sent, frames = asyncio.run(scenario())
+    assert sent == frames
+
+
+def test_flush_sends_trailing_partial_frame():
+    async def scenario():
+        sent = []
+
+        async def send(frame):
+            sent.append(frame)
+
+        gate = VADGate(send, 16000, VADConfig(onset_ms=20, pre_roll_ms=20), AlwaysSpeech())
+        await gate.write(b"\x01" * (FRAME + 100))
+        await gate.flush()
+        return sent
+
+    assert [len(frame) for frame in asyncio.run(scenario())] == [FRAME, 100]
+
+
+def test_client_stop_flushes_vad_tail(simulate):
+    async def scenario(sim):
+        client = RealtimeClient("test", url=sim.url, vad=VADConfig(onset_ms=20, pre_roll_ms=20),
+                                vad_detector=AlwaysSpeech())
+        await client.start()
+        await client.send_audio_chunk(b"\x01\x00" * 1650)  # 100ms 多 30 个采样
+        await client.stop()
+        await asyncio.sleep(0.05)
+        return sim.audio_bytes_received
+
+    assert simulate(scenario) == 3300